@@ -1,9 +1,15 @@
 import pytest
+import pytest_asyncio
 import pandas as pd
+import numpy as np
 import shutil
 from pathlib import Path
 import asyncio
-from linkedin_prospecting_csv import csv_ops
+import threading
+import json
+from linkedin_prospecting_csv import (
+    csv_ops, search_index, keyset, key_index, append_log, parquet_shadow, stats_sidecar
+)
 
 # Paths to real test data
 TEST_DIR = Path(__file__).parent
@@ -17,6 +23,24 @@ def temp_csv(tmp_path):
     shutil.copy(SMALL_CSV, temp_file)
     return temp_file
 
+@pytest_asyncio.fixture(params=[False, True], ids=["in_place", "append_log"])
+async def append_mode(request, monkeypatch):
+    """
+    Runs a test with appends written in place, then through the append log.
+    Logged rows only reach the CSV through compact_append_log (or another
+    write), so tests reading the file directly compact first.
+    """
+    monkeypatch.setattr(csv_ops, "APPEND_LOG", request.param)
+    monkeypatch.setattr(append_log, "COMPACT_SECONDS", 3600)
+    yield request.param
+    for compactor in append_log._COMPACTORS.values():
+        compactor.task.cancel()
+    append_log._COMPACTORS.clear()
+
+def pin_in_place(monkeypatch):
+    """For tests inspecting sidecars that only in-place appends maintain."""
+    monkeypatch.setattr(csv_ops, "APPEND_LOG", False)
+
 @pytest.mark.asyncio
 async def test_create_new_csv(tmp_path):
     """Test creating a new CSV with Golden Schema."""
@@ -48,7 +72,7 @@ async def test_auto_normalization_on_load(temp_csv):
     assert list(df_normalized.columns[:len(csv_ops.GOLDEN_SCHEMA)]) == csv_ops.GOLDEN_SCHEMA
 
 @pytest.mark.asyncio
-async def test_append_with_preview_and_normalization(temp_csv):
+async def test_append_with_preview_and_normalization(temp_csv, append_mode):
     """Test appending records with legacy names and getting a preview."""
     # Records with legacy names
     profiles_to_add = [
@@ -69,8 +93,11 @@ async def test_append_with_preview_and_normalization(temp_csv):
     assert result["added"] == 2
     assert "New Person 1" in result["preview"]
     assert "New Person 2" in result["preview"]
+    results = await csv_ops.filter_profiles(str(temp_csv), min_score=25)
+    assert "New Person 1" in [r["full_name"] for r in results]
     
     # Verify in file
+    await csv_ops.compact_append_log(str(temp_csv))
     df = pd.read_csv(temp_csv)
     assert "New Person 1" in df["full_name"].values
     assert 25 in df["match_score"].values
@@ -121,3 +148,1012 @@ async def test_export_segment_golden_schema(temp_csv, tmp_path):
     df = pd.read_csv(output_file)
     assert list(df.columns) == ["full_name", "match_score"]
     assert (df["match_score"] >= 20).all()
+
+@pytest.mark.asyncio
+async def test_append_incremental_keeps_existing_bytes(tmp_path, append_mode):
+    """Appending to a Golden Schema file only writes the new rows at the end."""
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A", "linkedin_url": "https://linkedin.com/in/a", "match_score": 10}
+    ])
+    before = csv_file.read_bytes()
+    
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A again", "linkedin_url": " https://linkedin.com/in/a "},
+        {"full_name": "B", "linkedin_url": "https://linkedin.com/in/b"},
+        {"full_name": "B again", "linkedin_url": "https://linkedin.com/in/b"}
+    ])
+    assert result["added"] == 1
+    assert result["skipped_duplicates"] == 2
+    assert result["total_profiles"] == 2
+    assert result["preview"] == ["B"]
+    await csv_ops.compact_append_log(str(csv_file))
+    assert csv_file.read_bytes().startswith(before)
+
+@pytest.mark.asyncio
+async def test_append_repairs_truncated_trailer(tmp_path, append_mode):
+    """A file that does not end on a complete row falls back to a full rewrite."""
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A", "linkedin_url": "https://linkedin.com/in/a"}
+    ])
+    await csv_ops.compact_append_log(str(csv_file))
+    csv_file.write_bytes(csv_file.read_bytes().rstrip(b"\r\n"))
+    
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "B", "linkedin_url": "https://linkedin.com/in/b"}
+    ])
+    assert result["added"] == 1
+    df = pd.read_csv(csv_file)
+    assert df["full_name"].tolist() == ["A", "B"]
+
+@pytest.mark.asyncio
+async def test_key_index_sidecar_rebuilds_when_stale(tmp_path, monkeypatch):
+    """The .keys sidecar tracks appends and is rebuilt after external edits."""
+    pin_in_place(monkeypatch)
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A", "linkedin_url": "https://linkedin.com/in/a"}
+    ])
+    keys_file = tmp_path / "golden.csv.keys"
+    assert keys_file.exists()
+    
+    # Edit the CSV outside the server: the sidecar no longer matches
+    with open(csv_file, "a", encoding="utf-8") as f:
+        f.write("C,https://linkedin.com/in/c,,,,,,,,,\n")
+    key_index._KEY_INDEXES.clear()
+    
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "C again", "linkedin_url": "https://linkedin.com/in/c"},
+        {"full_name": "D", "linkedin_url": "https://linkedin.com/in/d"}
+    ])
+    assert result["added"] == 1
+    assert result["total_profiles"] == 3
+    
+    index = csv_ops.load_key_index(csv_file, "linkedin_url")
+    assert set(index["keys"]) == {"linkedin.com/in/a", "linkedin.com/in/c", "linkedin.com/in/d"}
+
+@pytest.mark.asyncio
+async def test_frame_cache_skips_parsing_unchanged_file(temp_csv, monkeypatch):
+    """Repeated queries reuse the cached frame until the module writes the file."""
+    await csv_ops.filter_profiles(str(temp_csv))
+    
+    calls = []
+    real_read_csv = pd.read_csv
+    monkeypatch.setattr(csv_ops.pd, "read_csv", lambda *a, **kw: calls.append(a) or real_read_csv(*a, **kw))
+    
+    await csv_ops.filter_profiles(str(temp_csv), min_score=10)
+    await csv_ops.search_profiles(str(temp_csv), search_term="meta")
+    await csv_ops.get_csv_stats(str(temp_csv))
+    assert calls == []
+    
+    await csv_ops.append_profiles_to_csv(str(temp_csv), [
+        {"full_name": "Cached Person", "linkedin_url": "https://linkedin.com/in/cached"}
+    ])
+    results = await csv_ops.search_profiles(str(temp_csv), search_term="Cached Person")
+    assert len(results) == 1
+
+def test_frame_cache_lru_eviction(tmp_path):
+    """Least recently used frames are evicted once the budget is exceeded."""
+    frames = {}
+    for name in ["a", "b", "c"]:
+        path = tmp_path / f"{name}.csv"
+        path.write_text("x\n1\n")
+        frames[name] = (path, pd.DataFrame({"x": range(100)}))
+    
+    size = int(frames["a"][1].memory_usage(index=True, deep=True).sum())
+    cache = csv_ops.FrameCache(max_bytes=size * 2)
+    cache.put(*frames["a"])
+    cache.put(*frames["b"])
+    assert cache.get(frames["a"][0]) is not None
+    cache.put(*frames["c"])
+    
+    assert cache.get(frames["b"][0]) is None
+    assert cache.get(frames["a"][0]) is not None
+    assert cache.get(frames["c"][0]) is not None
+
+@pytest.mark.asyncio
+async def test_tools_do_not_block_event_loop(temp_csv, monkeypatch):
+    """A slow tool call runs on the worker pool while the loop keeps serving."""
+    import time
+    real_load = csv_ops.load_profiles
+    
+    def slow_load(*args, **kwargs):
+        time.sleep(0.3)
+        return real_load(*args, **kwargs)
+    monkeypatch.setattr(csv_ops, "load_profiles", slow_load)
+    
+    order = []
+    async def quick():
+        await asyncio.sleep(0.01)
+        order.append("quick")
+    async def slow():
+        await csv_ops.get_csv_stats(str(temp_csv))
+        order.append("slow")
+    
+    await asyncio.gather(slow(), quick())
+    assert order == ["quick", "slow"]
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_are_coalesced(tmp_path, monkeypatch, append_mode):
+    """Parallel appends to one file lose no rows and share write cycles."""
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    
+    cycles = []
+    real_append_batches = csv_ops._append_batches
+    def counting_append_batches(path, batches, norm_dedupe):
+        cycles.append(len(batches))
+        return real_append_batches(path, batches, norm_dedupe)
+    monkeypatch.setattr(csv_ops, "_append_batches", counting_append_batches)
+    
+    results = await asyncio.gather(*[
+        csv_ops.append_profiles_to_csv(str(csv_file), [
+            {"full_name": f"P{i}", "linkedin_url": f"https://linkedin.com/in/p{i}"},
+            {"full_name": "Shared", "linkedin_url": "https://linkedin.com/in/shared"}
+        ])
+        for i in range(5)
+    ])
+    
+    assert sum(cycles) == 5
+    assert len(cycles) < 5
+    assert sum(r["added"] for r in results) == 6
+    assert [r["total_profiles"] for r in results] == [2, 3, 4, 5, 6]
+    await csv_ops.compact_append_log(str(csv_file))
+    df = pd.read_csv(csv_file)
+    assert len(df) == 6
+
+@pytest.mark.asyncio
+async def test_cancelled_rewrite_keeps_its_write_lock(tmp_path, monkeypatch):
+    """A cancelled dedupe holds the file's lock until its worker thread is done."""
+    pin_in_place(monkeypatch)
+    # The in-memory dedupe, which rewrites through safe_to_csv
+    monkeypatch.setattr(csv_ops, "STREAMING_THRESHOLD_BYTES", 1 << 40)
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [{"full_name": "A", "linkedin_url": "u/a"}])
+    
+    order, started, release = [], threading.Event(), threading.Event()
+    real_safe_to_csv = csv_ops.safe_to_csv
+    def slow_safe_to_csv(df, path):
+        order.append("rewrite start")
+        started.set()
+        release.wait(5)
+        real_safe_to_csv(df, path)
+        order.append("rewrite end")
+    monkeypatch.setattr(csv_ops, "safe_to_csv", slow_safe_to_csv)
+    
+    dedupe = asyncio.create_task(csv_ops.deduplicate_csv(str(csv_file)))
+    await asyncio.to_thread(started.wait, 5)
+    dedupe.cancel()
+    append = asyncio.create_task(csv_ops.append_profiles_to_csv(str(csv_file), [{"full_name": "B", "linkedin_url": "u/b"}]))
+    await asyncio.sleep(0.1)
+    assert not dedupe.done() and not append.done()
+    
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await dedupe
+    assert (await append)["added"] == 1
+    assert order == ["rewrite start", "rewrite end"]
+    assert pd.read_csv(csv_file)["full_name"].tolist() == ["A", "B"]
+
+@pytest.mark.asyncio
+async def test_cancelled_append_flush_settles_other_batches(tmp_path, monkeypatch, append_mode):
+    """Cancelling the caller that flushes coalesced appends fails only that caller."""
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    
+    started, release = threading.Event(), threading.Event()
+    real_append_batches = csv_ops._append_batches
+    def slow_append_batches(path, batches, norm_dedupe):
+        started.set()
+        release.wait(5)
+        return real_append_batches(path, batches, norm_dedupe)
+    monkeypatch.setattr(csv_ops, "_append_batches", slow_append_batches)
+    
+    def append(name):
+        return asyncio.create_task(csv_ops.append_profiles_to_csv(
+            str(csv_file), [{"full_name": name, "linkedin_url": f"https://linkedin.com/in/{name}"}]
+        ))
+    # Both batches queue behind a held lock, so the first caller flushes both
+    async with csv_ops.path_lock(csv_file).write():
+        flusher, waiter = append("a"), append("b")
+        await asyncio.sleep(0.01)
+    await asyncio.to_thread(started.wait, 5)
+    flusher.cancel()
+    release.set()
+    
+    with pytest.raises(asyncio.CancelledError):
+        await flusher
+    result = await waiter
+    assert (result["added"], result["total_profiles"]) == (1, 2)
+    await csv_ops.compact_append_log(str(csv_file))
+    assert pd.read_csv(csv_file)["full_name"].tolist() == ["a", "b"]
+
+def test_read_profiles_typed_projection(temp_csv):
+    """The schema-aware loader declares dtypes and parses only requested columns."""
+    df = csv_ops.read_profiles(temp_csv, columns=["match_score", "found_date", "location"])
+    assert list(df.columns) == ["match_score", "found_date", "_found_date", "location"]
+    assert str(df["match_score"].dtype) == "Int64"
+    assert pd.api.types.is_datetime64_any_dtype(df["_found_date"])
+    assert isinstance(df["location"].dtype, pd.CategoricalDtype)
+
+def test_read_profiles_coerces_bad_scores(tmp_path):
+    """Unparseable scores become missing values instead of failing the load."""
+    csv_file = tmp_path / "scores.csv"
+    csv_file.write_text("full_name,match_score,found_date\nA,12,2026-02-01\nB,N/A,not a date\n")
+    df = csv_ops.read_profiles(csv_file)
+    assert df["match_score"].tolist()[0] == 12
+    assert df["match_score"].isna().tolist() == [False, True]
+    assert df["found_date"].tolist() == ["2026-02-01", "not a date"]
+    assert df["_found_date"].isna().tolist() == [False, True]
+
+@pytest.mark.asyncio
+async def test_found_dates_are_returned_as_written(tmp_path):
+    """Dates in mixed formats read and export unchanged; filters and stats still parse them."""
+    csv_file, out = tmp_path / "dates.csv", tmp_path / "out.csv"
+    csv_file.write_text(
+        "full_name,linkedin_url,match_score,found_date\n"
+        "A,u/a,10,02/16/2026\nB,u/b,11,02/17/2026\nC,u/c,12,2026-02-18 10:30\nD,u/d,13,soon\n"
+    )
+    written = ["02/16/2026", "02/17/2026", "2026-02-18 10:30", "soon"]
+    for _ in range(2):  # from the CSV, then from the Parquet shadow
+        results = await csv_ops.filter_profiles(str(csv_file))
+        assert sorted((r["full_name"], r["found_date"]) for r in results) == list(zip("ABCD", written))
+        assert "_found_date" not in results[0]
+        results = await csv_ops.filter_profiles(str(csv_file), found_after_date="2026-02-16")
+        assert sorted(r["full_name"] for r in results) == ["B", "C"]
+        csv_ops._FRAME_CACHE.invalidate(csv_file.absolute())
+    
+    await csv_ops.export_segment(str(csv_file), str(out))
+    exported = pd.read_csv(out, dtype=str)
+    assert sorted(exported["found_date"]) == sorted(written)
+    assert "_found_date" not in exported.columns
+    stats = await csv_ops.get_csv_stats(str(csv_file))
+    assert stats["found_date_range"] == {"earliest": "2026-02-16", "latest": "2026-02-18"}
+
+def test_pyarrow_engine_falls_back_to_c_parser(tmp_path, monkeypatch):
+    """Files the pyarrow engine rejects are still parsed by the C engine."""
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(csv_ops, "CSV_ENGINE", "pyarrow")
+    
+    csv_file = tmp_path / "ragged.csv"
+    csv_file.write_text("full_name,linkedin_url,match_score\nA,https://linkedin.com/in/a,10\nB\n")
+    df = csv_ops.read_profiles(csv_file)
+    assert df["full_name"].tolist() == ["A", "B"]
+    assert df["match_score"].tolist()[0] == 10
+
+@pytest.mark.asyncio
+async def test_pyarrow_engine_keeps_date_text(tmp_path, monkeypatch):
+    """Dates and timestamps the pyarrow engine would infer come back as written."""
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(csv_ops, "CSV_ENGINE", "pyarrow")
+    pin_in_place(monkeypatch)
+
+    csv_file = tmp_path / "dated.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A", "linkedin_url": "https://linkedin.com/in/a", "found_date": "2026-02-10"},
+        {"full_name": "B", "linkedin_url": "https://linkedin.com/in/b"},
+    ])
+    results = await csv_ops.filter_profiles(str(csv_file), found_after_date="2026-02-01")
+    assert [r["found_date"] for r in results] == ["2026-02-10"]
+
+    df = csv_ops._read_csv(csv_file)
+    assert df["found_date"].tolist()[0] == "2026-02-10" and pd.isna(df["found_date"].tolist()[1])
+    stamped = tmp_path / "stamped.csv"
+    stamped.write_text("full_name,found_date\nA,2026-02-10T10:00:00\nB,2026-02-11 09:30\n")
+    assert csv_ops._read_csv(stamped)["found_date"].tolist() == ["2026-02-10T10:00:00", "2026-02-11 09:30"]
+
+@pytest.mark.asyncio
+async def test_parquet_shadow_serves_reads(temp_csv, monkeypatch):
+    """Writes refresh the Parquet shadow and query tools read from it while fresh."""
+    if not parquet_shadow.shadow_available():
+        pytest.skip("Parquet shadow needs pyarrow")
+    shadow = temp_csv.with_name(temp_csv.name + ".parquet")
+    
+    expected = await csv_ops.filter_profiles(str(temp_csv), min_score=15, found_after_date="2026-02-11")
+    assert shadow.exists()
+    
+    csv_ops._FRAME_CACHE.clear()
+    def no_csv_parsing(*args, **kwargs):
+        raise AssertionError("CSV should not be parsed while the shadow is fresh")
+    monkeypatch.setattr(csv_ops, "_read_csv", no_csv_parsing)
+    results = await csv_ops.filter_profiles(str(temp_csv), min_score=15, found_after_date="2026-02-11")
+    assert results == expected
+    stats = await csv_ops.get_csv_stats(str(temp_csv))
+    assert stats["total_profiles"] == 10
+
+def test_parse_process_pool_spawns_workers(temp_csv, monkeypatch):
+    """Parses in the process pool match in-process ones, from spawned workers."""
+    monkeypatch.setattr(csv_ops, "PARSE_PROCESSES", 2)
+    monkeypatch.setattr(csv_ops, "_PROCESS_POOL", None)
+    pooled = csv_ops.read_profiles(temp_csv)
+    assert csv_ops._PROCESS_POOL._mp_context.get_start_method() == "spawn"
+    csv_ops._PROCESS_POOL.shutdown()
+    
+    monkeypatch.setattr(csv_ops, "PARSE_PROCESSES", 0)
+    pd.testing.assert_frame_equal(pooled, csv_ops.read_profiles(temp_csv))
+
+@pytest.mark.asyncio
+async def test_parquet_shadow_only_for_queried_files(temp_csv, tmp_path):
+    """Exports and new files get no shadow; rewrites refresh an existing one."""
+    if not parquet_shadow.shadow_available():
+        pytest.skip("Parquet shadow needs pyarrow")
+    new_csv, exported = tmp_path / "new.csv", tmp_path / "segment.csv"
+    await csv_ops.create_new_csv(str(new_csv))
+    await csv_ops.export_segment(str(temp_csv), str(exported), min_score=15)
+    assert not new_csv.with_name("new.csv.parquet").exists()
+    assert not exported.with_name("segment.csv.parquet").exists()
+    
+    assert parquet_shadow.shadow_is_fresh(temp_csv, csv_ops._file_signature(temp_csv))
+    await csv_ops.deduplicate_csv(str(temp_csv))
+    assert parquet_shadow.shadow_is_fresh(temp_csv, csv_ops._file_signature(temp_csv))
+
+@pytest.mark.asyncio
+async def test_streamed_dedupe_carries_shadow_over(tmp_path):
+    """A chunked dedupe filters the shadow down to the rows it kept, keys stripped."""
+    if not parquet_shadow.shadow_available():
+        pytest.skip("Parquet shadow needs pyarrow")
+    rows = [
+        {"full_name": f"P{i}", "linkedin_url": f" https://linkedin.com/in/p{i % 4} ", "match_score": i,
+         "company_size": "11-50" if i % 3 else "", "found_date": f"2026-01-{i + 1:02d}"}
+        for i in range(10)
+    ]
+    csv_file = tmp_path / "profiles.csv"
+    csv_ops.normalize_dataframe(pd.DataFrame(rows)).to_csv(csv_file, index=False)
+    await csv_ops.get_csv_stats(str(csv_file))
+    await csv_ops.filter_profiles(str(csv_file))
+    assert parquet_shadow.shadow_is_fresh(csv_file, csv_ops._file_signature(csv_file))
+    
+    await csv_ops.deduplicate_csv(str(csv_file), keep="last", chunksize=3)
+    shadow = parquet_shadow.read_shadow(csv_file, csv_ops._file_signature(csv_file))
+    assert shadow is not None
+    assert csv_ops._to_records(shadow) == csv_ops._to_records(csv_ops.read_profiles(csv_file))
+    assert shadow["linkedin_url"].tolist() == [f"https://linkedin.com/in/p{i}" for i in (2, 3, 0, 1)]
+
+@pytest.mark.asyncio
+async def test_parquet_shadow_ignored_when_stale(temp_csv):
+    """An in-place append makes the shadow stale; the next read uses the CSV."""
+    if not parquet_shadow.shadow_available():
+        pytest.skip("Parquet shadow needs pyarrow")
+    await csv_ops.get_csv_stats(str(temp_csv))
+    await csv_ops.append_profiles_to_csv(str(temp_csv), [
+        {"full_name": "Fresh Row", "linkedin_url": "https://linkedin.com/in/fresh", "match_score": 30}
+    ])
+    assert parquet_shadow.read_shadow(temp_csv, csv_ops._file_signature(temp_csv)) is None
+    
+    results = await csv_ops.filter_profiles(str(temp_csv), min_score=30)
+    assert [r["full_name"] for r in results] == ["Fresh Row"]
+    assert parquet_shadow.read_shadow(temp_csv, csv_ops._file_signature(temp_csv)) is not None
+
+@pytest.mark.asyncio
+async def test_header_only_repair_keeps_body(temp_csv):
+    """Renaming legacy headers rewrites only the first line of the file."""
+    original = temp_csv.read_bytes()
+    old_header_len = len(original.splitlines(keepends=True)[0])
+    
+    await csv_ops.get_csv_stats(str(temp_csv))
+    repaired = temp_csv.read_bytes()
+    new_header = repaired.splitlines(keepends=True)[0]
+    assert new_header.decode().strip() == ",".join(csv_ops.GOLDEN_SCHEMA)
+    assert repaired[len(new_header):] == original[old_header_len:]
+
+@pytest.mark.asyncio
+async def test_same_length_header_repaired_in_place(tmp_path):
+    """A header whose fixed form has the same length is overwritten in place."""
+    csv_file = tmp_path / "upper.csv"
+    csv_file.write_text(",".join(c.upper() for c in csv_ops.GOLDEN_SCHEMA) + "\nA,https://linkedin.com/in/a,,,,,7,,,,\n")
+    inode = csv_file.stat().st_ino
+    
+    results = await csv_ops.filter_profiles(str(csv_file))
+    assert results[0]["match_score"] == 7
+    assert csv_file.stat().st_ino == inode
+    assert csv_file.read_text().splitlines()[0] == ",".join(csv_ops.GOLDEN_SCHEMA)
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_repair_legacy_header_once(temp_csv, monkeypatch):
+    """Racing queries on a legacy file repair it once, under its write lock."""
+    original = temp_csv.read_bytes()
+    old_header_len = len(original.splitlines(keepends=True)[0])
+    lock = csv_ops.path_lock(temp_csv)
+    repairs = []
+    real_repair = csv_ops._repair_header_in_place
+    def recording_repair(path, header):
+        repairs.append((lock._writer, lock._readers))
+        return real_repair(path, header)
+    monkeypatch.setattr(csv_ops, "_repair_header_in_place", recording_repair)
+    
+    await asyncio.gather(
+        csv_ops.get_csv_stats(str(temp_csv)),
+        csv_ops.filter_profiles(str(temp_csv), min_score=15),
+        csv_ops.search_profiles(str(temp_csv), "engineer"),
+        csv_ops.filter_profiles(str(temp_csv), limit=3),
+    )
+    assert repairs == [(True, 0)]
+    repaired = temp_csv.read_bytes()
+    new_header = repaired.splitlines(keepends=True)[0]
+    assert new_header.decode().strip() == ",".join(csv_ops.GOLDEN_SCHEMA)
+    assert repaired[len(new_header):] == original[old_header_len:]
+
+@pytest.mark.asyncio
+async def test_read_only_queries_never_write(temp_csv, monkeypatch):
+    """In read-only mode query tools normalize in memory and leave the file alone."""
+    monkeypatch.setattr(csv_ops, "READ_ONLY_QUERIES", True)
+    original = temp_csv.read_bytes()
+    
+    stats = await csv_ops.get_csv_stats(str(temp_csv))
+    results = await csv_ops.search_profiles(str(temp_csv), search_term="meta")
+    assert stats["total_profiles"] == 10
+    assert all("match_score" in r for r in results)
+    assert temp_csv.read_bytes() == original
+    assert not temp_csv.with_name(temp_csv.name + ".parquet").exists()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("keep", ["first", "last"])
+@pytest.mark.parametrize("spill", [False, True])
+async def test_streaming_dedupe_matches_in_memory(tmp_path, monkeypatch, keep, spill):
+    """Chunked dedupe (with or without spilling keys to disk) keeps the same rows."""
+    if spill:
+        monkeypatch.setattr(csv_ops, "KEY_SPILL_THRESHOLD", 2)
+    rows = [
+        {"full_name": f"P{i}", "linkedin_url": f"https://linkedin.com/in/p{i % 7}", "match_score": i}
+        for i in range(30)
+    ]
+    streamed, in_memory = tmp_path / "streamed.csv", tmp_path / "in_memory.csv"
+    for f in (streamed, in_memory):
+        csv_ops.normalize_dataframe(pd.DataFrame(rows)).to_csv(f, index=False)
+    
+    result = await csv_ops.deduplicate_csv(str(streamed), keep=keep, chunksize=4)
+    expected = await csv_ops.deduplicate_csv(str(in_memory), keep=keep)
+    assert result["final_count"] == expected["final_count"] == 7
+    assert result["duplicates_removed"] == 23
+    pd.testing.assert_frame_equal(pd.read_csv(streamed), pd.read_csv(in_memory))
+    
+    before = streamed.read_bytes()
+    for chunksize in (None, 4):
+        with pytest.raises(ValueError):
+            await csv_ops.deduplicate_csv(str(streamed), keep="bogus", chunksize=chunksize)
+    assert streamed.read_bytes() == before
+
+@pytest.mark.asyncio
+async def test_streaming_filter_matches_in_memory(tmp_path, monkeypatch):
+    """The chunked top-k path returns the same rows, ties and missing scores included."""
+    rows = [
+        {"full_name": f"P{i}", "linkedin_url": f"https://linkedin.com/in/p{i}",
+         "match_score": "" if i % 9 == 0 else i % 5, "location": "Berlin" if i % 2 else "Paris"}
+        for i in range(40)
+    ]
+    csv_file = tmp_path / "profiles.csv"
+    csv_ops.normalize_dataframe(pd.DataFrame(rows)).to_csv(csv_file, index=False)
+    
+    expected = await csv_ops.filter_profiles(str(csv_file), limit=25)
+    expected_berlin = await csv_ops.filter_profiles(str(csv_file), locations=["berlin"], limit=6)
+    csv_ops._FRAME_CACHE.clear()
+    
+    monkeypatch.setattr(csv_ops, "STREAMING_THRESHOLD_BYTES", 0)
+    monkeypatch.setattr(csv_ops, "STREAMING_CHUNKSIZE", 7)
+    monkeypatch.setattr(csv_ops, "read_profiles", None)  # any full load would fail
+    monkeypatch.setattr(csv_ops, "shadow_is_fresh", lambda path, signature: False)
+    assert await csv_ops.filter_profiles(str(csv_file), limit=25) == expected
+    assert await csv_ops.filter_profiles(str(csv_file), locations=["berlin"], limit=6) == expected_berlin
+    assert [r["full_name"] for r in expected[:3]] == ["P4", "P14", "P19"]
+
+@pytest.mark.asyncio
+async def test_streaming_filter_types_rows_like_in_memory(tmp_path, monkeypatch):
+    """Streamed chunks are typed like a full read: declared dtypes, scores and date formats."""
+    dates = ["13/02/2025", "", "01/03/2025", "02/01/2025", "05/04/2025", "12/12/2024", "", "03/02/2025"]
+    rows = [
+        {"full_name": f"P{i}", "linkedin_url": f"https://linkedin.com/in/p{i}", "found_date": date,
+         "company_size": 200 if i < 4 else "11-50", "match_score": "N/A" if i == 3 else i}
+        for i, date in enumerate(dates)
+    ]
+    csv_file = tmp_path / "profiles.csv"
+    csv_ops.normalize_dataframe(pd.DataFrame(rows)).to_csv(csv_file, index=False)
+    queries = [{"limit": 8}, {"limit": 8, "found_after_date": "2025-01-15"}, {"limit": 2, "min_score": 1}]
+    
+    expected = [await csv_ops.filter_profiles(str(csv_file), **q) for q in queries]
+    csv_ops._FRAME_CACHE.clear()
+    monkeypatch.setattr(csv_ops, "STREAMING_THRESHOLD_BYTES", 0)
+    monkeypatch.setattr(csv_ops, "STREAMING_CHUNKSIZE", 3)
+    monkeypatch.setattr(csv_ops, "read_profiles", None)  # any full load would fail
+    monkeypatch.setattr(csv_ops, "shadow_is_fresh", lambda path, signature: False)
+    assert [await csv_ops.filter_profiles(str(csv_file), **q) for q in queries] == expected
+    # Day-first, as inferred from the file's first date: 02/01/2025 is 2 January
+    assert "P3" not in [r["full_name"] for r in expected[1]]
+    assert {r["company_size"] for r in expected[0]} == {"200", "11-50"}
+
+@pytest.mark.parametrize("limit", [None, 1, 5, 17, 100])
+def test_top_k_matches_stable_full_sort(limit):
+    """Partial selection returns exactly the head of a stable descending sort."""
+    scores = [3, None, 7, 7, 1, 3, None, 9, 7, 3, 0, 9, 1, 3, 7, 2, None, 5, 5, 3]
+    df = pd.DataFrame({"full_name": [f"P{i}" for i in range(len(scores))],
+                       "match_score": pd.array(scores, dtype="Int64")}, index=range(100, 120))
+    expected = df.sort_values(by="match_score", ascending=False, kind="mergesort")
+    if limit:
+        expected = expected.head(limit)
+    pd.testing.assert_frame_equal(csv_ops._top_k(df, limit), expected)
+
+@pytest.mark.asyncio
+async def test_token_index_search_matches_scan(tmp_path, monkeypatch):
+    """Indexed searches return exactly what a full scan returns, before and after appends."""
+    pin_in_place(monkeypatch)
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "Jane Doe", "linkedin_url": "https://linkedin.com/in/jane", "headline": "Senior Data-Engineer", "company": "FinTech GmbH", "match_score": 12},
+        {"full_name": "Jörg Müller", "linkedin_url": "https://linkedin.com/in/joerg", "headline": "VP Engineering, AI", "company": "Acme", "match_score": 15},
+        {"full_name": "Sam Roe", "linkedin_url": "https://linkedin.com/in/sam", "headline": "Founder @ stealth", "company": "Data Engineering Co", "match_score": 9},
+    ])
+    # Appended after the index exists: served from the append log
+    first = await csv_ops.search_profiles(str(csv_file), "engineer", explain=True)
+    assert first["search_path"] == "trigram_index"
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "Ann Lee", "linkedin_url": "https://linkedin.com/in/ann", "headline": "Engineering Manager", "company": "fintech.io", "match_score": 11},
+    ])
+    assert (tmp_path / "golden.csv.tokens.log").exists()
+    reloaded = search_index._read_token_index(csv_file)
+    assert reloaded.rows == 4 and reloaded.signature == csv_ops._file_signature(csv_file)
+    
+    terms = ["engineer", "ENGIN", "data-eng", "Data Engineering", "a-engineer", "ineer,", "müller", "@ stealth", "@", "ta-en", "zzz", "fintech", " engineering", "ech", "ch g", "eer"]
+    indexed = {}
+    for term in terms:
+        for case_sensitive in (False, True):
+            indexed[term, case_sensitive] = await csv_ops.search_profiles(
+                str(csv_file), term, case_sensitive=case_sensitive, explain=True
+            )
+    assert indexed["@", False]["search_path"] == "scan"
+    assert indexed["fintech", False]["search_path"] == "trigram_index"
+    assert indexed[" engineering", False]["search_path"] == "token_index"
+    assert len(indexed["fintech", False]["results"]) == 2
+    
+    monkeypatch.setattr(csv_ops, "TOKEN_INDEX_ENABLED", False)
+    for (term, case_sensitive), response in indexed.items():
+        scanned = await csv_ops.search_profiles(str(csv_file), term, case_sensitive=case_sensitive)
+        assert response["results"] == scanned, term
+
+def test_token_index_sidecars_vanishing_mid_read(tmp_path, monkeypatch):
+    """Sidecars removed by a concurrent compaction or rewrite never fail a read."""
+    csv_file = tmp_path / "golden.csv"
+    df = pd.DataFrame({"headline": ["Data Engineer", "Founder"]})
+    before, after = {"size": 1, "mtime_ns": 1}, {"size": 2, "mtime_ns": 2}
+    search_index.save_token_index(csv_file, search_index.TokenIndex.build(df, ["headline"], before))
+    monkeypatch.setattr(search_index, "_TOKEN_INDEXES", {})
+    # Every sidecar looks present, as it did just before it was removed
+    monkeypatch.setattr(Path, "exists", lambda self: True)
+    
+    assert search_index._read_token_index(csv_file).rows == 2
+    search_index.save_token_index(csv_file, search_index.TokenIndex.build(df, ["headline"], before))
+    (tmp_path / "golden.csv.tokens.npz").unlink()
+    assert search_index._read_token_index(csv_file) is None
+    search_index.extend_token_index(csv_file, df, 2, before, after)
+    assert not (tmp_path / "golden.csv.tokens.log").is_file()
+
+@pytest.mark.asyncio
+async def test_folded_search_columns_cached_per_version(temp_csv, monkeypatch):
+    """Case-insensitive search over cached casefolded columns matches per-call folding."""
+    monkeypatch.setattr(csv_ops, "TOKEN_INDEX_ENABLED", False)
+    terms = ["ENGINEER", "vp", "Müller", "data eng", "zzz"]
+    folded = {t: await csv_ops.search_profiles(str(temp_csv), t, explain=True) for t in terms}
+    assert folded["vp"]["folded_bytes"] > 0
+    
+    monkeypatch.setattr(csv_ops, "FOLDED_SEARCH", False)
+    for term, response in folded.items():
+        assert response["results"] == await csv_ops.search_profiles(str(temp_csv), term)
+    
+    # A write drops the cached frame and its folded columns with it
+    await csv_ops.deduplicate_csv(str(temp_csv))
+    assert csv_ops._FRAME_CACHE.folded_bytes(temp_csv.absolute()) == 0
+
+@pytest.mark.asyncio
+async def test_search_never_matches_missing_cells(tmp_path, monkeypatch):
+    """Empty cells hold no text, not the "nan" pandas 2 renders them as."""
+    monkeypatch.setattr(csv_ops, "TOKEN_INDEX_ENABLED", False)
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), QUERY_PROFILES)
+    for case_sensitive in (False, True):
+        assert await csv_ops.search_profiles(str(csv_file), "nan", case_sensitive=case_sensitive) == []
+    assert await csv_ops.search_profiles(str(csv_file), should=["nan"]) == []
+
+QUERY_PROFILES = [
+    {"full_name": "Ana Ruiz", "linkedin_url": "https://linkedin.com/in/ana", "headline": "Data Engineer, data platform", "company": "FinTech Labs", "match_score": 10},
+    {"full_name": "Ben Ode", "linkedin_url": "https://linkedin.com/in/ben", "headline": "Engineering Manager", "company": "Data Corp", "match_score": 18},
+    {"full_name": "Cai Ng", "linkedin_url": "https://linkedin.com/in/cai", "headline": "Data Scientist", "company": "Retail Inc", "match_score": 14},
+    {"full_name": "Dee Park", "linkedin_url": "https://linkedin.com/in/dee", "headline": "Sales Lead", "company": "FinTech Labs", "match_score": 20},
+]
+
+@pytest.mark.asyncio
+async def test_query_mode_boolean_and_ranking(tmp_path, monkeypatch):
+    """must/should/must_not combine in one call; ranking follows BM25 and column weights."""
+    pin_in_place(monkeypatch)
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), QUERY_PROFILES)
+    
+    async def names(**kwargs):
+        results = await csv_ops.search_profiles(str(csv_file), **kwargs)
+        return [r["full_name"] for r in results]
+    
+    assert sorted(await names(must=["data", "engineer"])) == ["Ana Ruiz", "Ben Ode"]
+    assert await names(search_term="data", must_not=["scien"]) == ["Ana Ruiz", "Ben Ode"]
+    assert set(await names(should=["scientist", "sales"])) == {"Cai Ng", "Dee Park"}
+    # "data" twice in Ana's headline outranks one mention elsewhere
+    assert (await names(should=["data"]))[0] == "Ana Ruiz"
+    # Weighting company makes the company match win
+    assert (await names(should=["data"], column_weights={"company": 10}))[0] == "Ben Ode"
+    results = await csv_ops.search_profiles(str(csv_file), should=["fintech"], limit=1)
+    assert len(results) == 1 and results[0]["relevance"] > 0
+    with pytest.raises(ValueError):
+        await csv_ops.search_profiles(str(csv_file))
+    
+    # Index-narrowed and full-scan candidates rank identically, empty cells included
+    await csv_ops.append_profiles_to_csv(str(csv_file), [{"full_name": "Fay Data", "linkedin_url": "u/fay"}])
+    loads = []
+    load_profiles = csv_ops.load_profiles
+    def counted(*args, **kwargs):
+        loads.append(kwargs.get("columns"))
+        return load_profiles(*args, **kwargs)
+    with monkeypatch.context() as m:
+        # Column averages come from the frame already loaded, not a reload per column
+        m.setattr(csv_ops, "load_profiles", counted)
+        m.setattr(csv_ops, "FOLDED_SEARCH", False)
+        indexed = await csv_ops.search_profiles(str(csv_file), must=["dat"], should=["engin", "fintech"], explain=True)
+    assert indexed["search_path"] == "trigram_index"
+    assert loads == [None]
+    monkeypatch.setattr(csv_ops, "TOKEN_INDEX_ENABLED", False)
+    assert indexed["results"] == await csv_ops.search_profiles(str(csv_file), must=["dat"], should=["engin", "fintech"])
+
+@pytest.mark.asyncio
+async def test_stats_sidecar_tracks_appends(tmp_path, monkeypatch, append_mode):
+    """Appends merge into the .stats sidecar; served stats equal a full recompute."""
+    csv_file = tmp_path / "golden.csv"
+    stats_file = tmp_path / "golden.csv.stats"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), QUERY_PROFILES[:2])
+    await csv_ops.get_csv_stats(str(csv_file))
+    assert stats_file.exists()
+    
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "Eve", "linkedin_url": "https://linkedin.com/in/eve", "location": "Berlin",
+         "match_score": "17", "found_date": "2026-01-03", "current_role_mention": "YES - VP"},
+        {"full_name": "Fay", "linkedin_url": "https://linkedin.com/in/fay", "location": "Berlin",
+         "company_size": "51-200", "match_score": 9.5, "found_date": "2025-12-30"},
+    ])
+    assert stats_sidecar.load_stats(csv_file.absolute(), csv_ops._file_signature(csv_file)) is not None
+    
+    def no_reads(*args, **kwargs):
+        raise AssertionError("stats should come from the sidecar")
+    with monkeypatch.context() as m:
+        m.setattr(csv_ops, "load_profiles", no_reads)
+        served = await csv_ops.get_csv_stats(str(csv_file))
+    stats_file.unlink()
+    assert served == await csv_ops.get_csv_stats(str(csv_file))
+    assert served["total_profiles"] == 4
+    assert served["location_breakdown"] == {"Berlin": 2}
+    assert served["found_date_range"] == {"earliest": "2025-12-30", "latest": "2026-01-03"}
+    assert served["current_role_count"] == 1
+    
+    # External edits make the sidecar stale; deduplicate_csv recomputes it
+    with open(csv_file, "a") as f:
+        f.write("Gus,https://linkedin.com/in/eve,,,,,20,,,,\n")
+    assert (await csv_ops.get_csv_stats(str(csv_file)))["total_profiles"] == 5
+    await csv_ops.deduplicate_csv(str(csv_file))
+    assert stats_sidecar.load_stats(csv_file.absolute(), csv_ops._file_signature(csv_file))["rows"] == 4
+
+def test_stats_kernel_matches_pandas_reference():
+    """The bincount-based kernel agrees with plain pandas reductions."""
+    df = pd.DataFrame({
+        "match_score": pd.array([3, None, 20, 15, 15, 9, 14, 27], dtype="Int64"),
+        "location": pd.Categorical(["A", "B", None, "A", "C", "A", "B", None]),
+        "company_size": ["1-10", None, "1-10", "11-50", None, None, "11-50", "1-10"],
+        "found_date": pd.to_datetime(["2026-01-02", None, "2025-11-30", None, "2026-02-01", None, None, None]),
+        "current_role_mention": ["YES - x", "no", None, "YES", "yes", "NO", "YES", None],
+    })
+    stats = stats_sidecar.render_stats(stats_sidecar.stats_aggregates(df), Path("p.csv"))
+    assert stats["score_distribution"] == {"20+": 2, "15-19": 2, "10-14": 1, "<10": 2}
+    assert stats["avg_score"] == round(df["match_score"].mean(), 2)
+    assert stats["location_breakdown"] == {"A": 3, "B": 2, "C": 1}
+    assert stats["company_size_breakdown"] == {"1-10": 3, "11-50": 2}
+    assert stats["found_date_range"] == {"earliest": "2025-11-30", "latest": "2026-02-01"}
+    assert stats["current_role_count"] == 3
+    # Non-text cells never match; an all-empty column parses as float
+    mixed = pd.DataFrame({"current_role_mention": ["YES", 1, True, np.nan, "YESTERDAY"]})
+    assert stats_sidecar.stats_aggregates(mixed)["current_role_count"] == 2
+    empty = pd.DataFrame({"current_role_mention": [np.nan, np.nan]})
+    assert stats_sidecar.stats_aggregates(empty)["current_role_count"] == 0
+    assert stats_sidecar.score_distribution({"9.5": 1, "10": 2}, [9.75]) == {"9.75+": 2, "<9.75": 1}
+
+@pytest.mark.asyncio
+async def test_location_filter_values_are_literals(tmp_path):
+    """Filter values with regex metacharacters match literally."""
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A", "linkedin_url": "u/a", "location": "St. Louis (Remote)", "company": "C++ Shop"},
+        {"full_name": "B", "linkedin_url": "u/b", "location": "StX Louis Remote", "company": "Cobol Inc"},
+        {"full_name": "C", "linkedin_url": "u/c"},
+    ])
+    results = await csv_ops.filter_profiles(str(csv_file), locations=["st. louis (remote)"])
+    assert [r["full_name"] for r in results] == ["A"]
+    results = await csv_ops.filter_profiles(str(csv_file), companies=["c++", "nothing[", "COBOL"])
+    assert sorted(r["full_name"] for r in results) == ["A", "B"]
+
+def test_aho_corasick_matches_naive_substring_search():
+    """The automaton agrees with a naive any-substring check, overlaps included."""
+    from linkedin_prospecting_csv.matcher import AhoCorasick, LiteralMatcher
+    import random
+    rng = random.Random(7)
+    patterns = ["he", "she", "hers", "his", "a.b", "(x)"] + ["".join(rng.choices("abhrsx", k=rng.randint(3, 6))) for _ in range(40)]
+    texts = ["".join(rng.choices("abhrsx.() ", k=rng.randint(0, 25))) for _ in range(500)] + ["ushers", "a.b", ""]
+    automaton = AhoCorasick(patterns)
+    assert [automaton.contains(t) for t in texts] == [any(p in t for p in patterns) for t in texts]
+    
+    series = pd.Series(texts + [None], dtype=object)
+    matcher = LiteralMatcher(tuple(patterns))
+    expected = [any(p in t for p in patterns) for t in texts] + [False]
+    assert matcher.contains(series).tolist() == expected
+    assert matcher.contains(series.astype("category")).tolist() == expected
+    # Python-backed strings (and pandas 2's object "str") take the automaton path
+    with pd.option_context("mode.string_storage", "python"):
+        assert matcher.contains(series).tolist() == expected
+
+@pytest.mark.asyncio
+async def test_url_variants_share_one_dedupe_key(tmp_path, append_mode):
+    """Scheme, host, query, slash and case variants of a URL dedupe together."""
+    variants = [
+        "https://www.linkedin.com/in/Jane/",
+        "http://linkedin.com/in/jane?trk=x",
+        "linkedin.com/in/jane",
+        " HTTPS://uk.linkedin.com/in/JANE/#about ",
+    ]
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": f"Jane {i}", "linkedin_url": url} for i, url in enumerate(variants)
+    ])
+    assert result["added"] == 1
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "Jane again", "linkedin_url": "https://m.linkedin.com/in/jane"}
+    ])
+    assert result["added"] == 0
+    # The file keeps the URL as given; only the key is canonical
+    await csv_ops.compact_append_log(str(csv_file))
+    assert pd.read_csv(csv_file)["linkedin_url"].tolist() == [variants[0]]
+    assert set(csv_ops.load_key_index(csv_file, "linkedin_url")["keys"]) == {"linkedin.com/in/jane"}
+    
+    for chunksize in (None, 2):
+        pd.DataFrame({
+            "full_name": [f"Jane {i}" for i in range(len(variants))] + ["Joe"],
+            "linkedin_url": variants + ["https://www.linkedin.com/in/joe"],
+        }).to_csv(csv_file, index=False)
+        result = await csv_ops.deduplicate_csv(str(csv_file), chunksize=chunksize)
+        assert result["final_count"] == 2
+        assert pd.read_csv(csv_file)["full_name"].tolist() == ["Jane 0", "Joe"]
+
+def test_canonical_url_paths_agree():
+    """The arrow span cutter and the regex chain produce the same keys."""
+    from linkedin_prospecting_csv import url_keys
+    import random
+    rng = random.Random(3)
+    heads = ["", "https://", "http://", "https://www.", "www.", "https://de.", "m.", "ftp://", "https://www.example."]
+    bodies = ["linkedin.com/in/jane", "linkedin.com", "linkedin.community/x", "example.com/a/b", "", "/"]
+    tails = ["", "/", "//", "?trk=1", "/?a=b#c", "#x/", "?", "/in/ü"]
+    urls = [rng.choice(heads) + rng.choice(bodies) + rng.choice(tails) for _ in range(2000)]
+    prepared = pd.Series(urls + [None]).fillna("").astype(str).str.strip().str.lower()
+    
+    rewritten = url_keys._rewrite(prepared.astype(object))
+    if csv_ops._pyarrow_available():
+        assert url_keys._cut_spans(prepared).tolist() == rewritten.tolist()
+    
+    keys = url_keys.canonicalize_urls(pd.Series(urls))
+    assert url_keys.canonicalize_urls(keys).tolist() == keys.tolist()
+    assert url_keys.canonicalize_urls(pd.Series(["https://www.linkedin.com/in/Jane/?trk=x", None])).tolist() == [
+        "linkedin.com/in/jane", ""
+    ]
+
+def test_hashed_keys_survive_hash_collisions(tmp_path, monkeypatch):
+    """With every hash colliding, answers still come from the key strings."""
+    keys = pd.Series(["linkedin.com/in/a", 'say "hi"', "ünïcode\\path", "linkedin.com/in/a", "b"])
+    lines = keyset.encode_key_lines(keys)
+    assert [json.loads(line) for line in lines] == keys.tolist()
+    assert lines[1] == json.dumps('say "hi"').encode()
+    
+    monkeypatch.setattr(keyset, "hash", lambda value: 7, raising=False)
+    assert keyset.duplicated_keys(keys).tolist() == [False, False, False, True, False]
+    assert keyset.duplicated_keys(keys, keep="last").tolist() == [True, False, False, False, False]
+    
+    sidecar = tmp_path / "keys"
+    sidecar.write_bytes(b"header\n" + b"".join(line + b"\n" for line in lines[:3]))
+    key_set = keyset.HashedKeySet(sidecar)
+    key_set.add(lines[:3], len(b"header\n"))
+    assert key_set.nbytes == 16 * 3
+    assert key_set.contains(keyset.encode_key_lines(pd.Series(["b", "linkedin.com/in/a", 'say "hi"', "ünïcode"]))).tolist() == [
+        False, True, True, False
+    ]
+    assert list(key_set) == keys.tolist()[:3]
+
+@pytest.mark.asyncio
+async def test_bloom_filter_skips_key_index_for_new_keys(tmp_path, monkeypatch):
+    """All-new batches never load the key index; duplicates still verify against it."""
+    if not csv_ops.KEY_FILTER_ENABLED:
+        pytest.skip("Bloom filter disabled")
+    pin_in_place(monkeypatch)
+    csv_file = tmp_path / "golden.csv"
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A", "linkedin_url": "https://linkedin.com/in/a"},
+        {"full_name": "B", "linkedin_url": "https://linkedin.com/in/b"},
+    ])
+    assert (tmp_path / "golden.csv.bloom.npz").exists()
+    
+    loads = []
+    real_load = csv_ops.load_key_index
+    monkeypatch.setattr(csv_ops, "load_key_index", lambda *a: loads.append(a) or real_load(*a))
+    key_index._KEY_INDEXES.clear()
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "C", "linkedin_url": "https://linkedin.com/in/c"},
+        {"full_name": "C again", "linkedin_url": "linkedin.com/in/c/"},
+        {"full_name": "D", "linkedin_url": "https://linkedin.com/in/d"},
+    ])
+    assert (result["added"], result["total_profiles"]) == (2, 4)
+    assert loads == [] and not key_index._KEY_INDEXES
+    
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "A again", "linkedin_url": "https://www.linkedin.com/in/A"},
+        {"full_name": "E", "linkedin_url": "https://linkedin.com/in/e"},
+    ])
+    assert (result["added"], result["total_profiles"]) == (1, 5)
+    assert len(loads) == 1
+    
+    # A false positive only costs an index lookup, and is counted
+    monkeypatch.setattr(csv_ops.KeyFilter, "might_contain", lambda self, lines: np.ones(len(lines), dtype=bool))
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), [
+        {"full_name": "F", "linkedin_url": "https://linkedin.com/in/f"}
+    ])
+    assert result["added"] == 1
+    
+    stats = (await csv_ops.get_csv_stats(str(csv_file)))["dedupe_filter"]
+    assert stats["column"] == "linkedin_url"
+    assert stats["keys"] == 6
+    assert stats["size_bytes"] == csv_ops.KeyFilter("linkedin_url", stats["capacity"]).m // 8
+    assert 0 < stats["estimated_false_positive_rate"] < 0.01
+    # C, D, E and F were checked as new keys; only F was (forcibly) misreported
+    assert stats["new_keys_checked"] == 4
+    assert stats["observed_false_positive_rate"] == 0.25
+
+FUZZY_PROFILES = [
+    {"full_name": "Jon Smith", "linkedin_url": "https://linkedin.com/in/jon", "company": "Acme Inc."},
+    {"full_name": "John Smith", "linkedin_url": "", "company": "ACME"},
+    {"full_name": "José Núñez", "linkedin_url": "https://linkedin.com/in/jose", "company": "Globex"},
+    {"full_name": "Jose Nunez, PhD", "linkedin_url": "https://linkedin.com/in/jnunez", "company": "globex"},
+    {"full_name": "Jane Doe", "linkedin_url": "https://linkedin.com/in/jane", "company": "Initech"},
+    {"full_name": "Jake Doe", "linkedin_url": "https://linkedin.com/in/jake", "company": "Initech"},
+    {"full_name": "Jane Doe", "linkedin_url": "https://linkedin.com/in/jane-2", "company": "Initech"},
+    {"full_name": "John Smith", "linkedin_url": "https://linkedin.com/in/js", "company": "Hooli"},
+]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunksize", [None, 3])
+async def test_composite_and_fuzzy_dedupe(tmp_path, chunksize):
+    """Composite keys need every column to match; fuzzy mode also joins similar names per company."""
+    composite, fuzzy = tmp_path / "composite.csv", tmp_path / "fuzzy.csv"
+    for f in (composite, fuzzy):
+        csv_ops.normalize_dataframe(pd.DataFrame(FUZZY_PROFILES)).to_csv(f, index=False)
+
+    result = await csv_ops.deduplicate_csv(
+        str(composite), dedupe_columns=["Name", "company"], chunksize=chunksize
+    )
+    assert result["duplicates_removed"] == 1
+    assert "https://linkedin.com/in/jane-2" not in pd.read_csv(composite)["linkedin_url"].tolist()
+    assert not key_index.key_index_path(composite).exists()
+
+    result = await csv_ops.deduplicate_csv(str(fuzzy), fuzzy=True, keep="last", chunksize=chunksize)
+    assert result["duplicates_removed"] == 3
+    df = pd.read_csv(fuzzy, keep_default_na=False)
+    assert df["full_name"].tolist() == ["John Smith", "Jose Nunez, PhD", "Jake Doe", "Jane Doe", "John Smith"]
+    assert set(csv_ops.load_key_index(fuzzy, "linkedin_url")["keys"]) == {
+        "", "linkedin.com/in/jnunez", "linkedin.com/in/jake", "linkedin.com/in/jane-2", "linkedin.com/in/js"
+    }
+
+def test_fuzzy_matches_are_transitive_and_windowed(monkeypatch):
+    """Chained near-matches form one cluster; oversized blocks compare sorted neighbours only."""
+    from linkedin_prospecting_csv import fuzzy_keys
+    # "ana bergg" is only similar enough to "ana berg", not to "anna berg"
+    names = pd.Series(["Anna Berg", "Ana Berg", "Ana Bergg", "Alan Brook", "Anna Berg"])
+    keys = pd.Series([f"k{i}" for i in range(5)])
+    companies = pd.Series(["Acme"] * 5)
+    assert fuzzy_keys.fuzzy_duplicated(keys, names, companies).tolist() == [False, True, True, False, True]
+    monkeypatch.setattr(fuzzy_keys, "MAX_BLOCK", 1)
+    monkeypatch.setattr(fuzzy_keys, "WINDOW", 1)
+    # Sorted block: "alan brook", "ana berg", "ana bergg", "anna berg"; only
+    # neighbours are compared, so "anna berg" no longer reaches "ana berg"
+    assert fuzzy_keys.fuzzy_duplicated(keys, names, companies).tolist() == [False, False, True, False, True]
+
+@pytest.mark.asyncio
+async def test_append_log_reads_its_writes(tmp_path, monkeypatch):
+    """Logged appends leave the CSV alone, yet every query sees them; merging gives the same file."""
+    logged, direct = tmp_path / "logged.csv", tmp_path / "direct.csv"
+    batches = [
+        QUERY_PROFILES[2:],
+        [{"full_name": "Ana Again", "linkedin_url": "http://www.linkedin.com/in/ana/", "match_score": 30},
+         {"full_name": "Eve Ito", "linkedin_url": "https://linkedin.com/in/eve", "company": "Data Corp", "match_score": 18}],
+        [{"full_name": "Eve Twice", "linkedin_url": "https://linkedin.com/in/eve?trk=x"}],
+    ]
+
+    async def snapshot(path):
+        stats = await csv_ops.get_csv_stats(str(path))
+        stats.pop("path"), stats.pop("dedupe_filter", None)
+        return [
+            await csv_ops.filter_profiles(str(path), min_score=12),
+            await csv_ops.filter_profiles(str(path), companies=["data"], limit=1),
+            await csv_ops.search_profiles(str(path), "data"),
+            await csv_ops.search_profiles(str(path), must=["data"], should=["engineer"]),
+            stats,
+        ]
+
+    monkeypatch.setattr(csv_ops, "APPEND_LOG", False)
+    for path in (logged, direct):
+        await csv_ops.create_new_csv(str(path))
+        await csv_ops.append_profiles_to_csv(str(path), QUERY_PROFILES[:2])
+    expected = [await csv_ops.append_profiles_to_csv(str(direct), b) for b in batches]
+
+    monkeypatch.setattr(csv_ops, "APPEND_LOG", True)
+    monkeypatch.setattr(append_log, "COMPACT_SECONDS", 3600)
+    before = logged.read_bytes()
+    results = [await csv_ops.append_profiles_to_csv(str(logged), b) for b in batches]
+    strip = lambda rs: [{k: v for k, v in r.items() if k != "path"} for r in rs]
+    assert strip(results) == strip(expected)
+    assert logged.read_bytes() == before
+    assert await snapshot(logged) == await snapshot(direct)
+
+    compactor = append_log._COMPACTORS.pop(str(logged))
+    compactor.task.cancel()
+    assert (await csv_ops.compact_append_log(str(logged)))["merged"] == 3
+    assert not (tmp_path / "logged.csv.wal.jsonl").exists()
+    assert logged.read_bytes() == direct.read_bytes()
+    assert await snapshot(logged) == await snapshot(direct)
+
+@pytest.mark.asyncio
+async def test_append_log_compacts_in_background(tmp_path, monkeypatch):
+    """The compactor merges the log on its own, at once past COMPACT_ROWS; torn lines are dropped."""
+    csv_file = tmp_path / "golden.csv"
+    log_file = tmp_path / "golden.csv.wal.jsonl"
+    await csv_ops.create_new_csv(str(csv_file))
+    monkeypatch.setattr(csv_ops, "APPEND_LOG", True)
+    monkeypatch.setattr(append_log, "COMPACT_SECONDS", 3600)
+    monkeypatch.setattr(append_log, "COMPACT_ROWS", 3)
+
+    await csv_ops.append_profiles_to_csv(str(csv_file), QUERY_PROFILES[:2])
+    with open(log_file, "ab") as f:
+        f.write(b'{"column": "linkedin_url", "rows": [{"full_')  # crash mid-write
+    assert len(await csv_ops.filter_profiles(str(csv_file))) == 2
+
+    result = await csv_ops.append_profiles_to_csv(str(csv_file), QUERY_PROFILES[2:])
+    assert result["total_profiles"] == 4
+    # Four logged rows wake the compactor instead of waiting an hour
+    await asyncio.wait_for(append_log._COMPACTORS[str(csv_file)].task, 5)
+    assert not log_file.exists()
+    df = pd.read_csv(csv_file)
+    assert df["full_name"].tolist() == [p["full_name"] for p in QUERY_PROFILES]
+
+@pytest.mark.asyncio
+async def test_append_log_compacts_after_appends_go_quiet(tmp_path, monkeypatch):
+    """Every logged batch restarts the COMPACT_SECONDS quiet period."""
+    csv_file = tmp_path / "golden.csv"
+    log_file = tmp_path / "golden.csv.wal.jsonl"
+    await csv_ops.create_new_csv(str(csv_file))
+    monkeypatch.setattr(csv_ops, "APPEND_LOG", True)
+    monkeypatch.setattr(append_log, "COMPACT_SECONDS", 0.5)
+    
+    for profile in QUERY_PROFILES:
+        await csv_ops.append_profiles_to_csv(str(csv_file), [profile])
+        await asyncio.sleep(0.2)
+    # Well past COMPACT_SECONDS since the first batch, but never quiet for it
+    assert log_file.exists()
+    await asyncio.wait_for(append_log._COMPACTORS[str(csv_file)].task, 5)
+    assert not log_file.exists()
+    assert len(pd.read_csv(csv_file)) == len(QUERY_PROFILES)
@@ -0,0 +1,214 @@
+import pytest
+import pandas as pd
+import shutil
+from pathlib import Path
+from linkedin_prospecting_csv import csv_ops, sqlite_backend
+
+# Paths to real test data
+TEST_DIR = Path(__file__).parent
+SMALL_CSV = TEST_DIR / "CSV_1_small.csv"
+
+@pytest.fixture
+def temp_csv(tmp_path):
+    """Creates a temporary copy of the small CSV for testing."""
+    temp_file = tmp_path / "test_profiles.csv"
+    shutil.copy(SMALL_CSV, temp_file)
+    return temp_file
+
+@pytest.mark.asyncio
+async def test_existing_csv_migrates_transparently(temp_csv):
+    """The first call imports the CSV; answers match the CSV backend."""
+    stats = await sqlite_backend.get_csv_stats(str(temp_csv))
+    assert sqlite_backend.database_path(str(temp_csv)).exists()
+    
+    csv_stats = await csv_ops.get_csv_stats(str(temp_csv))
+    assert stats["total_profiles"] == csv_stats["total_profiles"]
+    assert stats["avg_score"] == csv_stats["avg_score"]
+    assert stats["score_distribution"] == csv_stats["score_distribution"]
+    assert stats["found_date_range"] == csv_stats["found_date_range"]
+    assert stats["current_role_count"] == csv_stats["current_role_count"]
+    
+    results = await sqlite_backend.filter_profiles(str(temp_csv), min_score=15, locations=["USA", "Canada"])
+    expected = await csv_ops.filter_profiles(str(temp_csv), min_score=15, locations=["USA", "Canada"])
+    assert results == expected
+
+@pytest.mark.asyncio
+async def test_append_insert_or_ignore(tmp_path):
+    """Duplicate linkedin_url values are ignored by the unique index."""
+    db = tmp_path / "profiles.db"
+    await sqlite_backend.create_new_csv(str(db))
+    result = await sqlite_backend.append_profiles_to_csv(str(db), [
+        {"Name": "A", "LinkedIn URL": "https://linkedin.com/in/a", "v2 Score": 12, "Team": "Core"},
+        {"Name": "A again", "LinkedIn URL": " https://linkedin.com/in/a "},
+        {"Name": "B", "LinkedIn URL": "https://linkedin.com/in/b", "v2 Score": 20}
+    ])
+    assert result["added"] == 2
+    assert result["skipped_duplicates"] == 1
+    assert result["preview"] == ["A", "B"]
+    
+    result = await sqlite_backend.append_profiles_to_csv(str(db), [
+        {"full_name": "B dup", "linkedin_url": "https://linkedin.com/in/b"}
+    ])
+    assert result["added"] == 0
+    assert result["total_profiles"] == 2
+    
+    profiles = await sqlite_backend.filter_profiles(str(db))
+    assert [p["full_name"] for p in profiles] == ["B", "A"]
+    assert profiles[1]["team"] == "Core"
+
+@pytest.mark.asyncio
+async def test_search_uses_substring_semantics(temp_csv):
+    """FTS-backed search returns the same rows as the CSV substring scan."""
+    for term, case_sensitive in [("engin", False), ("Meta", True), ("meta", True), ("UK", False)]:
+        results = await sqlite_backend.search_profiles(str(temp_csv), term, case_sensitive=case_sensitive)
+        expected = await csv_ops.search_profiles(str(temp_csv), term, case_sensitive=case_sensitive)
+        assert results == expected, term
+
+@pytest.mark.asyncio
+async def test_deduplicate_other_column_and_export(tmp_path):
+    """Deduplicating on another column keeps first rows; export writes a CSV."""
+    db = tmp_path / "profiles.sqlite"
+    await sqlite_backend.append_profiles_to_csv(str(db), [
+        {"full_name": "Same Name", "linkedin_url": "https://linkedin.com/in/x1", "match_score": 5},
+        {"full_name": "Same Name", "linkedin_url": "https://linkedin.com/in/x2", "match_score": 25},
+        {"full_name": "Other", "linkedin_url": "https://linkedin.com/in/y", "match_score": 15}
+    ])
+    with pytest.raises(ValueError):
+        await sqlite_backend.deduplicate_csv(str(db), dedupe_column="Name", keep="bogus")
+    result = await sqlite_backend.deduplicate_csv(str(db), dedupe_column="Name")
+    assert result["duplicates_removed"] == 1
+    
+    out = tmp_path / "all.csv"
+    sqlite_backend.export_csv(str(db), str(out))
+    df = pd.read_csv(out)
+    assert df["linkedin_url"].tolist() == ["https://linkedin.com/in/x1", "https://linkedin.com/in/y"]
+    assert list(df.columns) == csv_ops.GOLDEN_SCHEMA
+
+@pytest.mark.asyncio
+async def test_query_mode_matches_csv_backend(tmp_path):
+    """Boolean, ranked search returns the same ranking as the CSV backend."""
+    from test_csv_ops import QUERY_PROFILES
+    db, csv_file = tmp_path / "profiles.db", tmp_path / "profiles.csv"
+    await sqlite_backend.create_new_csv(str(db))
+    await sqlite_backend.append_profiles_to_csv(str(db), QUERY_PROFILES)
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), QUERY_PROFILES)
+    
+    query = {"must": ["data"], "should": ["engineer"], "must_not": ["retail"], "column_weights": {"headline": 2}}
+    results = await sqlite_backend.search_profiles(str(db), **query)
+    assert results == await csv_ops.search_profiles(str(csv_file), **query)
+    assert [r["full_name"] for r in results] == ["Ana Ruiz", "Ben Ode"]
+
+@pytest.mark.asyncio
+async def test_custom_score_buckets_match_csv_backend(temp_csv):
+    """Configurable bucket edges give the same distribution on both backends."""
+    buckets = [5, 12, 18]
+    stats = await sqlite_backend.get_csv_stats(str(temp_csv), score_buckets=buckets)
+    csv_stats = await csv_ops.get_csv_stats(str(temp_csv), score_buckets=buckets)
+    assert list(stats["score_distribution"]) == ["18+", "12-17", "5-11", "<5"]
+    assert stats["score_distribution"] == csv_stats["score_distribution"]
+    assert sum(csv_stats["score_distribution"].values()) <= csv_stats["total_profiles"]
+    with pytest.raises(ValueError):
+        await csv_ops.get_csv_stats(str(temp_csv), score_buckets=[15, 10])
+
+@pytest.mark.asyncio
+async def test_url_variants_and_old_keys_migrate(tmp_path):
+    """Canonical keys dedupe URL variants, and older databases are re-keyed."""
+    import sqlite3
+    db = tmp_path / "profiles.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(sqlite_backend.SCHEMA_SQL)
+    conn.executescript(sqlite_backend.FTS_SQL)
+    conn.executemany(
+        "INSERT INTO profiles (full_name, linkedin_url, dedupe_key) VALUES (?, ?, ?)",
+        [("A", u, u) for u in ("https://www.linkedin.com/in/a/", "linkedin.com/in/A", "linkedin.com/in/a")]
+    )
+    conn.commit()
+    conn.close()
+    
+    profiles = await sqlite_backend.filter_profiles(str(db))
+    assert [p["linkedin_url"] for p in profiles] == ["https://www.linkedin.com/in/a/"]
+    
+    result = await sqlite_backend.append_profiles_to_csv(str(db), [
+        {"full_name": "A again", "linkedin_url": "http://linkedin.com/in/a?trk=x"},
+        {"full_name": "B", "linkedin_url": "https://uk.linkedin.com/in/B"},
+        {"full_name": "B again", "linkedin_url": "linkedin.com/in/b/"}
+    ])
+    assert result["added"] == 1
+    assert result["total_profiles"] == 2
+
+@pytest.mark.asyncio
+async def test_composite_and_fuzzy_dedupe_match_csv_backend(tmp_path):
+    """Composite and fuzzy dedupe remove the same rows as the CSV backend."""
+    from test_csv_ops import FUZZY_PROFILES
+    for options in ({"dedupe_columns": ["full_name", "company"]}, {"fuzzy": True, "keep": "last"}):
+        db, csv_file = tmp_path / "profiles.db", tmp_path / "profiles.csv"
+        await sqlite_backend.append_profiles_to_csv(str(db), FUZZY_PROFILES)
+        csv_ops.normalize_dataframe(pd.DataFrame(FUZZY_PROFILES)).to_csv(csv_file, index=False)
+
+        result = await sqlite_backend.deduplicate_csv(str(db), **options)
+        expected = await csv_ops.deduplicate_csv(str(csv_file), **options)
+        assert result["final_count"] == expected["final_count"]
+        out = tmp_path / "out.csv"
+        sqlite_backend.export_csv(str(db), str(out))
+        assert pd.read_csv(out)["linkedin_url"].tolist() == pd.read_csv(csv_file)["linkedin_url"].tolist()
+        db.unlink()
+
+ODD_PROFILES = [
+    {"full_name": "A", "linkedin_url": "https://linkedin.com/in/a", "match_score": "N/A", "found_date": "sometime in May"},
+    {"full_name": "B", "linkedin_url": "https://linkedin.com/in/b", "match_score": "17.0", "found_date": "2026-01-03 10:30"},
+    {"full_name": "C", "linkedin_url": "https://linkedin.com/in/c", "match_score": "12", "found_date": "2026-01-03"},
+]
+
+@pytest.mark.asyncio
+async def test_scores_and_dates_stored_as_written(tmp_path):
+    """Export gives back score and date text unchanged; filters and stats use parsed copies."""
+    db, csv_file = tmp_path / "profiles.db", tmp_path / "profiles.csv"
+    await sqlite_backend.append_profiles_to_csv(str(db), ODD_PROFILES)
+    await csv_ops.create_new_csv(str(csv_file))
+    await csv_ops.append_profiles_to_csv(str(csv_file), ODD_PROFILES)
+    
+    out = tmp_path / "all.csv"
+    sqlite_backend.export_csv(str(db), str(out))
+    exported = pd.read_csv(out, dtype=str, keep_default_na=False)
+    assert exported["match_score"].tolist() == ["N/A", "17.0", "12"]
+    assert exported["found_date"].tolist() == ["sometime in May", "2026-01-03 10:30", "2026-01-03"]
+    
+    for criteria in ({"min_score": 15}, {"max_score": 15}, {"found_after_date": "2026-01-03"}, {}):
+        assert await sqlite_backend.filter_profiles(str(db), **criteria) == \
+            await csv_ops.filter_profiles(str(csv_file), **criteria), criteria
+    stats = await sqlite_backend.get_csv_stats(str(db))
+    csv_stats = await csv_ops.get_csv_stats(str(csv_file))
+    for key in ("avg_score", "score_distribution", "found_date_range"):
+        assert stats[key] == csv_stats[key], key
+
+@pytest.mark.asyncio
+async def test_parsed_in_place_databases_migrate(tmp_path):
+    """Databases that stored scores and dates parsed in place are rebuilt with parsed copies."""
+    import sqlite3
+    db = tmp_path / "profiles.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(f"""
+        CREATE TABLE profiles (
+            row_id INTEGER PRIMARY KEY, {", ".join(c for c in csv_ops.GOLDEN_SCHEMA if c != "match_score")},
+            match_score NUMERIC, extra TEXT, dedupe_key TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX idx_profiles_linkedin_url ON profiles(dedupe_key);
+        CREATE INDEX idx_profiles_match_score ON profiles(match_score);
+        CREATE INDEX idx_profiles_found_date ON profiles(found_date);
+        {sqlite_backend.FTS_SQL}
+    """)
+    conn.executemany(
+        "INSERT INTO profiles (full_name, linkedin_url, headline, match_score, found_date, dedupe_key) VALUES (?, ?, ?, ?, ?, ?)",
+        [("A", "linkedin.com/in/a", "Data Engineer", 12, "2026-01-02", "linkedin.com/in/a"),
+         ("B", "linkedin.com/in/b", "Sales Lead", 20, None, "linkedin.com/in/b")]
+    )
+    conn.commit()
+    conn.close()
+    
+    profiles = await sqlite_backend.filter_profiles(str(db), min_score=10, found_after_date="2026-01-01")
+    assert [(p["full_name"], p["match_score"], p["found_date"]) for p in profiles] == [("A", 12, "2026-01-02")]
+    assert [p["full_name"] for p in await sqlite_backend.search_profiles(str(db), "engineer")] == ["A"]
+    await sqlite_backend.append_profiles_to_csv(str(db), [{"full_name": "C", "linkedin_url": "linkedin.com/in/c", "headline": "Engineer"}])
+    assert [p["full_name"] for p in await sqlite_backend.search_profiles(str(db), "engineer")] == ["A", "C"]
+    assert (await sqlite_backend.get_csv_stats(str(db)))["avg_score"] == 16
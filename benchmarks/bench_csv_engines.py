@@ -0,0 +1,63 @@
+"""
+Compare the C and pyarrow CSV engines on the typed profile loader.
+
+The source CSV (TESTS/CSV_3_big.csv by default) is tiled up to --rows rows
+in a temporary directory, then each engine parses it --repeat times.
+
+    uv run python benchmarks/bench_csv_engines.py --rows 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from linkedin_prospecting_csv import csv_ops
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+def build_scaled_csv(source: Path, rows: int, out_dir: Path) -> Path:
+    """Repeat the source rows until the file holds `rows` profiles."""
+    df = csv_ops.normalize_dataframe(pd.read_csv(source))
+    reps = -(-rows // max(len(df), 1))
+    big = pd.concat([df] * reps, ignore_index=True).head(rows)
+    # Unique URLs so the file looks like a real deduplicated campaign
+    big["linkedin_url"] = big["linkedin_url"].astype(str) + "-" + big.index.astype(str)
+    out = out_dir / f"profiles_{rows}.csv"
+    big.to_csv(out, index=False)
+    return out
+
+def time_engine(path: Path, engine: str, repeat: int, columns=None) -> float:
+    csv_ops.CSV_ENGINE = engine
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        csv_ops.read_profiles(path, columns)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", type=Path, default=REPO_ROOT / "TESTS" / "CSV_3_big.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = ["c"]
+    if csv_ops._pyarrow_available():
+        engines.append("pyarrow")
+    else:
+        print("pyarrow is not installed; only timing the C engine")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_scaled_csv(args.source, args.rows, Path(tmp))
+        size_mb = path.stat().st_size / 1e6
+        print(f"{args.rows:,} rows, {size_mb:.1f} MB (best of {args.repeat})")
+        for label, columns in [("all columns", None), ("stats columns", csv_ops.STATS_COLUMNS)]:
+            for engine in engines:
+                seconds = time_engine(path, engine, args.repeat, columns)
+                print(f"  {label:<14} {engine:<8} {seconds:6.2f}s  {args.rows / seconds:12,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
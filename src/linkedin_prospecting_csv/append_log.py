@@ -0,0 +1,197 @@
+# Append-only write-ahead log, "<csv>.wal.jsonl". Each line is one logged
+# batch, {"column": <dedupe column>, "rows": [<profile>, ...]}, written with
+# a single write and fsync, so a batch is either fully logged or (after a
+# crash mid-write) a torn last line that readers ignore and the next
+# append cuts off. The log is only ever appended to or removed whole.
+import asyncio
+import io
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from .schema import normalize_dataframe, apply_schema_dtypes
+
+logger = logging.getLogger(__name__)
+
+LOG_SUFFIX = ".wal.jsonl"
+
+def log_path(path: Path) -> Path:
+    return path.with_name(path.name + LOG_SUFFIX)
+
+class AppendLog:
+    """
+    The batches logged for one CSV, parsed once and kept in step with the
+    file: they are re-read only when the file's size no longer matches
+    what this object last wrote or read. `derived` holds values computed
+    from the batches (typed frames, key sets) and is cleared on re-read.
+    """
+
+    def __init__(self, path: Path):
+        self.path = log_path(path)
+        self.batches: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self.size = 0
+        self.derived: Dict[Any, Any] = {}
+
+    @property
+    def rows(self) -> int:
+        return sum(len(records) for _, records in self.batches)
+
+    def refresh(self) -> "AppendLog":
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size != self.size:
+            self._load()
+        return self
+
+    def _load(self):
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            data = b""
+        # Anything after the last newline is a torn write
+        complete = data[:data.rfind(b"\n") + 1]
+        batches = [json.loads(line) for line in complete.splitlines()]
+        # Swapped in whole, as concurrent readers may refresh at once
+        self.batches = [(batch["column"], batch["rows"]) for batch in batches]
+        self.size, self.derived = len(data), {}
+
+    def append(self, column: str, records: List[Dict[str, Any]]):
+        """
+        Log one batch durably (callers refresh first). A torn line left by
+        an earlier crash is cut off first. Clears `derived`.
+        """
+        line = json.dumps({"column": column, "rows": records}, default=str).encode("utf-8") + b"\n"
+        with open(self.path, "ab+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.seek(0)
+                    f.truncate(f.read().rfind(b"\n") + 1)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            self.size = f.tell()
+        self.batches.append((column, records))
+        self.derived = {}
+
+    def discard(self):
+        """Remove the log once its rows are safely in the CSV."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.batches, self.size, self.derived = [], 0, {}
+
+# Compaction: a background task merges a CSV's log into the CSV once no
+# batch has been logged for LINKEDIN_CSV_COMPACT_SECONDS, or as soon as the
+# log holds LINKEDIN_CSV_COMPACT_ROWS rows. How rows are merged and which
+# lock guards the file is up to the caller (see csv_ops).
+COMPACT_SECONDS = float(os.environ.get("LINKEDIN_CSV_COMPACT_SECONDS", "5"))
+COMPACT_ROWS = int(os.environ.get("LINKEDIN_CSV_COMPACT_ROWS", "50000"))
+
+# Parsed append logs and pending compactions, keyed by absolute CSV path
+_APPEND_LOGS: Dict[str, AppendLog] = {}
+_COMPACTORS: Dict[str, "LogCompactor"] = {}
+
+def open_log(path: Path) -> AppendLog:
+    """
+    The append log of `path`, refreshed from disk if it changed.
+    """
+    log = _APPEND_LOGS.get(str(path))
+    if log is None:
+        log = _APPEND_LOGS[str(path)] = AppendLog(path)
+    return log.refresh()
+
+def logged_profiles(path: Path) -> Optional[pd.DataFrame]:
+    """
+    Typed frame of the rows waiting in the append log, parsed as they
+    will read back from the CSV once merged; None when nothing is logged.
+    """
+    log = open_log(path)
+    if not log.batches:
+        return None
+    df = log.derived.get("frame")
+    if df is None:
+        records = [r for _, rows in log.batches for r in rows]
+        text = normalize_dataframe(pd.DataFrame(records)).to_csv(index=False)
+        df = log.derived["frame"] = apply_schema_dtypes(normalize_dataframe(pd.read_csv(io.StringIO(text))))
+    return df.copy()
+
+def compact_log(path: Path, merge: Callable[[Path, pd.DataFrame, str], tuple]) -> int:
+    """
+    Merge the append log into the CSV through `merge` (the regular append
+    path, returning the row count and which rows were kept), then remove
+    it. Replaying a log whose rows already reached the CSV (a crash before
+    the removal) only skips them as duplicates. Returns the number of rows
+    merged.
+    """
+    log = open_log(path)
+    if not log.batches:
+        return 0
+    merged = 0
+    # Consecutive batches sharing a dedupe column merge in one write
+    for column, group in itertools.groupby(log.batches, key=lambda batch: batch[0]):
+        records = [r for _, rows in group for r in rows]
+        _, kept = merge(path, normalize_dataframe(pd.DataFrame(records)), column)
+        merged += int(kept.sum())
+    log.discard()
+    logger.info(f"Merged {merged} logged profiles into {path}")
+    return merged
+
+class LogCompactor:
+    """
+    Background task running `compact` under the file's write lock once no
+    batch has been logged for COMPACT_SECONDS, or as soon as an urgent
+    batch arrives.
+    """
+    def __init__(self, path: Path, lock, compact: Callable[[], Awaitable[Any]]):
+        self.path = path
+        self.lock = lock
+        self.compact = compact
+        self.activity = asyncio.Event()
+        self.urgent = False
+        self.loop = asyncio.get_running_loop()
+        self.task = self.loop.create_task(self._run())
+
+    def touch(self, urgent: bool = False):
+        """Restart the quiet period after a logged batch."""
+        self.urgent = self.urgent or urgent
+        self.activity.set()
+
+    async def _run(self):
+        while not self.urgent:
+            self.activity.clear()
+            try:
+                await asyncio.wait_for(self.activity.wait(), COMPACT_SECONDS)
+            except asyncio.TimeoutError:
+                break
+        async with self.lock.write():
+            # Batches logged after this point need a compactor of their own
+            if _COMPACTORS.get(str(self.path)) is self:
+                del _COMPACTORS[str(self.path)]
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception(f"Could not merge the append log of {self.path}; retrying after the next append")
+
+def schedule_compaction(path: Path, lock, compact: Callable[[], Awaitable[Any]]):
+    """
+    After an append to `path`, make sure a compactor is pending if rows
+    are logged and restart its quiet period; a log of COMPACT_ROWS rows
+    is compacted now. `lock` is the file's ReadWriteLock.
+    """
+    log = _APPEND_LOGS.get(str(path))
+    if log is None or not log.batches:
+        return
+    compactor = _COMPACTORS.get(str(path))
+    if compactor is None or compactor.loop is not asyncio.get_running_loop():
+        compactor = _COMPACTORS[str(path)] = LogCompactor(path, lock, compact)
+    compactor.touch(urgent=log.rows >= COMPACT_ROWS)
@@ -0,0 +1,155 @@
+# Persisted Bloom filter over dedupe keys, "<csv>.bloom.npz". It answers
+# "is this key definitely new?" without loading the key index, so a batch
+# of profiles whose keys all miss the filter can be appended with no
+# existence check at all. Keys are the key index's sidecar lines (see
+# keyset), hashed with pandas' fixed-key SipHash so bit positions are the
+# same in every process.
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+BLOOM_SUFFIX = ".bloom.npz"
+# 10 bits per key with 7 hash functions gives about 1% false positives
+BITS_PER_KEY = 10
+MIN_CAPACITY = 1024
+
+def _bloom_path(path: Path) -> Path:
+    return path.with_name(path.name + BLOOM_SUFFIX)
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, deriving a second hash from the first."""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+class KeyFilter:
+    """
+    Bloom filter sized for `capacity` keys. Also counts, over the new keys
+    it was asked about, how many it wrongly reported as probably present.
+    """
+
+    def __init__(
+        self,
+        column: str,
+        capacity: int,
+        bits: Optional[np.ndarray] = None,
+        keys: int = 0,
+        new_keys_checked: int = 0,
+        false_positives: int = 0
+    ):
+        self.column = column
+        self.capacity = max(int(capacity), MIN_CAPACITY)
+        # Power-of-two bit count, so positions reduce with a mask
+        self.m = 1 << (self.capacity * BITS_PER_KEY - 1).bit_length()
+        self.k = max(1, round(BITS_PER_KEY * math.log(2)))
+        self.bits = np.zeros(self.m // 8, dtype=np.uint8) if bits is None else bits
+        self.keys = keys
+        self.new_keys_checked = new_keys_checked
+        self.false_positives = false_positives
+
+    @classmethod
+    def build(cls, column: str, lines: List[bytes], **counters) -> "KeyFilter":
+        """Filter over `lines` with room for twice as many keys."""
+        key_filter = cls(column, 2 * len(lines), **counters)
+        key_filter.add(lines)
+        return key_filter
+
+    def _positions(self, lines: List[bytes]) -> np.ndarray:
+        h1 = pd.util.hash_array(np.array(lines, dtype=object))
+        h2 = _mix(h1) | np.uint64(1)
+        probes = np.arange(self.k, dtype=np.uint64)
+        return (h1[:, None] + probes * h2[:, None]) & np.uint64(self.m - 1)
+
+    def add(self, lines: List[bytes]):
+        if not lines:
+            return
+        positions = self._positions(lines).ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.intp), masks)
+        self.keys += len(lines)
+
+    def might_contain(self, lines: List[bytes]) -> np.ndarray:
+        """False means definitely absent; True means probably present."""
+        if not lines:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(lines)
+        set_bits = (self.bits[(positions >> np.uint64(3)).astype(np.intp)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return set_bits.all(axis=1)
+
+    def record(self, probable: np.ndarray, present: np.ndarray):
+        """Tally which truly new keys the filter reported as probable."""
+        new = ~present
+        self.new_keys_checked += int(new.sum())
+        self.false_positives += int((probable & new).sum())
+
+    @property
+    def full(self) -> bool:
+        return self.keys > self.capacity
+
+    def describe(self) -> Dict[str, Any]:
+        fill = np.unpackbits(self.bits).mean() if len(self.bits) else 0.0
+        observed = self.false_positives / self.new_keys_checked if self.new_keys_checked else None
+        return {
+            "column": self.column,
+            "keys": self.keys,
+            "capacity": self.capacity,
+            "size_bytes": int(self.bits.nbytes),
+            "hash_functions": self.k,
+            "estimated_false_positive_rate": float(f"{fill ** self.k:.3g}"),
+            "observed_false_positive_rate": None if observed is None else float(f"{observed:.3g}"),
+            "new_keys_checked": self.new_keys_checked,
+        }
+
+def save_key_filter(path: Path, key_filter: KeyFilter, signature: Dict[str, int], key_format: int):
+    """
+    Write the filter atomically, stamped with the CSV signature it covers.
+    """
+    meta = {
+        "column": key_filter.column,
+        "format": key_format,
+        "capacity": key_filter.capacity,
+        "keys": key_filter.keys,
+        "new_keys_checked": key_filter.new_keys_checked,
+        "false_positives": key_filter.false_positives,
+        "signature": signature,
+    }
+    fd, temp_path = tempfile.mkstemp(suffix=".npz", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), bits=key_filter.bits)
+        os.replace(temp_path, _bloom_path(path))
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def load_key_filter(
+    path: Path,
+    signature: Dict[str, int],
+    key_format: int,
+    column: Optional[str] = None
+) -> Optional[KeyFilter]:
+    """
+    The filter for `path` if it matches the CSV signature and key format
+    (and `column`, when given), else None.
+    """
+    try:
+        with np.load(_bloom_path(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["signature"] != signature or meta["format"] != key_format:
+                return None
+            if column is not None and meta["column"] != column:
+                return None
+            bits = data["bits"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return KeyFilter(
+        meta["column"], meta["capacity"], bits, meta["keys"],
+        meta["new_keys_checked"], meta["false_positives"]
+    )
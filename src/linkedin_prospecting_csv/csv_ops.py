@@ -1,71 +1,464 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import logging
-import json
 import os
+import re
+import csv
+import datetime
+import io
+import shutil
 import tempfile
+import asyncio
+import atexit
+import contextlib
+import functools
+import inspect
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from .search_index import load_token_index, extend_token_index
+from .matcher import matches_any
+from .url_keys import URL_KEY_COLUMNS, KEY_FORMAT, canonicalize_urls
+from .keyset import encode_key_lines, duplicated_keys
+from .key_index import write_key_index, read_key_index, read_key_lines, extend_key_index
+from .key_store import SpillableKeyStore
+from .bloom import KeyFilter, load_key_filter, save_key_filter
+from .fuzzy_keys import DEFAULT_SIMILARITY, fuzzy_duplicated
+from .append_log import AppendLog, open_log, logged_profiles, compact_log, schedule_compaction
+from .parquet_shadow import (
+    shadow_path, shadow_available, write_shadow, read_shadow, shadow_is_fresh, filter_shadow
+)
+from .stats_sidecar import (
+    STATS_COLUMNS, stats_aggregates, merge_stats, load_stats, write_stats,
+    scan_stats, extend_stats, render_stats
+)
+from .schema import (
+    GOLDEN_SCHEMA, RENAME_MAP, SCHEMA_DTYPES, PARSED_DATE_COLUMNS,
+    normalize_dataframe, apply_schema_dtypes, parse_dates, first_date_text, select_columns
+)
 
 logger = logging.getLogger(__name__)
 
-# Golden Schema Definition
-GOLDEN_SCHEMA = [
-    "full_name",
-    "linkedin_url",
-    "headline",
-    "company",
-    "company_size",
-    "location",
-    "match_score",
-    "match_reason",
-    "current_role_mention",
-    "found_date",
-    "icp_source"
-]
-
-RENAME_MAP = {
-    "v2_score": "match_score",
-    "v2 score": "match_score",
-    "name": "full_name",
-    "linkedin_profile": "linkedin_url",
-    "linkedin url": "linkedin_url",
-    "current role mention": "current_role_mention",
-    "company size": "company_size",
-    "found date": "found_date",
-    "icp source": "icp_source",
-    "match reason": "match_reason"
-}
-
-def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Standardize headers to snake_case and map legacy names to Golden Schema.
-    """
-    # 1. Clean whitespace from headers and convert to snake_case
-    df.columns = (
-        df.columns.str.strip()
-        .str.lower()
-        .str.replace(" ", "_")
-        .str.replace("-", "_")
-    )
-    
-    # 2. Map specific common variations
-    df = df.rename(columns=RENAME_MAP)
-    
-    # 3. Ensure all golden schema columns exist
-    for col in GOLDEN_SCHEMA:
-        if col not in df.columns:
-            df[col] = ""
-            
-    # 4. Reorder to match Golden Schema (plus any extra columns)
-    extra_cols = [c for c in df.columns if c not in GOLDEN_SCHEMA]
-    df = df[GOLDEN_SCHEMA + extra_cols]
-    
+# Worker pool for blocking pandas/file work (LINKEDIN_CSV_WORKERS threads).
+# LINKEDIN_CSV_PARSE_PROCESSES > 0 additionally moves CSV parsing into a
+# process pool so large parses don't compete with query work for the GIL.
+# Its workers are spawned, not forked: forking a process that already runs
+# worker threads and an event loop can deadlock the child.
+WORKER_THREADS = int(os.environ.get("LINKEDIN_CSV_WORKERS", "4"))
+PARSE_PROCESSES = int(os.environ.get("LINKEDIN_CSV_PARSE_PROCESSES", "0"))
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="csv-ops")
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+_PROCESS_POOL_LOCK = threading.Lock()
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking callable on the worker pool without stalling the event
+    loop (see _wait_for_job).
+    """
+    return await _wait_for_job(_EXECUTOR.submit(functools.partial(func, *args, **kwargs)))
+
+async def _wait_for_job(job: Future):
+    """
+    Await a worker pool job. If the caller is cancelled before the job
+    starts, the job is dropped; once it has started, the caller still
+    waits for the thread to finish before raising CancelledError, so locks
+    it holds are never released under a running rewrite.
+    """
+    result = asyncio.wrap_future(job)
+    try:
+        return await asyncio.shield(result)
+    except asyncio.CancelledError:
+        if not job.cancel():
+            while not result.done():
+                try:
+                    await asyncio.wait([result])
+                except asyncio.CancelledError:
+                    pass
+        raise
+
+class ReadWriteLock:
+    """
+    Async reader/writer lock. Any number of readers may hold it at once;
+    writers are exclusive and block new readers while they wait.
+    """
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self.loop = asyncio.get_running_loop()
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self._cond:
+            self._waiting_writers += 1
+            try:
+                await self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+# Per-file lock registry and append batches waiting to be written
+_PATH_LOCKS: Dict[str, ReadWriteLock] = {}
+_PENDING_APPENDS: Dict[str, List[tuple]] = {}
+
+def path_lock(path: Path) -> ReadWriteLock:
+    """
+    The reader/writer lock guarding `path` on the running event loop.
+    """
+    lock = _PATH_LOCKS.get(str(path))
+    if lock is None or lock.loop is not asyncio.get_running_loop():
+        lock = _PATH_LOCKS[str(path)] = ReadWriteLock()
+    return lock
+
+def offloaded(reads: tuple = (), writes: tuple = (), repairs: tuple = ()):
+    """
+    Expose a synchronous tool body as a coroutine that runs on the worker
+    pool, holding read/write locks on the files named by the `reads` and
+    `writes` arguments. Files named by `repairs` first get any pending
+    legacy header repair as a separate writer step, so bodies holding only
+    a read lock never rewrite them. The plain function stays reachable as
+    `__wrapped__`.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            write_paths = {str(Path(bound.arguments[name]).absolute()) for name in writes}
+            read_paths = {str(Path(bound.arguments[name]).absolute()) for name in reads} - write_paths
+            for name in repairs:
+                await _repair_before_query(Path(bound.arguments[name]).absolute())
+            async with contextlib.AsyncExitStack() as stack:
+                # Fixed acquisition order so two tools can't deadlock each other
+                for p in sorted(read_paths | write_paths):
+                    lock = path_lock(Path(p))
+                    await stack.enter_async_context(lock.write() if p in write_paths else lock.read())
+                return await run_blocking(func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+# CSV parsing backend (LINKEDIN_CSV_ENGINE): "c" (default), "pyarrow" for
+# pandas' multi-threaded Arrow reader, or "auto" to use pyarrow if installed.
+# Files or options the pyarrow engine rejects fall back to the C parser.
+CSV_ENGINE = os.environ.get("LINKEDIN_CSV_ENGINE", "c").lower()
+
+# read_csv options the pyarrow engine does not implement
+_PYARROW_UNSUPPORTED = {"chunksize", "iterator", "nrows", "skipfooter", "low_memory", "converters"}
+
+@functools.lru_cache(maxsize=None)
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if CSV_ENGINE == "pyarrow":
+            logger.warning("LINKEDIN_CSV_ENGINE=pyarrow but pyarrow is not installed; using the C parser")
+        return False
+    return True
+
+def _csv_engine() -> str:
+    if CSV_ENGINE in ("pyarrow", "auto") and _pyarrow_available():
+        return "pyarrow"
+    return "c"
+
+def _parse_csv(path, engine: str, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv with the given engine, retrying with the C parser if the
+    pyarrow engine can't handle the file or the requested options.
+    """
+    if engine == "pyarrow" and not _PYARROW_UNSUPPORTED & kwargs.keys():
+        try:
+            df = _undo_date_inference(pd.read_csv(path, engine="pyarrow", **kwargs))
+        except Exception as e:
+            logger.info(f"pyarrow engine rejected {path} ({e}); falling back to the C parser")
+        else:
+            if df is not None:
+                return df
+            logger.info(f"pyarrow engine read timestamps from {path}; using the C parser to keep their text")
+    return pd.read_csv(path, **kwargs)
+
+def _undo_date_inference(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Turn columns the pyarrow engine read as dates back into the text the
+    C parser returns. Dates are only inferred from ISO text (spaces
+    around it trimmed), which isoformat writes back unchanged. Returns
+    None when a column was read as timestamps, whose text is lost.
+    """
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            return None
+        first = df[col].first_valid_index() if df[col].dtype == object else None
+        if first is not None and isinstance(df[col].loc[first], datetime.date):
+            df[col] = df[col].map(datetime.date.isoformat, na_action="ignore")
     return df
 
+def _read_csv(path: Path, **kwargs) -> pd.DataFrame:
+    """
+    Parse a CSV with the configured engine, dispatched to the parse
+    process pool when enabled.
+    """
+    engine = _csv_engine()
+    if PARSE_PROCESSES <= 0 or kwargs.get("chunksize") or kwargs.get("iterator"):
+        return _parse_csv(path, engine, **kwargs)
+    return _process_pool().submit(_parse_csv, str(path), engine, **kwargs).result()
+
+def _process_pool() -> ProcessPoolExecutor:
+    """
+    The parse process pool, started on first use and shut down at exit.
+    """
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None:
+            _PROCESS_POOL = ProcessPoolExecutor(
+                max_workers=PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_PROCESS_POOL.shutdown)
+        return _PROCESS_POOL
+
+def _iter_chunks(path: Path, chunksize: int, **kwargs):
+    """
+    Yield normalized chunks of a CSV, indexed by their row position in
+    the whole file.
+    """
+    start = 0
+    for chunk in _read_csv(path, chunksize=chunksize, **kwargs):
+        chunk = normalize_dataframe(chunk)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+# Memory budget for cached, normalized DataFrames (LINKEDIN_CSV_CACHE_MB)
+FRAME_CACHE_BYTES = int(os.environ.get("LINKEDIN_CSV_CACHE_MB", "256")) * 1024 * 1024
+
+class FrameCache:
+    """
+    LRU cache of normalized DataFrames keyed by absolute path. An entry is
+    only served while the file's (inode, size, mtime_ns) still match, and
+    the module's own writes drop the entry explicitly.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _identity(path: Path) -> tuple:
+        st = os.stat(path)
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get(self, path: Path, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Cached frame for `path`, or None if missing, stale, or lacking any
+        of the requested `columns` (all columns when `columns` is None).
+        """
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["identity"] != self._identity(path):
+                self.invalidate(path)
+                return None
+            if columns is None and not entry["complete"]:
+                return None
+            if columns is not None and not set(columns) <= set(entry["df"].columns):
+                return None
+            self._entries.move_to_end(key)
+            return entry["df"]
+
+    def put(self, path: Path, df: pd.DataFrame, complete: bool = True):
+        """
+        Cache `df` for the file's current identity. `complete` is False for
+        frames holding only a projection of the file's columns.
+        """
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self.invalidate(path)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[str(path)] = {
+                "identity": self._identity(path), "df": df, "bytes": nbytes, "complete": complete
+            }
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted["bytes"]
+
+    def folded(self, path: Path, column: str) -> Optional[pd.Series]:
+        """
+        Casefolded copy of a text column of the cached frame, built on first
+        use and kept (and counted against the budget) with the entry, so it
+        lives exactly as long as this version of the file. None when the
+        frame isn't cached.
+        """
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["identity"] != self._identity(path):
+                return None
+            if column not in entry["df"].columns:
+                return None
+            folded = entry.setdefault("folded", {})
+            if column in folded:
+                return folded[column]
+            source = entry["df"][column]
+        
+        # Fold outside the lock; another thread may race us to the same result
+        values = _cell_text(source).str.casefold()
+        nbytes = int(values.memory_usage(index=False, deep=True))
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return values
+            if column not in folded:
+                folded[column] = values
+                entry["bytes"] += nbytes
+                self.total_bytes += nbytes
+                self._entries.move_to_end(key)
+                while self.total_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.total_bytes -= evicted["bytes"]
+            return folded[column]
+
+    def folded_bytes(self, path: Path) -> int:
+        """
+        Memory held by the casefolded columns cached for `path`.
+        """
+        with self._lock:
+            entry = self._entries.get(str(path))
+            if entry is None:
+                return 0
+            return sum(int(v.memory_usage(index=False, deep=True)) for v in entry.get("folded", {}).values())
+
+    def invalidate(self, path: Path):
+        with self._lock:
+            entry = self._entries.pop(str(path), None)
+            if entry is not None:
+                self.total_bytes -= entry["bytes"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+_FRAME_CACHE = FrameCache(FRAME_CACHE_BYTES)
+
+def _normalize_column_name(name: str) -> str:
+    """
+    Map a user-supplied column name to its Golden Schema equivalent.
+    """
+    norm = name.strip().lower().replace(" ", "_").replace("-", "_")
+    return RENAME_MAP.get(norm, norm)
+
+def _dedupe_keys(series: pd.Series, column: str) -> pd.Series:
+    """
+    Build comparable dedupe keys from a column (missing values become "").
+    URL columns are canonicalized, so variants of one profile URL collide.
+    """
+    if column in URL_KEY_COLUMNS:
+        return canonicalize_urls(series)
+    return series.fillna("").astype(str).str.strip()
+
+def _cell_text(series: pd.Series) -> pd.Series:
+    """
+    Text of each cell for searching. Missing cells become empty text, not
+    the "nan" or "None" astype(str) gives them on pandas 2.
+    """
+    return series.astype(str).where(series.notna(), "")
+
+def _strip_text(series: pd.Series) -> pd.Series:
+    """
+    Stripped text of each cell. Missing cells stay missing rather than
+    turning into "nan", as astype(str) does on pandas 2.
+    """
+    return series.astype(str).str.strip().where(series.notna())
+
+def _check_keep(keep: str):
+    """
+    Reject a deduplicate_csv `keep` other than "first" or "last", which
+    the streamed and SQLite paths would otherwise read as one of them.
+    """
+    if keep not in ("first", "last"):
+        raise ValueError(f'keep must be "first" or "last", not {keep!r}')
+
+def _composite_keys(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """
+    Dedupe keys over several columns, joined by a unit separator. A single
+    column gives the same keys as _dedupe_keys.
+    """
+    keys = _dedupe_keys(df[columns[0]], columns[0])
+    for column in columns[1:]:
+        keys = keys + "\x1f" + _dedupe_keys(df[column], column)
+    return keys
+
+def _read_header(path: Path) -> Optional[List[str]]:
+    """
+    Read only the header row of a CSV file. Returns None for empty files.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+def _has_clean_trailer(path: Path) -> bool:
+    """
+    Check that the file ends with a line terminator, i.e. the last write
+    was not interrupted halfway through a row.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+def append_rows_to_csv(df: pd.DataFrame, path: Path):
+    """
+    Append rows (without header) to the end of an existing CSV and fsync.
+    On failure the file is truncated back to its original length.
+    """
+    payload = df.to_csv(index=False, header=False).encode("utf-8")
+    if not payload:
+        return
+    _FRAME_CACHE.invalidate(path)
+    with open(path, "r+b") as f:
+        f.seek(0, os.SEEK_END)
+        original_size = f.tell()
+        try:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        except Exception:
+            f.truncate(original_size)
+            raise
+
 def safe_to_csv(df: pd.DataFrame, path: Path):
     """
-    Write DataFrame to CSV atomically using a temporary file.
+    Write DataFrame to CSV atomically using a temporary file. A Parquet
+    shadow is refreshed only if the file already has one.
     """
+    _FRAME_CACHE.invalidate(path)
     fd, temp_path = tempfile.mkstemp(suffix=".csv", dir=path.parent)
     os.close(fd)
     try:
@@ -75,8 +468,49 @@ def safe_to_csv(df: pd.DataFrame, path: Path):
         if os.path.exists(temp_path):
             os.remove(temp_path)
         raise e
+    # Shadows are created by query tools reading the file (load_profiles),
+    # so exports and new files never pay for one
+    if shadow_path(path).exists():
+        write_shadow(df, path, _file_signature(path))
+
+# Appends look incoming keys up in the "<csv>.keys" sidecar (see key_index).
+# A "<csv>.bloom.npz" filter over the same keys lets appends whose keys are
+# all definitely new skip loading the index (LINKEDIN_CSV_KEY_FILTER)
+KEY_FILTER_ENABLED = os.environ.get("LINKEDIN_CSV_KEY_FILTER", "1") == "1"
 
-async def create_new_csv(csv_path: str, overwrite: bool = False) -> Dict[str, str]:
+def _file_signature(path: Path) -> Dict[str, int]:
+    """
+    Cheap identity of a file's current contents (size and mtime).
+    """
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _index_keys(path: Path, column: str, keys: pd.Series, rows: int) -> Dict[str, Any]:
+    """
+    Rewrite the key index (and Bloom filter) for a CSV that was just
+    written in full. Returns the loaded index.
+    """
+    signature = _file_signature(path)
+    lines = encode_key_lines(pd.Series(keys).drop_duplicates())
+    index = write_key_index(path, column, lines, rows, signature)
+    if KEY_FILTER_ENABLED:
+        save_key_filter(path, KeyFilter.build(column, lines), signature, KEY_FORMAT)
+    return index
+
+def load_key_index(path: Path, column: str) -> Dict[str, Any]:
+    """
+    Return the set of known dedupe keys for `column` plus the CSV row count,
+    rebuilding the sidecar from the CSV when it is missing or stale.
+    """
+    index = read_key_index(path, column, _file_signature(path))
+    if index is None:
+        logger.info(f"Rebuilding key index for {path}")
+        keys = _dedupe_keys(_read_csv(path, usecols=[column])[column], column)
+        index = _index_keys(path, column, keys, len(keys))
+    return index
+
+@offloaded(writes=("csv_path",))
+def create_new_csv(csv_path: str, overwrite: bool = False) -> Dict[str, str]:
     """
     Creates a new CSV with the Golden Schema headers.
     """
@@ -87,6 +521,8 @@ async def create_new_csv(csv_path: str, overwrite: bool = False) -> Dict[str, st
     df = pd.DataFrame(columns=GOLDEN_SCHEMA)
     path.parent.mkdir(parents=True, exist_ok=True)
     safe_to_csv(df, path)
+    # Rows logged for a file that no longer exists don't belong to this one
+    open_log(path).discard()
     
     return {
         "status": "success",
@@ -101,21 +537,118 @@ async def append_profiles_to_csv(
 ) -> Dict[str, Any]:
     """
     Append new profiles to CSV with auto-normalization and deduplication.
+    Concurrent appends to the same file are merged into one write.
     """
     path = Path(csv_path).absolute()
+    norm_dedupe = _normalize_column_name(dedupe_column)
+    future = asyncio.get_running_loop().create_future()
+    _PENDING_APPENDS.setdefault(str(path), []).append((profiles, norm_dedupe, future))
     
+    async with path_lock(path).write():
+        if not future.done():
+            # Nobody has picked up our batch yet: flush every pending batch
+            # for this file that shares our dedupe column in a single cycle
+            pending = _PENDING_APPENDS.get(str(path), [])
+            batches = [p for p in pending if p[1] == norm_dedupe]
+            _PENDING_APPENDS[str(path)] = [p for p in pending if p[1] != norm_dedupe]
+            job = _EXECUTOR.submit(_append_batches, path, [b[0] for b in batches], norm_dedupe)
+            try:
+                await _wait_for_job(job)
+            except asyncio.CancelledError:
+                if job.cancelled():
+                    # Nothing was written: the other callers flush their own batches
+                    others = [b for b in batches if b[2] is not future]
+                    _PENDING_APPENDS[str(path)] = others + _PENDING_APPENDS[str(path)]
+                    raise
+                # The rows are written; only our own caller sees the cancellation
+                future.cancel()
+            except Exception:
+                pass
+            _settle_appends(batches, job)
+            if job.exception() is None:
+                schedule_compaction(path, path_lock(path), functools.partial(run_blocking, _compact_log, path))
+    return await future
+
+def _settle_appends(batches: List[tuple], job: Future):
+    """
+    Hand a finished _append_batches job's per-batch results, or its error,
+    to the futures of the batches still waiting for them.
+    """
+    error = job.exception()
+    results = [None] * len(batches) if error else job.result()
+    for (_, _, f), result in zip(batches, results):
+        if f.done():
+            continue
+        if error:
+            f.set_exception(error)
+        else:
+            f.set_result(result)
+
+def _append_batches(
+    path: Path,
+    batches: List[List[Dict[str, Any]]],
+    norm_dedupe: str
+) -> List[Dict[str, Any]]:
+    """
+    Append several batches of profiles in one read-dedupe-write cycle.
+    Results are reported per batch as if the batches ran one after another.
+    With APPEND_LOG, batches for a file that could take them in place go
+    to the append log instead.
+    """
     # Normalize incoming profiles
-    new_df = pd.DataFrame(profiles)
-    new_df = normalize_dataframe(new_df)
+    new_df = pd.concat(
+        [normalize_dataframe(pd.DataFrame(profiles)) for profiles in batches],
+        ignore_index=True
+    )
+
+    header = _read_header(path) if path.exists() else None
+    if APPEND_LOG and _can_append_in_place(path, header, new_df, norm_dedupe):
+        final_count, kept = _log_rows(path, new_df, norm_dedupe)
+    else:
+        # Rows already logged were appended first, so they merge first
+        _compact_log(path)
+        final_count, kept = _merge_rows(path, new_df, norm_dedupe)
     
-    # Map input dedupe column to normalized name if necessary
-    norm_dedupe = dedupe_column.lower().replace(" ", "_").replace("-", "_")
-    norm_dedupe = RENAME_MAP.get(norm_dedupe, norm_dedupe)
+    results = []
+    total = final_count - int(kept.sum())
+    start = 0
+    for profiles in batches:
+        end = start + len(profiles)
+        added_df = new_df.iloc[start:end][kept[start:end]]
+        total += len(added_df)
+        results.append({
+            "added": int(len(added_df)),
+            "skipped_duplicates": int(len(profiles) - len(added_df)),
+            "total_profiles": int(total),
+            # Extract preview (first 3 names)
+            "preview": added_df["full_name"].head(3).tolist(),
+            "path": str(path)
+        })
+        start = end
+    return results
 
+def _merge_rows(path: Path, new_df: pd.DataFrame, norm_dedupe: str) -> tuple:
+    """
+    Add normalized rows to the CSV, in place when the file allows it and
+    by a full rewrite otherwise. Returns the final row count and which
+    new rows were kept.
+    """
+    if path.exists():
+        header = _read_header(path)
+        if _can_append_in_place(path, header, new_df, norm_dedupe):
+            return _append_in_place(path, header, new_df, norm_dedupe)
+    return _rewrite_with_new_rows(path, new_df, norm_dedupe)
+
+def _rewrite_with_new_rows(path: Path, new_df: pd.DataFrame, norm_dedupe: str) -> tuple:
+    """
+    Full path: load and normalize the existing file, add the new rows,
+    deduplicate everything and rewrite the file atomically.
+    Returns the final row count and which new rows were kept.
+    """
     existing_df = pd.DataFrame()
     if path.exists():
         try:
-            existing_df = pd.read_csv(path)
+            existing_df = _read_csv(path)
             existing_df = normalize_dataframe(existing_df)
             combined_df = pd.concat([existing_df, new_df], ignore_index=True)
         except Exception as e:
@@ -124,36 +657,231 @@ async def append_profiles_to_csv(
     else:
         combined_df = new_df
 
+    kept = pd.Series(True, index=new_df.index)
     if norm_dedupe in combined_df.columns:
-        combined_df[norm_dedupe] = combined_df[norm_dedupe].astype(str).str.strip()
-        combined_df = combined_df.drop_duplicates(subset=[norm_dedupe], keep='first')
+        combined_df[norm_dedupe] = _strip_text(combined_df[norm_dedupe])
+        keys = _dedupe_keys(combined_df[norm_dedupe], norm_dedupe)
+        duplicated = duplicated_keys(keys, keep='first')
+        kept = ~duplicated.iloc[len(existing_df):].reset_index(drop=True)
+        combined_df = combined_df[~duplicated]
     
     final_count = len(combined_df)
-    added_df = combined_df.iloc[len(existing_df):] if len(existing_df) < len(combined_df) else pd.DataFrame()
-    added_count = len(added_df)
-    skipped_count = len(profiles) - added_count
+    safe_to_csv(combined_df, path)
+    if norm_dedupe in combined_df.columns:
+        _index_keys(path, norm_dedupe, keys[~duplicated], final_count)
+    return final_count, kept
+
+def _can_append_in_place(
+    path: Path,
+    header: Optional[List[str]],
+    new_df: pd.DataFrame,
+    norm_dedupe: str
+) -> bool:
+    """
+    Incremental appends are only safe when the file already follows the
+    Golden Schema, knows every incoming column and ends on a complete row.
+    Anything else needs the full read-repair-rewrite path.
+    """
+    if not header or header[:len(GOLDEN_SCHEMA)] != GOLDEN_SCHEMA:
+        return False
+    if norm_dedupe not in header or not set(new_df.columns) <= set(header):
+        return False
+    return _has_clean_trailer(path)
+
+def _append_in_place(
+    path: Path,
+    header: List[str],
+    new_df: pd.DataFrame,
+    norm_dedupe: str
+) -> tuple:
+    """
+    Write only the new, non-duplicate rows to the end of the file.
+    Known keys come from the sidecar index, not the CSV body, and when
+    the Bloom filter rules out every incoming key the index isn't loaded.
+    Returns the final row count and which new rows were kept.
+    """
+    # The file keeps each URL as given; only the keys are canonical
+    new_df[norm_dedupe] = new_df[norm_dedupe].fillna("").astype(str).str.strip()
+    new_keys = _dedupe_keys(new_df[norm_dedupe], norm_dedupe)
+    lines = encode_key_lines(new_keys)
+    first = ~new_keys.duplicated(keep='first')
+    index, present, key_filter = _known_keys(path, norm_dedupe, lines, first)
+    kept = first & ~present
+    if key_filter is None and KEY_FILTER_ENABLED:
+        key_filter = KeyFilter.build(norm_dedupe, read_key_lines(path))
     
-    # Extract preview (first 3 names)
-    preview = []
-    if not added_df.empty:
-        preview = added_df["full_name"].head(3).tolist()
+    start, before = index["rows"], _file_signature(path)
+    rows = new_df[kept].reindex(columns=header)
+    kept_lines = [line for line, keep in zip(lines, kept) if keep]
+    append_rows_to_csv(rows, path)
+    after = _file_signature(path)
+    extend_key_index(path, index, kept_lines, after)
+    extend_token_index(path, new_df[kept], start, before, after)
+    extend_stats(path, rows, before, after)
+    if key_filter is not None:
+        _extend_key_filter(path, key_filter, kept_lines)
+    return index["rows"], kept
 
-    safe_to_csv(combined_df, path)
+def _known_keys(path: Path, norm_dedupe: str, lines: List[bytes], first: pd.Series) -> tuple:
+    """
+    Mask of `lines` already in the CSV's key index. The Bloom filter is
+    asked first; when it rules out every line, only the index header is
+    read. Returns (index, present, filter); the filter is None when it is
+    disabled or missing, and has the lines at `first` tallied otherwise.
+    """
+    key_filter = probable = index = None
+    if KEY_FILTER_ENABLED:
+        key_filter = load_key_filter(path, _file_signature(path), KEY_FORMAT, norm_dedupe)
+    if key_filter is not None:
+        probable = key_filter.might_contain(lines)
+        if not probable.any():
+            index = read_key_index(path, norm_dedupe, _file_signature(path), header_only=True)
+    if index is None:
+        index = load_key_index(path, norm_dedupe)
+    present = index["keys"].contains(lines) if "keys" in index else np.zeros(len(lines), dtype=bool)
+    if key_filter is not None:
+        key_filter.record(probable[first.to_numpy()], present[first.to_numpy()])
+    return index, present, key_filter
+
+def _extend_key_filter(path: Path, key_filter: KeyFilter, lines: List[bytes]):
+    """
+    Add appended keys to the Bloom filter, regrowing it from the key index
+    once it holds more keys than it was sized for.
+    """
+    key_filter.add(lines)
+    if key_filter.full:
+        try:
+            key_filter = KeyFilter.build(
+                key_filter.column, read_key_lines(path),
+                new_keys_checked=key_filter.new_keys_checked,
+                false_positives=key_filter.false_positives
+            )
+        except OSError:
+            # Key index sidecar is gone; the stale filter is rebuilt later
+            return
+    save_key_filter(path, key_filter, _file_signature(path), KEY_FORMAT)
+
+# Append log (LINKEDIN_CSV_APPEND_LOG=1): appends to a file that could take
+# them in place are deduplicated as usual but written to "<csv>.wal.jsonl"
+# (see append_log), so their latency no longer depends on the CSV. A
+# background task merges the log into the CSV once appends go quiet or the
+# log grows large. Query tools merge logged rows into their results.
+# Dedupe and unlogged appends merge the log first; create_new_csv discards
+# it with the file it replaces.
+APPEND_LOG = os.environ.get("LINKEDIN_CSV_APPEND_LOG", "0") == "1"
+
+def _logged_keys(log: AppendLog, column: str) -> set:
+    """
+    Encoded dedupe keys of the logged rows for `column`.
+    """
+    keys = log.derived.get(("keys", column))
+    if keys is None:
+        values = pd.Series([r.get(column) for _, rows in log.batches for r in rows], dtype=object)
+        keys = log.derived[("keys", column)] = set(encode_key_lines(_dedupe_keys(values, column)))
+    return keys
+
+def _log_rows(path: Path, new_df: pd.DataFrame, norm_dedupe: str) -> tuple:
+    """
+    Log-mode counterpart of _append_in_place: new rows are checked against
+    the key index (through the Bloom filter) and the rows already logged,
+    and only the append log is written. Returns the row count, logged rows
+    included, and which new rows were kept.
+    """
+    new_df[norm_dedupe] = new_df[norm_dedupe].fillna("").astype(str).str.strip()
+    new_keys = _dedupe_keys(new_df[norm_dedupe], norm_dedupe)
+    lines = encode_key_lines(new_keys)
+    first = ~new_keys.duplicated(keep='first')
+    index, present, _ = _known_keys(path, norm_dedupe, lines, first)
     
-    return {
-        "added": int(added_count),
-        "skipped_duplicates": int(skipped_count),
-        "total_profiles": int(final_count),
-        "preview": preview,
-        "path": str(path)
-    }
+    log = open_log(path)
+    logged = _logged_keys(log, norm_dedupe)
+    present = present | np.fromiter((line in logged for line in lines), dtype=bool, count=len(lines))
+    kept = first & ~present
+    rows = new_df[kept]
+    if len(rows):
+        log.append(norm_dedupe, rows.astype(object).where(rows.notna(), None).to_dict(orient="records"))
+        logged.update(line for line, keep in zip(lines, kept) if keep)
+        log.derived[("keys", norm_dedupe)] = logged
+    return index["rows"] + log.rows, kept
+
+def _compact_log(path: Path) -> int:
+    """
+    Merge the append log of `path` into it through the regular append
+    path. Callers hold the file's write lock.
+    """
+    return compact_log(path, _merge_rows)
+
+@offloaded(writes=("csv_path",))
+def compact_append_log(csv_path: str) -> Dict[str, Any]:
+    """
+    Merge a CSV's append log into it now rather than waiting for the
+    background compactor.
+    """
+    path = Path(csv_path).absolute()
+    return {"merged": _compact_log(path), "path": str(path)}
+
+# Query tools normally repair legacy headers on disk, under the file's
+# write lock before they take their read lock. With
+# LINKEDIN_CSV_READ_ONLY_QUERIES=1 they normalize in memory and never write.
+READ_ONLY_QUERIES = os.environ.get("LINKEDIN_CSV_READ_ONLY_QUERIES", "0") == "1"
+
+def _repair_header_in_place(path: Path, header: List[str]) -> bool:
+    """
+    Fix a header that only needs renaming without touching the body: the
+    first line is overwritten in place when the new one has the same
+    length, otherwise the body is streamed unchanged behind the new header.
+    Returns False when the repair needs a full rewrite (columns added or
+    reordered, or a header this cheap path can't safely splice).
+    """
+    renamed = [_normalize_column_name(c) for c in header]
+    if normalize_dataframe(pd.DataFrame(columns=header)).columns.tolist() != renamed:
+        return False
+    
+    with open(path, "rb") as f:
+        old_line = f.readline()
+    terminator = b"\r\n" if old_line.endswith(b"\r\n") else b"\n"
+    if not old_line.endswith(b"\n") or next(csv.reader([old_line.decode("utf-8")])) != header:
+        return False
+    
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(renamed)
+    new_line = buffer.getvalue().encode("utf-8") + terminator
+    
+    logger.info(f"Auto-repairing CSV headers for {path} (header only)")
+    _FRAME_CACHE.invalidate(path)
+    if len(new_line) == len(old_line):
+        with open(path, "r+b") as f:
+            f.write(new_line)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    
+    fd, temp_path = tempfile.mkstemp(suffix=".csv", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+            out.write(new_line)
+            src.seek(len(old_line))
+            shutil.copyfileobj(src, out, 1024 * 1024)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
 
 def auto_repair_file(path: Path) -> pd.DataFrame:
     """
     Read CSV, normalize it, and if it changed, save it back to disk.
+    Headers that only need renaming are fixed without rewriting the body.
     Returns the normalized DataFrame.
     """
-    df_raw = pd.read_csv(path)
+    header = _read_header(path)
+    if _header_needs_repair(header) and _repair_header_in_place(path, header):
+        return normalize_dataframe(_read_csv(path))
+    
+    df_raw = _read_csv(path)
     original_cols = df_raw.columns.tolist()
     
     df_norm = normalize_dataframe(df_raw)
@@ -165,7 +893,140 @@ def auto_repair_file(path: Path) -> pd.DataFrame:
         
     return df_norm
 
-async def filter_profiles(
+def _header_needs_repair(header: Optional[List[str]]) -> bool:
+    """
+    True when normalizing the header would rename, add or reorder columns.
+    """
+    if header is None:
+        return False
+    return normalize_dataframe(pd.DataFrame(columns=header)).columns.tolist() != header
+
+def _declared_dtypes(path: Path, columns: Optional[List[str]] = None) -> tuple:
+    """
+    read_csv `usecols` and `dtype` arguments, in the file's own header
+    names, for parsing (normalized) `columns` with their Golden Schema
+    dtypes. All columns when `columns` is None.
+    """
+    header = _read_header(path) or []
+    raw_names = {_normalize_column_name(c): c for c in header}
+    
+    usecols = None
+    if columns is not None:
+        usecols = [raw_names[c] for c in columns if c in raw_names]
+    wanted = set(usecols if usecols is not None else header)
+    
+    dtype = {raw_names[c]: t for c, t in SCHEMA_DTYPES.items() if c in raw_names and raw_names[c] in wanted}
+    return usecols, dtype
+
+def read_profiles(path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Parse a CSV into a typed, normalized frame with dtypes declared up
+    front from the Golden Schema. With `columns`, only those (normalized)
+    columns are parsed.
+    """
+    usecols, dtype = _declared_dtypes(path, columns)
+    try:
+        df = _read_csv(path, usecols=usecols, dtype=dtype)
+    except (ValueError, TypeError):
+        # Values the declared dtypes can't hold (e.g. "N/A" scores): parse
+        # those columns as text and coerce them below instead
+        text_cols = {c: "object" for c, t in dtype.items() if t == "Int64"}
+        df = _read_csv(path, usecols=usecols, dtype={**dtype, **text_cols})
+    
+    df = apply_schema_dtypes(normalize_dataframe(df))
+    if columns is not None:
+        df = select_columns(df, columns)
+    return df
+
+def _profile_chunks(path: Path, chunksize: int, columns: Optional[List[str]] = None):
+    """
+    Chunked counterpart of read_profiles: typed, normalized chunks holding
+    what read_profiles would for the same rows. Scores are parsed as text
+    and coerced, as read_profiles does when a score isn't an integer, and
+    dates are parsed in the format inferred from the file's first date.
+    """
+    usecols, dtype = _declared_dtypes(path, columns)
+    dtype = {c: "object" if t == "Int64" else t for c, t in dtype.items()}
+    first_dates = {}
+    for chunk in _iter_chunks(path, chunksize, usecols=usecols, dtype=dtype):
+        for col, parsed in PARSED_DATE_COLUMNS.items():
+            if col in chunk.columns:
+                if first_dates.get(col) is None:
+                    first_dates[col] = first_date_text(chunk[col])
+                chunk[parsed] = parse_dates(chunk[col], first_dates[col])
+        chunk = apply_schema_dtypes(chunk)
+        yield chunk if columns is None else select_columns(chunk, columns)
+
+def _needs_query_repair(path: Path) -> bool:
+    return not READ_ONLY_QUERIES and path.is_file() and _header_needs_repair(_read_header(path))
+
+async def _repair_before_query(path: Path):
+    """
+    Apply any pending header repair before a query reads the file. The
+    header is checked without a lock, so queries on repaired files never
+    queue behind each other; a repair takes the write lock and checks
+    again, since a query that got there first may have done it already.
+    In read-only mode legacy headers are only normalized in memory
+    (read_profiles does that).
+    """
+    if not await run_blocking(_needs_query_repair, path):
+        return
+    async with path_lock(path).write():
+        await run_blocking(_repair_for_query, path)
+
+def _repair_for_query(path: Path):
+    """
+    Writer step of _repair_before_query. When the repair needs a full
+    rewrite, the typed frame it loaded is cached (and shadowed) for the
+    query that follows.
+    """
+    if not _needs_query_repair(path):
+        return
+    if _repair_header_in_place(path, _read_header(path)):
+        return
+    df = apply_schema_dtypes(auto_repair_file(path))
+    _FRAME_CACHE.put(path, df)
+    signature = _file_signature(path)
+    if not shadow_is_fresh(path, signature):
+        write_shadow(df, path, signature)
+
+def load_profiles(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[tuple]] = None
+) -> pd.DataFrame:
+    """
+    Normalized, typed DataFrame for `path`. Served from the frame cache
+    while the file is unchanged, else from a fresh Parquet shadow, else
+    parsed from the CSV. Callers get their own copy, restricted to
+    `columns` when given. `filters` (pyarrow DNF tuples) may pre-filter
+    rows read from the shadow; callers must still apply their own masks.
+    """
+    df = _FRAME_CACHE.get(path, columns)
+    if df is None:
+        df = read_shadow(path, _file_signature(path), columns, filters)
+        if df is not None and filters:
+            # Partial result: don't let it stand in for the whole file
+            return df
+        if df is None:
+            signature = _file_signature(path)
+            df = read_profiles(path, columns)
+            if columns is None and shadow_available() and not READ_ONLY_QUERIES:
+                write_shadow(df, path, signature)
+        _FRAME_CACHE.put(path, df, complete=columns is None)
+    if columns is not None:
+        return select_columns(df, columns)
+    return df.copy()
+
+def _to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    JSON-friendly records: dates as written and missing values as "".
+    """
+    out = df.drop(columns=list(PARSED_DATE_COLUMNS.values()), errors="ignore").astype(object)
+    return out.where(out.notna(), "").to_dict(orient='records')
+
+@offloaded(reads=("csv_path",), repairs=("csv_path",))
+def filter_profiles(
     csv_path: str,
     min_score: Optional[int] = None,
     max_score: Optional[int] = None,
@@ -183,88 +1044,149 @@ async def filter_profiles(
     if not path.exists():
         return []
     
-    df = auto_repair_file(path)
+    criteria = dict(
+        min_score=min_score,
+        max_score=max_score,
+        locations=locations,
+        companies=companies,
+        current_role_only=current_role_only,
+        found_after_date=found_after_date
+    )
     
-    # Ensure match_score is numeric
-    df["match_score"] = pd.to_numeric(df["match_score"], errors='coerce')
+    logged = logged_profiles(path)
+    if limit and _should_stream(path):
+        return _to_records(_with_logged(_stream_top_k(path, limit, criteria), logged, criteria, limit))
     
+    filters = []
+    if min_score is not None:
+        filters.append(("match_score", ">=", min_score))
+    if max_score is not None:
+        filters.append(("match_score", "<=", max_score))
+    if found_after_date:
+        filters.append((PARSED_DATE_COLUMNS["found_date"], ">", pd.to_datetime(found_after_date)))
+    df = load_profiles(path, filters=filters)
+    
+    df = _apply_filters(df, **criteria)
+    return _to_records(_with_logged(df, logged, criteria, limit))
+
+def _with_logged(
+    matches: pd.DataFrame,
+    logged: Optional[pd.DataFrame],
+    criteria: Dict[str, Any],
+    limit: Optional[int]
+) -> pd.DataFrame:
+    """
+    Best `limit` of the CSV's matches plus matching logged rows. Logged
+    rows follow the CSV's, so ties rank exactly as after a merge.
+    """
+    if logged is not None:
+        matches = pd.concat([matches, _apply_filters(logged, **criteria)], ignore_index=True)
+    return _top_k(matches, limit)
+
+def _apply_filters(
+    df: pd.DataFrame,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    locations: Optional[List[str]] = None,
+    companies: Optional[List[str]] = None,
+    current_role_only: Optional[bool] = None,
+    found_after_date: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Rows of a typed profile frame matching the filter_profiles criteria.
+    """
     if min_score is not None:
         df = df[df["match_score"] >= min_score]
     if max_score is not None:
         df = df[df["match_score"] <= max_score]
     
+    # Values are literal substrings, matched case-insensitively
     if locations:
-        pattern = '|'.join(locations)
-        df = df[df["location"].astype(str).str.contains(pattern, case=False, na=False)]
+        df = df[matches_any(df["location"], locations)]
         
     if companies:
-        pattern = '|'.join(companies)
-        df = df[df["company"].astype(str).str.contains(pattern, case=False, na=False)]
+        df = df[matches_any(df["company"], companies)]
         
     if current_role_only:
         df = df[df["current_role_mention"].astype(str).str.startswith('YES', na=False)]
         
     if found_after_date:
-        df["found_date"] = pd.to_datetime(df["found_date"], errors='coerce')
         after_dt = pd.to_datetime(found_after_date)
-        df = df[df["found_date"] > after_dt]
-        df["found_date"] = df["found_date"].dt.strftime('%Y-%m-%d')
-        
-    df = df.sort_values(by="match_score", ascending=False)
-        
-    if limit:
-        df = df.head(limit)
-        
-    return df.fillna("").to_dict(orient='records')
+        df = df[df[PARSED_DATE_COLUMNS["found_date"]] > after_dt]
+    return df
+
+def _should_stream(path: Path) -> bool:
+    """
+    Large files nobody has loaded yet are cheaper to scan in chunks than
+    to materialize, unless a fresh Parquet shadow can answer instead.
+    """
+    if path.stat().st_size <= STREAMING_THRESHOLD_BYTES:
+        return False
+    return _FRAME_CACHE.get(path) is None and not shadow_is_fresh(path, _file_signature(path))
+
+def _stream_top_k(path: Path, limit: int, criteria: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Single chunked pass keeping only the best `limit` matches seen so far,
+    so memory is O(limit + chunk). Order is identical to a stable
+    descending sort of all matches: score first (missing scores last),
+    then file position.
+    """
+    best = None
+    for chunk in _profile_chunks(path, STREAMING_CHUNKSIZE):
+        matches = _apply_filters(chunk, **criteria)
+        if matches.empty:
+            continue
+        candidates = matches if best is None else pd.concat([best, matches])
+        best = _top_k(candidates.sort_index(), limit)
+    if best is None:
+        return normalize_dataframe(pd.DataFrame())
+    return best
+
+def _top_k(df: pd.DataFrame, limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    Rows by descending match_score, ties in frame order and missing scores
+    last, cut to `limit`. With a limit only the best `limit` scores are
+    selected (O(n log k)) and just those rows are sorted.
+    """
+    scores = df["match_score"].reset_index(drop=True)
+    if limit and scores.count() > limit:
+        # keep="first" resolves ties at the cut-off in favour of earlier rows
+        positions = scores.nlargest(limit, keep="first").index.sort_values()
+        df = df.iloc[positions]
+    # Stable sort: ties keep frame order, so results are deterministic
+    df = df.sort_values(by="match_score", ascending=False, kind="mergesort")
+    return df.head(limit) if limit else df
 
-async def get_csv_stats(csv_path: str) -> Dict[str, Any]:
+@offloaded(reads=("csv_path",), repairs=("csv_path",))
+def get_csv_stats(csv_path: str, score_buckets: Optional[List[float]] = None) -> Dict[str, Any]:
     """
     Get statistics about profiles in CSV with robust error handling.
-    Includes Auto-Repair on load.
+    Includes Auto-Repair on load. Served from the "<csv>.stats" sidecar
+    while it matches the file. `score_buckets` overrides the score
+    distribution's bucket edges.
     """
     path = Path(csv_path).absolute()
     if not path.exists():
         return {"error": "File not found"}
-        
-    df = auto_repair_file(path)
-    total = len(df)
-    
-    # match_score stats
-    df["match_score"] = pd.to_numeric(df["match_score"], errors='coerce')
-    avg_score = float(df["match_score"].mean()) if not df["match_score"].isna().all() else 0
-    score_dist = {
-        "20+": int((df["match_score"] >= 20).sum()),
-        "15-19": int(((df["match_score"] >= 15) & (df["match_score"] < 20)).sum()),
-        "10-14": int(((df["match_score"] >= 10) & (df["match_score"] < 15)).sum()),
-        "<10": int((df["match_score"] < 10).sum())
-    }
-        
-    location_breakdown = df["location"].value_counts().head(10).to_dict()
-    location_breakdown = {str(k): int(v) for k, v in location_breakdown.items()}
-    
-    company_size_breakdown = df["company_size"].value_counts().to_dict()
-    company_size_breakdown = {str(k): int(v) for k, v in company_size_breakdown.items()}
-    
-    found_dates = pd.to_datetime(df["found_date"], errors='coerce')
-    date_range = {
-        "earliest": str(found_dates.min().date()) if not found_dates.isna().all() else "",
-        "latest": str(found_dates.max().date()) if not found_dates.isna().all() else ""
-    }
-    
-    current_role_count = int(df["current_role_mention"].astype(str).str.startswith('YES', na=False).sum())
     
-    return {
-        "total_profiles": total,
-        "avg_score": round(avg_score, 2),
-        "score_distribution": score_dist,
-        "location_breakdown": location_breakdown,
-        "company_size_breakdown": company_size_breakdown,
-        "found_date_range": date_range,
-        "current_role_count": current_role_count,
-        "path": str(path)
-    }
+    signature = _file_signature(path)
+    aggregates = load_stats(path, signature)
+    if aggregates is None:
+        df = load_profiles(path, columns=STATS_COLUMNS)
+        aggregates = stats_aggregates(df)
+        if not READ_ONLY_QUERIES:
+            write_stats(path, aggregates, _file_signature(path))
+    logged = logged_profiles(path)
+    if logged is not None:
+        aggregates = merge_stats(aggregates, stats_aggregates(select_columns(logged, STATS_COLUMNS)))
+    stats = render_stats(aggregates, path, score_buckets)
+    key_filter = load_key_filter(path, _file_signature(path), KEY_FORMAT)
+    if key_filter is not None:
+        stats["dedupe_filter"] = key_filter.describe()
+    return stats
 
-async def export_segment(
+@offloaded(reads=("source_csv",), writes=("output_csv",), repairs=("source_csv",))
+def export_segment(
     source_csv: str,
     output_csv: str,
     min_score: Optional[int] = None,
@@ -275,7 +1197,7 @@ async def export_segment(
     """
     Export filtered profiles to new CSV file following Golden Schema.
     """
-    profiles = await filter_profiles(
+    profiles = filter_profiles.__wrapped__(
         csv_path=source_csv,
         min_score=min_score,
         locations=locations,
@@ -290,8 +1212,7 @@ async def export_segment(
     
     if columns:
         # Normalize requested columns
-        norm_cols = [c.lower().replace(" ", "_").replace("-", "_") for c in columns]
-        norm_cols = [RENAME_MAP.get(c, c) for c in norm_cols]
+        norm_cols = [_normalize_column_name(c) for c in columns]
         existing_cols = [c for c in norm_cols if c in df.columns]
         df = df[existing_cols]
     
@@ -305,71 +1226,352 @@ async def export_segment(
         "columns_included": df.columns.tolist()
     }
 
-async def search_profiles(
+# Default search_profiles columns, served by the token index
+SEARCH_COLUMNS = ["headline", "company", "match_reason", "current_role_mention", "full_name"]
+
+# Word searches go through the "<csv>.tokens.npz" inverted index
+# (LINKEDIN_CSV_TOKEN_INDEX=0 always scans)
+TOKEN_INDEX_ENABLED = os.environ.get("LINKEDIN_CSV_TOKEN_INDEX", "1") == "1"
+
+# Case-insensitive searches match against casefolded copies of the text
+# columns kept in the frame cache (LINKEDIN_CSV_FOLDED_SEARCH=0 folds per call)
+FOLDED_SEARCH = os.environ.get("LINKEDIN_CSV_FOLDED_SEARCH", "1") == "1"
+
+# BM25 parameters for ranked (query mode) search
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+@offloaded(reads=("csv_path",), repairs=("csv_path",))
+def search_profiles(
     csv_path: str,
-    search_term: str,
+    search_term: Optional[str] = None,
     columns: Optional[List[str]] = None,
     case_sensitive: bool = False,
-    limit: Optional[int] = None
-) -> List[Dict[str, Any]]:
+    limit: Optional[int] = None,
+    explain: bool = False,
+    must: Optional[List[str]] = None,
+    should: Optional[List[str]] = None,
+    must_not: Optional[List[str]] = None,
+    column_weights: Optional[Dict[str, float]] = None
+) -> Any:
     """
     Search for profiles containing search term (case-insensitive by default).
+    Giving must/should/must_not terms or column_weights switches to query
+    mode: rows need every must term (search_term counts as one), at least
+    one should term when there is no must term, and no must_not term, and
+    come back ranked by BM25 relevance. With explain=True the results come
+    back as {"search_path", "folded_bytes", "results"}.
     """
+    query = _search_query(search_term, must, should, must_not, column_weights)
     path = Path(csv_path).absolute()
     if not path.exists():
-        return []
+        return {"search_path": "none", "results": []} if explain else []
         
-    df = auto_repair_file(path)
+    df = load_profiles(path)
+    logged = logged_profiles(path)
+    if logged is not None:
+        df = pd.concat([df, logged], ignore_index=True)
     
     if columns:
-        norm_cols = [c.lower().replace(" ", "_").replace("-", "_") for c in columns]
-        norm_cols = [RENAME_MAP.get(c, c) for c in norm_cols]
+        norm_cols = [_normalize_column_name(c) for c in columns]
         search_cols = [c for c in norm_cols if c in df.columns]
     else:
-        # Default search columns in Golden Schema
-        search_cols = ["headline", "company", "match_reason", "current_role_mention", "full_name"]
-        search_cols = [c for c in search_cols if c in df.columns]
+        search_cols = [c for c in SEARCH_COLUMNS if c in df.columns]
+    search_cols += [c for c in query["weights"] if c in df.columns and c not in search_cols]
     
-    mask = pd.Series([False] * len(df))
-    for col in search_cols:
-        mask |= df[col].astype(str).str.contains(search_term, case=case_sensitive, na=False, regex=False)
-        
-    result_df = df[mask]
+    # The index narrows the candidates; the substring checks below still
+    # decide, so every path returns exactly the same rows
+    positive = query["must"] + query["should"] or [None]
+    rows, search_path = None, "scan"
+    indexable = TOKEN_INDEX_ENABLED and logged is None and search_cols and set(search_cols) <= set(SEARCH_COLUMNS)
+    if indexable and None not in positive:
+        index = load_token_index(
+            path, df, SEARCH_COLUMNS, _file_signature(path), persist=not READ_ONLY_QUERIES
+        )
+        rows, search_path = index.lookup_any(search_cols, positive)
+        if rows is not None and len(df) > 10_000 and len(rows) > len(df) // 2:
+            # Too unselective to be worth gathering; scanning is cheaper
+            rows, search_path = None, "scan"
+    total_rows = len(df)
+    averages = None
+    if rows is not None:
+        if query["ranked"]:
+            # BM25 normalizes against whole-column lengths, so take them from
+            # the loaded frame before it narrows to the candidates
+            averages = {
+                col: _search_text(path, df, col, None, case_sensitive).str.len().fillna(0).mean()
+                for col in search_cols
+            }
+        df = df.iloc[rows]
+    logger.info(f"search_profiles on {path} via {search_path} ({len(df)} candidate rows)")
     
-    # Sort by score
-    result_df["match_score"] = pd.to_numeric(result_df["match_score"], errors='coerce')
-    result_df = result_df.sort_values(by="match_score", ascending=False)
-        
-    if limit:
-        result_df = result_df.head(limit)
+    # Logged rows are in neither the token index nor the folded columns
+    cache = path if logged is None else None
+    texts = {col: _search_text(cache, df, col, rows, case_sensitive) for col in search_cols}
+    if query["ranked"]:
+        result_df = rank_search_matches(df, texts, query, case_sensitive, total_rows, averages)
+        results = _to_records(result_df.head(limit) if limit else result_df)
+    else:
+        mask = pd.Series(False, index=df.index)
+        for text in texts.values():
+            mask |= _term_counts(text, search_term, case_sensitive, count=False)
+        # Best scores first
+        results = _to_records(_top_k(df[mask], limit))
+    if explain:
+        return {
+            "search_path": search_path,
+            "folded_bytes": _FRAME_CACHE.folded_bytes(path),
+            "results": results
+        }
+    return results
+
+def _search_query(
+    search_term: Optional[str],
+    must: Optional[List[str]],
+    should: Optional[List[str]],
+    must_not: Optional[List[str]],
+    column_weights: Optional[Dict[str, float]]
+) -> Dict[str, Any]:
+    """
+    Validated search terms: {"must", "should", "must_not", "weights", "ranked"}.
+    """
+    ranked = bool(must or should or must_not or column_weights)
+    query = {
+        "must": ([search_term] if search_term else []) + list(must or []),
+        "should": list(should or []),
+        "must_not": list(must_not or []),
+        "weights": {_normalize_column_name(c): float(w) for c, w in (column_weights or {}).items()},
+        "ranked": ranked
+    }
+    if not ranked and not search_term:
+        raise ValueError("search_profiles needs a search_term or must/should/must_not terms")
+    if any(not isinstance(t, str) or not t for t in query["must"] + query["should"] + query["must_not"]):
+        raise ValueError("Search terms must be non-empty strings")
+    return query
+
+def _search_text(
+    path: Optional[Path],
+    df: Optional[pd.DataFrame],
+    column: str,
+    rows: Optional[np.ndarray],
+    case_sensitive: bool
+) -> pd.Series:
+    """
+    Text of a searched column (casefolded unless case_sensitive) for the
+    candidate `rows`, or for the whole cached frame when `df` is None.
+    Case-insensitive text comes from the frame cache when available
+    (never when `path` is None).
+    """
+    folded = None
+    if FOLDED_SEARCH and not case_sensitive and path is not None:
+        folded = _FRAME_CACHE.folded(path, column)
+    if folded is None:
+        if df is None:
+            df = load_profiles(path, columns=[column])
+        text = _cell_text(df[column])
+        return text if case_sensitive else text.str.casefold()
+    if df is None or rows is None:
+        return folded if df is None else folded.set_axis(df.index)
+    return folded.iloc[rows].set_axis(df.index)
+
+def _term_counts(text: pd.Series, term: str, case_sensitive: bool, count: bool = True) -> pd.Series:
+    """
+    Occurrences of a literal term in prepared search text (or, with
+    count=False, whether it occurs at all).
+    """
+    if not case_sensitive:
+        term = term.casefold()
+    if not count:
+        return text.str.contains(term, na=False, regex=False)
+    return text.str.count(re.escape(term)).fillna(0)
+
+def rank_search_matches(
+    df: pd.DataFrame,
+    texts: Dict[str, pd.Series],
+    query: Dict[str, Any],
+    case_sensitive: bool,
+    total_rows: int,
+    average_lengths: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Apply must/should/must_not to candidate rows and rank the matches by
+    a BM25F-style score: per term, column weights scale the saturated term
+    frequency (cell length normalized against the column's average), and
+    the sum is weighted by the term's idf over `total_rows`. Ties fall back
+    to match_score, then row order. Adds a "relevance" column.
+    `df` must hold every row matching any positive term, so document
+    frequencies are exact; `average_lengths` defaults to the candidates'.
+    """
+    lengths = {col: text.str.len().fillna(0).to_numpy(dtype=float) for col, text in texts.items()}
+    averages = average_lengths or {col: lengths[col].mean() if len(df) else 0.0 for col in texts}
+    
+    def occurrences(term):
+        return {col: _term_counts(text, term, case_sensitive).to_numpy(dtype=float) for col, text in texts.items()}
+    
+    def present(counts):
+        found = np.zeros(len(df), dtype=bool)
+        for tf in counts.values():
+            found |= tf > 0
+        return found
+    
+    keep = np.ones(len(df), dtype=bool)
+    relevance = np.zeros(len(df))
+    any_should = np.zeros(len(df), dtype=bool)
+    for kind in ("must", "should"):
+        for term in query[kind]:
+            counts = occurrences(term)
+            found = present(counts)
+            if kind == "must":
+                keep &= found
+            else:
+                any_should |= found
+            doc_freq = int(found.sum())
+            idf = np.log(1 + (total_rows - doc_freq + 0.5) / (doc_freq + 0.5))
+            for col, tf in counts.items():
+                weight = query["weights"].get(col, 1.0)
+                average = averages[col] if averages[col] > 0 else 1.0
+                norm = 1 - BM25_B + BM25_B * lengths[col] / average
+                relevance += idf * weight * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+    if query["should"] and not query["must"]:
+        keep &= any_should
+    for term in query["must_not"]:
+        keep &= ~present(occurrences(term))
+    
+    ranked = df.assign(relevance=relevance.round(4))[keep]
+    return ranked.sort_values(
+        by=["relevance", "match_score"], ascending=[False, False], na_position="last"
+    )
+
+# Files larger than this are deduplicated in chunks (LINKEDIN_CSV_STREAMING_MB)
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("LINKEDIN_CSV_STREAMING_MB", "256")) * 1024 * 1024
+STREAMING_CHUNKSIZE = 100_000
+# Streaming dedupe keeps up to this many keys in memory before spilling
+# the key set to a temporary on-disk SQLite table (LINKEDIN_CSV_KEY_SPILL)
+KEY_SPILL_THRESHOLD = int(os.environ.get("LINKEDIN_CSV_KEY_SPILL", "2000000"))
+
+def _stream_deduplicate(path: Path, columns: List[str], keep: str, chunksize: int) -> tuple:
+    """
+    Deduplicate a CSV chunk by chunk, writing survivors to a temp file
+    that atomically replaces the original. keep="last" takes two passes.
+    Values are copied as text, so untouched cells are written unchanged.
+    A fresh Parquet shadow is carried over by dropping the same rows.
+    Returns (original_count, final_count, surviving keys or None if spilled).
+    """
+    def chunks():
+        return _iter_chunks(path, chunksize, dtype=str, keep_default_na=False)
+
+    before = _file_signature(path)
+    shadowed = shadow_is_fresh(path, before)
+    kept_rows = []
+    store = SpillableKeyStore(KEY_SPILL_THRESHOLD)
+    try:
+        if keep == "last":
+            for chunk in chunks():
+                store.set_last(_composite_keys(chunk, columns), chunk.index.to_series())
         
-    return result_df.fillna("").to_dict(orient="records")
+        _FRAME_CACHE.invalidate(path)
+        fd, temp_path = tempfile.mkstemp(suffix=".csv", dir=path.parent)
+        original_count = final_count = 0
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as out:
+                for i, chunk in enumerate(chunks()):
+                    for column in columns:
+                        chunk[column] = _strip_text(chunk[column])
+                    keys = _composite_keys(chunk, columns)
+                    positions = chunk.index.to_series()
+                    if keep == "last":
+                        survivors = store.is_last(keys, positions)
+                    else:
+                        survivors = store.add_first(keys, positions)
+                    chunk[survivors].to_csv(out, index=False, header=(i == 0))
+                    if shadowed:
+                        kept_rows.append(survivors.to_numpy(dtype=bool))
+                    original_count += len(chunk)
+                    final_count += int(survivors.sum())
+                if original_count == 0:
+                    # Header-only file: keep the (normalized) header
+                    normalize_dataframe(pd.DataFrame(columns=_read_header(path) or [])).to_csv(out, index=False)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if shadowed:
+            keep = np.concatenate(kept_rows) if kept_rows else np.zeros(0, dtype=bool)
+            filter_shadow(path, before, _file_signature(path), keep, strip=columns)
+        return original_count, final_count, store.keys()
+    finally:
+        store.close()
 
-async def deduplicate_csv(
+@offloaded(writes=("csv_path",))
+def deduplicate_csv(
     csv_path: str,
     dedupe_column: str = "linkedin_url",
-    keep: str = "first"
+    keep: str = "first",
+    chunksize: Optional[int] = None,
+    dedupe_columns: Optional[List[str]] = None,
+    fuzzy: bool = False,
+    similarity: float = DEFAULT_SIMILARITY
 ) -> Dict[str, Any]:
     """
     Remove duplicates from CSV file using standardized columns.
+    `dedupe_columns` makes a composite key: rows are duplicates when every
+    listed column matches. With `fuzzy`, rows whose companies normalize
+    alike and whose full names are at least `similarity` similar are
+    duplicates too (see fuzzy_keys); fuzzy runs always load the file.
+    Large files (or any file when `chunksize` is given) are processed in
+    chunks with bounded memory.
     """
+    _check_keep(keep)
     path = Path(csv_path).absolute()
     if not path.exists():
         return {"error": "File not found"}
+    _compact_log(path)
+    
+    columns = [_normalize_column_name(c) for c in dedupe_columns or [dedupe_column]]
+    # Appends check a single column, so only single-column keys are indexed
+    indexed = columns[0] if len(columns) == 1 else None
+    header = [_normalize_column_name(c) for c in _read_header(path) or []]
+    streaming = chunksize or path.stat().st_size > STREAMING_THRESHOLD_BYTES
+    if set(columns) <= set(header) and streaming and not fuzzy:
+        original_count, final_count, keys = _stream_deduplicate(
+            path, columns, keep, chunksize or STREAMING_CHUNKSIZE
+        )
+        if keys is not None and indexed:
+            _index_keys(path, indexed, pd.Series(list(keys), dtype=object), final_count)
+        aggregates = scan_stats(_profile_chunks(path, chunksize or STREAMING_CHUNKSIZE, STATS_COLUMNS))
+        write_stats(path, aggregates, _file_signature(path))
+        return {
+            "original_count": int(original_count),
+            "duplicates_removed": int(original_count - final_count),
+            "final_count": int(final_count),
+            "path": str(path)
+        }
         
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     df = normalize_dataframe(df)
     original_count = len(df)
     
-    norm_dedupe = dedupe_column.lower().replace(" ", "_").replace("-", "_")
-    norm_dedupe = RENAME_MAP.get(norm_dedupe, norm_dedupe)
-    
-    if norm_dedupe in df.columns:
-        df[norm_dedupe] = df[norm_dedupe].astype(str).str.strip()
-        df = df.drop_duplicates(subset=[norm_dedupe], keep=keep)
+    keyed = set(columns) <= set(df.columns)
+    if keyed:
+        for column in columns:
+            df[column] = _strip_text(df[column])
+        keys = _composite_keys(df, columns)
+        if fuzzy:
+            duplicates = fuzzy_duplicated(keys, df["full_name"], df["company"], similarity, keep)
+        else:
+            duplicates = duplicated_keys(keys, keep=keep)
+        df, keys = df[~duplicates], keys[~duplicates]
         
     final_count = len(df)
     safe_to_csv(df, path)
+    if keyed and indexed:
+        # Survivors hold one row per key, fuzzy or not
+        _index_keys(path, indexed, keys, final_count)
+    aggregates = stats_aggregates(read_profiles(path, columns=STATS_COLUMNS))
+    write_stats(path, aggregates, _file_signature(path))
     
     return {
         "original_count": int(original_count),
@@ -0,0 +1,172 @@
+# Fuzzy duplicate detection for profiles that share no exact key, such as
+# "Jon Smith" and "John Smith" at "Acme Inc." and "ACME". Rows are split
+# into blocks by normalized company plus the initials of the first and
+# last name, and names are only compared within a block, so the work
+# follows the block sizes instead of growing with all pairs of rows.
+# Names and companies are normalized column-wide, candidate pairs are
+# pruned with vectorized length and character-count bounds, and difflib's
+# ratio runs only on the distinct-name pairs that survive.
+import difflib
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIMILARITY = 0.9
+# Blocks with more distinct names than this (a very common surname at a
+# large company) only compare each name with its WINDOW sorted neighbours
+MAX_BLOCK = 200
+WINDOW = 20
+
+_ACCENTS = r"[̀-ͯ]"
+_NON_ASCII = r"[^\x00-\x7f]"
+_PUNCTUATION = r"[!-/:-@\[-`{-~‘’“”]+"
+_SPACES = r"\s+"
+_NAME_SUFFIXES = r"(?: (?:jr|sr|ii|iii|iv|phd|mba|md|cpa))+$"
+_COMPANY_SUFFIXES = r"(?: (?:inc|llc|ltd|limited|gmbh|corp|corporation|co|company|plc|sa|ag|bv))+$"
+# First letter of the first word and of the last word
+_INITIALS = r"^(\S)\S*(?:.*\s(\S)\S*)?$"
+
+def _normalize(series: pd.Series, suffixes: str) -> pd.Series:
+    """
+    Accent-free, lowercased words with punctuation and trailing `suffixes`
+    removed; missing values become "".
+    """
+    # Each distinct value is normalized once
+    codes, uniques = pd.factorize(series.fillna("").astype(str))
+    text = pd.Series(uniques, dtype="str")
+    # Decomposing is a per-row Python call, so only non-ASCII rows pay it
+    foreign = text.str.contains(_NON_ASCII, regex=True)
+    if foreign.any():
+        text = text.where(~foreign, text[foreign].str.normalize("NFKD").str.replace(_ACCENTS, "", regex=True))
+    text = text.str.lower().str.replace(_PUNCTUATION, " ", regex=True)
+    text = text.str.replace(_SPACES, " ", regex=True).str.strip()
+    text = text.str.replace(suffixes, "", regex=True)
+    return pd.Series(text.array.take(codes), index=series.index, name=series.name)
+
+def normalize_names(series: pd.Series) -> pd.Series:
+    return _normalize(series, _NAME_SUFFIXES)
+
+def normalize_companies(series: pd.Series) -> pd.Series:
+    return _normalize(series, _COMPANY_SUFFIXES)
+
+# Character-count bins for the vectorized upper bound on a pair's ratio
+_BINS = 32
+# Candidate pairs bounded at once, capping the (pairs x bins) temporaries
+_PAIR_BATCH = 250_000
+
+def _candidate_pairs(block: np.ndarray) -> tuple:
+    """
+    Index pairs (i, j), i < j, of entries in the same block. A block's
+    entries are adjacent and sorted by name; each is paired with every
+    later entry of its block, or with the next WINDOW of them in blocks
+    larger than MAX_BLOCK.
+    """
+    starts = np.flatnonzero(np.r_[True, block[1:] != block[:-1]])
+    sizes = np.diff(np.r_[starts, len(block)])
+    end = np.repeat(starts + sizes, sizes)
+    position = np.arange(len(block))
+    counts = end - position - 1
+    counts = np.where(np.repeat(sizes > MAX_BLOCK, sizes), np.minimum(counts, WINDOW), counts)
+    left = np.repeat(position, counts)
+    right = np.arange(len(left)) - np.repeat(np.cumsum(counts) - counts, counts) + left + 1
+    return left, right
+
+def _char_bins(names: List[str]) -> tuple:
+    """Length and binned character counts of each name."""
+    lengths = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+    codes = np.frombuffer("".join(names).encode("utf-32-le"), dtype=np.uint32)
+    owner = np.repeat(np.arange(len(names)), lengths)
+    bins = np.bincount(owner * _BINS + codes % _BINS, minlength=len(names) * _BINS)
+    return lengths, bins.reshape(len(names), _BINS).astype(np.int32)
+
+def _similar_pairs(names: List[str], block: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Rows (i, j) of entry pairs in the same block whose names are at least `threshold`
+    similar. Lengths and binned character counts bound difflib's ratio
+    from above for every candidate pair at once; only pairs passing both
+    bounds are compared with SequenceMatcher.
+    """
+    left, right = _candidate_pairs(block)
+    lengths, bins = _char_bins(names)
+    total = lengths[left] + lengths[right]
+    keep = 2 * np.minimum(lengths[left], lengths[right]) >= threshold * total
+    for i in range(0, len(left), _PAIR_BATCH):
+        part = slice(i, i + _PAIR_BATCH)
+        todo = np.flatnonzero(keep[part]) + i
+        common = np.minimum(bins[left[todo]], bins[right[todo]]).sum(axis=1)
+        keep[todo] = 2 * common >= threshold * total[todo]
+
+    similar = []
+    # ratio() is 2*matches/(len(a)+len(b)); seq2 is indexed once per name
+    matcher = difflib.SequenceMatcher(None, autojunk=False)
+    current = -1
+    for i, j in zip(left[keep].tolist(), right[keep].tolist()):
+        if i != current:
+            matcher.set_seq2(names[i])
+            current = i
+        matcher.set_seq1(names[j])
+        if matcher.ratio() >= threshold:
+            similar.append((i, j))
+    return np.array(similar, dtype=np.int64).reshape(-1, 2)
+
+def _components(count: int, edges: np.ndarray) -> np.ndarray:
+    """
+    Smallest member of each node's connected component, by hooking edge
+    ends onto the smaller label and pointer jumping until nothing moves.
+    """
+    labels = np.arange(count)
+    while len(edges):
+        low = np.minimum(labels[edges[:, 0]], labels[edges[:, 1]])
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[edges[:, 0]], low)
+        np.minimum.at(hooked, labels[edges[:, 1]], low)
+        hooked = hooked[hooked]
+        while not np.array_equal(hooked, hooked[hooked]):
+            hooked = hooked[hooked]
+        if np.array_equal(hooked, labels):
+            break
+        labels = hooked
+    return labels
+
+def fuzzy_duplicated(
+    keys: pd.Series,
+    names: pd.Series,
+    companies: pd.Series,
+    threshold: float = DEFAULT_SIMILARITY,
+    keep: str = "first"
+) -> pd.Series:
+    """
+    Like keys.duplicated(keep=keep), but rows also count as duplicates
+    when their companies normalize to the same text and their names are
+    at least `threshold` similar. Matches are transitive. Rows missing a
+    name or company only match on `keys`.
+    """
+    groups, uniques = pd.factorize(keys.reset_index(drop=True))
+    name_norm = normalize_names(names).reset_index(drop=True)
+    company_norm = normalize_companies(companies).reset_index(drop=True)
+    valid = ((name_norm != "") & (company_norm != "")).to_numpy()
+    rows = np.flatnonzero(valid)
+    block = company_norm[valid] + "\x1f" + name_norm[valid].str.replace(_INITIALS, r"\1\2", regex=True)
+    block_of_row = np.full(len(keys), -1, dtype=np.int64)
+    block_of_row[rows] = pd.factorize(block)[0]
+
+    # One entry per distinct (block, name); rows sharing an entry are
+    # exact name matches and join the entry's first row
+    entry, entry_keys = pd.factorize(block + "\x1f" + name_norm[valid])
+    first_row = np.full(entry.max() + 1 if len(entry) else 0, -1, dtype=np.int64)
+    first_row[entry[::-1]] = rows[::-1]
+    edges = [np.stack([groups[rows], groups[first_row[entry]]], axis=1)]
+
+    # Compare distinct names within each block; sorting the entry keys
+    # orders entries by block, then by name
+    order = pd.Series(entry_keys).argsort().to_numpy()
+    first_row = first_row[order]
+    entry_names = name_norm.iloc[first_row].tolist()
+    pairs = _similar_pairs(entry_names, block_of_row[first_row], threshold)
+    edges.append(groups[first_row[pairs]])
+
+    # Merge the exact-key groups joined by any edge
+    edges = np.concatenate(edges)
+    roots = _components(len(uniques), edges[edges[:, 0] != edges[:, 1]])
+    return pd.Series(pd.Series(roots[groups]).duplicated(keep=keep).to_numpy(), index=keys.index)
@@ -0,0 +1,142 @@
+# Sidecar dedupe-key index: "<csv>.keys" holds one JSON-encoded key per line
+# behind a fixed-width header recording which column it indexes, the key
+# format and the CSV size/mtime it was built for, so the header can be
+# updated in place after an incremental append. Keys are handled as their
+# sidecar lines (see keyset).
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from .keyset import HashedKeySet, ExactKeySet
+from .url_keys import KEY_FORMAT
+
+logger = logging.getLogger(__name__)
+
+KEY_INDEX_SUFFIX = ".keys"
+KEY_INDEX_HEADER_BYTES = 256
+# Loaded indexes keep 64-bit key hashes (confirmed against the sidecar on a
+# hit) rather than every key string; LINKEDIN_CSV_COMPACT_KEYS=0 keeps strings
+COMPACT_KEYS = os.environ.get("LINKEDIN_CSV_COMPACT_KEYS", "1") == "1"
+
+# In-process copies of loaded key indexes, keyed by absolute CSV path
+_KEY_INDEXES: Dict[str, Dict[str, Any]] = {}
+
+def key_index_path(path: Path) -> Path:
+    return path.with_name(path.name + KEY_INDEX_SUFFIX)
+
+def _key_index_header(column: str, rows: int, signature: Dict[str, int]) -> bytes:
+    header = json.dumps({"column": column, "format": KEY_FORMAT, "rows": rows, **signature}).encode("utf-8")
+    if len(header) >= KEY_INDEX_HEADER_BYTES:
+        raise ValueError(f"Key index header too long for column {column!r}")
+    return header.ljust(KEY_INDEX_HEADER_BYTES - 1) + b"\n"
+
+def _encode_keys(lines: List[bytes]) -> bytes:
+    return b"\n".join(lines) + b"\n" if lines else b""
+
+def _split_key_lines(body: bytes) -> List[bytes]:
+    lines = body.split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+def read_key_lines(path: Path) -> List[bytes]:
+    """
+    Encoded keys stored in the key index sidecar, in file order.
+    """
+    with open(key_index_path(path), "rb") as f:
+        f.seek(KEY_INDEX_HEADER_BYTES)
+        return _split_key_lines(f.read())
+
+def _new_key_set(index_path: Path):
+    return (HashedKeySet if COMPACT_KEYS else ExactKeySet)(index_path)
+
+def write_key_index(
+    path: Path,
+    column: str,
+    lines: List[bytes],
+    rows: int,
+    signature: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    Rewrite the key index of a CSV just written in full (now at
+    `signature`) from its distinct keys' sidecar lines. Returns the
+    loaded index.
+    """
+    index_path = key_index_path(path)
+    fd, temp_path = tempfile.mkstemp(suffix=KEY_INDEX_SUFFIX, dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_key_index_header(column, rows, signature))
+            f.write(_encode_keys(lines))
+        os.replace(temp_path, index_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    key_set = _new_key_set(index_path)
+    key_set.add(lines, KEY_INDEX_HEADER_BYTES)
+    index = _KEY_INDEXES[str(path)] = {"column": column, "rows": rows, "keys": key_set, **signature}
+    return index
+
+def read_key_index(
+    path: Path,
+    column: str,
+    signature: Dict[str, int],
+    header_only: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Load the sidecar if it indexes `column` and matches the CSV's current
+    `signature`. With `header_only` (and no loaded copy), only the row
+    count is read.
+    """
+    cached = _KEY_INDEXES.get(str(path))
+    if cached and cached["column"] == column and all(cached[k] == v for k, v in signature.items()):
+        return cached
+
+    index_path = key_index_path(path)
+    if not index_path.exists():
+        return None
+    try:
+        with open(index_path, "rb") as f:
+            meta = json.loads(f.read(KEY_INDEX_HEADER_BYTES))
+            if meta.get("column") != column or meta.get("format") != KEY_FORMAT:
+                return None
+            if any(meta.get(k) != v for k, v in signature.items()):
+                return None
+            if header_only:
+                return {"column": column, "rows": meta["rows"], **signature}
+            lines = _split_key_lines(f.read())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable key index {index_path}: {e}")
+        return None
+
+    keys = _new_key_set(index_path)
+    keys.add(lines, KEY_INDEX_HEADER_BYTES)
+    index = {"column": column, "rows": meta["rows"], "keys": keys, **signature}
+    _KEY_INDEXES[str(path)] = index
+    return index
+
+def extend_key_index(path: Path, index: Dict[str, Any], lines: List[bytes], signature: Dict[str, int]):
+    """
+    Record keys (as encoded sidecar lines) of rows just appended to the
+    CSV, which is now at `signature`. The header is rewritten last so a
+    crash in between leaves the sidecar detectably stale.
+    """
+    index_path = key_index_path(path)
+    rows = index["rows"] + len(lines)
+    try:
+        with open(index_path, "r+b") as f:
+            start = f.seek(0, os.SEEK_END)
+            f.write(_encode_keys(lines))
+            f.seek(0)
+            f.write(_key_index_header(index["column"], rows, signature))
+    except FileNotFoundError:
+        # Sidecar was removed behind our back; rebuild on next use
+        _KEY_INDEXES.pop(str(path), None)
+        return
+    if "keys" in index:
+        index["keys"].add(lines, start)
+    index.update(rows=rows, **signature)
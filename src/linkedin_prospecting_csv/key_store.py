@@ -0,0 +1,86 @@
+# Key -> row position store for streaming deduplication. Keys live in a
+# dict until there are too many of them, then in a temporary on-disk SQLite
+# table, so memory stays bounded on files whose key set doesn't fit in RAM.
+import os
+import sqlite3
+import tempfile
+from typing import List, Dict, Optional
+
+import pandas as pd
+
+class SpillableKeyStore:
+    """
+    Map of dedupe key -> row position that lives in a dict until it grows
+    past `spill_threshold` keys, then moves to a temporary SQLite table.
+    """
+    _BATCH = 500  # SQLite host-parameter batch size
+
+    def __init__(self, spill_threshold: int):
+        self.spill_threshold = spill_threshold
+        self._memory: Optional[Dict[str, int]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._tempdir: Optional[tempfile.TemporaryDirectory] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._db is not None
+
+    def keys(self) -> Optional[set]:
+        """All keys, or None once spilled to disk."""
+        return None if self.spilled else set(self._memory)
+
+    def _maybe_spill(self):
+        if self.spilled or len(self._memory) <= self.spill_threshold:
+            return
+        self._tempdir = tempfile.TemporaryDirectory(prefix="csv-dedupe-")
+        self._db = sqlite3.connect(os.path.join(self._tempdir.name, "keys.db"))
+        self._db.execute("CREATE TABLE keys (key TEXT PRIMARY KEY, pos INTEGER)")
+        self._db.executemany("INSERT INTO keys VALUES (?, ?)", self._memory.items())
+        self._memory = None
+
+    def _lookup(self, keys: List[str]) -> Dict[str, int]:
+        if not self.spilled:
+            return {k: self._memory[k] for k in keys if k in self._memory}
+        found = {}
+        for i in range(0, len(keys), self._BATCH):
+            batch = keys[i:i + self._BATCH]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._db.execute(f"SELECT key, pos FROM keys WHERE key IN ({placeholders})", batch))
+        return found
+
+    def add_first(self, keys: pd.Series, positions: pd.Series) -> pd.Series:
+        """
+        Record first occurrences. Returns a mask of rows whose key had not
+        been seen before (in earlier chunks or earlier in this one).
+        """
+        first_in_chunk = ~keys.duplicated(keep='first')
+        candidates = keys[first_in_chunk]
+        known = self._lookup(candidates.unique().tolist())
+        is_new = first_in_chunk & ~keys.isin(list(known))
+        new_items = zip(keys[is_new], positions[is_new])
+        if self.spilled:
+            self._db.executemany("INSERT INTO keys VALUES (?, ?)", new_items)
+        else:
+            self._memory.update(new_items)
+            self._maybe_spill()
+        return is_new
+
+    def set_last(self, keys: pd.Series, positions: pd.Series):
+        """Record the latest position seen for each key."""
+        last_in_chunk = ~keys.duplicated(keep='last')
+        items = zip(keys[last_in_chunk], positions[last_in_chunk])
+        if self.spilled:
+            self._db.executemany("INSERT OR REPLACE INTO keys VALUES (?, ?)", items)
+        else:
+            self._memory.update(items)
+            self._maybe_spill()
+
+    def is_last(self, keys: pd.Series, positions: pd.Series) -> pd.Series:
+        """Mask of rows sitting at the last recorded position of their key."""
+        last = self._lookup(keys.unique().tolist())
+        return keys.map(last) == positions
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._tempdir.cleanup()
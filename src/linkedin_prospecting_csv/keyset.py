@@ -0,0 +1,146 @@
+# Dedupe-key sets for the "<csv>.keys" sidecar. Keys are handled as their
+# sidecar lines (JSON-encoded, without the newline). The compact set keeps
+# only a sorted array of 64-bit line hashes plus each line's byte offset in
+# the sidecar, about 16 bytes per key instead of a Python string in a set;
+# a hash hit is confirmed against the line itself before a row counts as a
+# duplicate. Hashes come from Python's built-in hash, so they are only
+# meaningful inside one process and are never written to disk.
+import json
+import mmap
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# Rows hashed per slice, bounding the temporary Python strings
+HASH_BATCH = 100_000
+
+# Printable ASCII other than '"' and '\' encodes to JSON as-is
+_JSON_PLAIN = r'[ !#-\[\]-~]*'
+
+def encode_key_lines(keys: pd.Series) -> List[bytes]:
+    """
+    Sidecar line for each key (JSON string, no trailing newline). Plain
+    ASCII keys, the common case for URLs, skip json.dumps.
+    """
+    keys = keys.astype(str)
+    plain = keys.str.fullmatch(_JSON_PLAIN).to_numpy(dtype=bool)
+    lines = np.empty(len(keys), dtype=object)
+    lines[plain] = ('"' + keys[plain] + '"').tolist()
+    lines[~plain] = [json.dumps(k) for k in keys[~plain].tolist()]
+    return [line.encode("utf-8") for line in lines]
+
+def key_hashes(values) -> np.ndarray:
+    """
+    64-bit hash of each value (str or bytes), computed in bounded slices.
+    """
+    batches = (values[i:i + HASH_BATCH] for i in range(0, len(values), HASH_BATCH))
+    parts = [
+        np.fromiter(map(hash, batch.tolist() if isinstance(batch, pd.Series) else batch), dtype=np.int64)
+        for batch in batches
+    ]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+def duplicated_keys(keys: pd.Series, keep: str = "first") -> pd.Series:
+    """
+    Same result as keys.duplicated(keep=keep), found on 64-bit hashes.
+    Every row flagged as a repeat is compared with the row it repeats; a
+    hash collision falls back to comparing the strings themselves.
+    """
+    hashes = key_hashes(keys)
+    flagged = pd.Series(hashes).duplicated(keep=keep).to_numpy()
+    if flagged.any():
+        # Unflagged rows are the ones kept, one per distinct hash
+        kept = np.flatnonzero(~flagged)
+        repeats = kept[pd.Index(hashes[kept]).get_indexer(hashes[flagged])]
+        repeated = keys.iloc[np.flatnonzero(flagged)].reset_index(drop=True)
+        if not repeated.equals(keys.iloc[repeats].reset_index(drop=True)):
+            return keys.duplicated(keep=keep)
+    return pd.Series(flagged, index=keys.index)
+
+class HashedKeySet:
+    """
+    Compact set of sidecar lines: sorted hashes and the byte offset of
+    each line in the sidecar file at `path`, which confirms hash hits.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.hashes = np.zeros(0, dtype=np.int64)
+        self.offsets = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.hashes.nbytes + self.offsets.nbytes
+
+    def add(self, lines: List[bytes], start: int):
+        """
+        Record lines just written to the sidecar, the first at byte `start`
+        and each followed by a newline.
+        """
+        if not lines:
+            return
+        hashes = key_hashes(lines)
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines)) + 1
+        offsets = start + np.cumsum(lengths) - lengths
+        order = np.argsort(hashes, kind="stable")
+        hashes, offsets = hashes[order], offsets[order]
+        at = np.searchsorted(self.hashes, hashes)
+        self.hashes = np.insert(self.hashes, at, hashes)
+        self.offsets = np.insert(self.offsets, at, offsets)
+
+    def contains(self, lines: List[bytes]) -> np.ndarray:
+        """
+        Mask of lines present in the set.
+        """
+        found = np.zeros(len(lines), dtype=bool)
+        if not lines or not len(self):
+            return found
+        hashes = key_hashes(lines)
+        lo = np.searchsorted(self.hashes, hashes, side="left")
+        hi = np.searchsorted(self.hashes, hashes, side="right")
+        hits = np.flatnonzero(hi > lo)
+        if len(hits):
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as sidecar:
+                for i in hits:
+                    line = lines[i]
+                    found[i] = any(
+                        sidecar[off:off + len(line)] == line for off in self.offsets[lo[i]:hi[i]]
+                    )
+        return found
+
+    def __iter__(self):
+        """The keys themselves, decoded from the sidecar in file order."""
+        data = self.path.read_bytes()
+        for off in np.sort(self.offsets):
+            yield json.loads(data[off:data.index(b"\n", off)])
+
+class ExactKeySet:
+    """
+    Plain set of sidecar lines, for LINKEDIN_CSV_COMPACT_KEYS=0.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lines = set()
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.lines) + sum(map(sys.getsizeof, self.lines))
+
+    def add(self, lines: List[bytes], start: int):
+        self.lines.update(lines)
+
+    def contains(self, lines: List[bytes]) -> np.ndarray:
+        return np.fromiter((line in self.lines for line in lines), dtype=bool, count=len(lines))
+
+    def __iter__(self):
+        return (json.loads(line) for line in self.lines)
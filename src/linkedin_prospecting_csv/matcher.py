@@ -0,0 +1,115 @@
+import pandas as pd
+import numpy as np
+from collections import deque
+from typing import List, Dict
+import functools
+import re
+
+# Multi-value filters (filter_profiles locations/companies) match values as
+# literal substrings with one escaped alternation. On pyarrow-backed strings
+# that runs on RE2, which compiles the alternation into an automaton; with
+# plain Python strings, lists of at least this many values use the
+# Aho-Corasick automaton below instead of a backtracking regex. Either way
+# the cost follows the text length, not the number of values.
+AHO_CORASICK_MIN_VALUES = 32
+
+class AhoCorasick:
+    """
+    Automaton over literal patterns answering "does any pattern occur in
+    this text" in one left-to-right pass.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[bool] = [False]
+        for pattern in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(False)
+                node = nxt
+            self.out[node] = True
+
+        # Breadth-first, so every fail target is finished before it's used
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] or self.out[self.fail[nxt]]
+
+    def contains(self, text: str) -> bool:
+        goto, fail, out = self.goto, self.fail, self.out
+        if out[0]:
+            return True
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                return True
+        return False
+
+class LiteralMatcher:
+    """
+    Tests a column for any of a fixed set of literal values, casefolded
+    unless case_sensitive. Each distinct cell text is tested once.
+    """
+
+    def __init__(self, values: tuple, case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        self.literals = sorted({str(v) if case_sensitive else str(v).casefold() for v in values})
+        # Longest first, so a value is never shadowed by its own prefix
+        self.pattern = "|".join(re.escape(v) for v in sorted(self.literals, key=len, reverse=True))
+        self._automaton = None
+
+    @property
+    def automaton(self) -> AhoCorasick:
+        if self._automaton is None:
+            self._automaton = AhoCorasick(self.literals)
+        return self._automaton
+
+    def contains(self, series: pd.Series) -> np.ndarray:
+        """
+        Boolean mask of cells containing any value; missing cells never match.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        texts = pd.Series(uniques, dtype=object).astype("str")
+        if not self.case_sensitive:
+            texts = texts.str.casefold()
+
+        if getattr(texts.dtype, "storage", None) != "pyarrow" and len(self.literals) >= AHO_CORASICK_MIN_VALUES:
+            search = self.automaton.contains
+            hits = np.fromiter((search(t) for t in texts), dtype=bool, count=len(texts))
+        else:
+            hits = texts.str.contains(self.pattern, na=False).to_numpy(dtype=bool)
+        # Code -1 (missing) picks the trailing False
+        return np.append(hits, False)[codes]
+
+@functools.lru_cache(maxsize=128)
+def compile_matcher(values: tuple, case_sensitive: bool = False) -> LiteralMatcher:
+    """
+    Matcher for a distinct filter list, built once and reused across calls.
+    """
+    return LiteralMatcher(values, case_sensitive)
+
+def matches_any(series: pd.Series, values: List[str], case_sensitive: bool = False) -> np.ndarray:
+    """
+    Mask of cells in `series` containing any of `values` as a literal substring.
+    """
+    return compile_matcher(tuple(values), case_sensitive).contains(series)
@@ -0,0 +1,170 @@
+# Columnar shadow copy: "<csv>.parquet" mirrors the CSV for read-heavy tools.
+# Its schema metadata records the CSV size/mtime it was written for, so a
+# shadow is only read while the CSV is unchanged. A shadow is first written
+# when a query tool parses the file, then refreshed by every rewrite of it
+# (a streamed dedupe filters the old shadow rather than loading the CSV).
+# Requires pyarrow and can be turned off with LINKEDIN_CSV_SHADOW=0.
+import functools
+import importlib.util
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .schema import DATE_COLUMNS, PARSED_DATE_COLUMNS, normalize_dataframe, apply_schema_dtypes, select_columns
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = ".parquet"
+SHADOW_META_KEY = b"linkedin_csv_signature"
+# Bumped whenever the shadow's columns change, so older shadows are ignored
+SHADOW_FORMAT = 2
+SHADOW_ENABLED = os.environ.get("LINKEDIN_CSV_SHADOW", "1") != "0"
+
+def shadow_path(path: Path) -> Path:
+    return path.with_name(path.name + SHADOW_SUFFIX)
+
+@functools.lru_cache(maxsize=None)
+def _pyarrow_installed() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def shadow_available() -> bool:
+    return SHADOW_ENABLED and _pyarrow_installed()
+
+def write_shadow(df: pd.DataFrame, path: Path, signature: Dict[str, int]):
+    """
+    Refresh the Parquet shadow of `path` from a frame holding its contents
+    as of `signature`. Failures are logged and leave the (now stale)
+    shadow unused.
+    """
+    if not shadow_available():
+        return
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    shadow = shadow_path(path)
+    fd, temp_path = tempfile.mkstemp(suffix=SHADOW_SUFFIX, dir=path.parent)
+    os.close(fd)
+    try:
+        typed = apply_schema_dtypes(df.copy())
+        table = pa.Table.from_pandas(typed, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SHADOW_META_KEY] = json.dumps({**signature, "format": SHADOW_FORMAT}).encode("utf-8")
+        pq.write_table(table.replace_schema_metadata(metadata), temp_path)
+        os.replace(temp_path, shadow)
+    except Exception as e:
+        logger.info(f"Skipping Parquet shadow for {path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def filter_shadow(
+    path: Path,
+    before: Dict[str, int],
+    after: Dict[str, int],
+    keep: np.ndarray,
+    strip: Iterable[str] = ()
+):
+    """
+    Carry a shadow mirroring the CSV at `before` over to the CSV now at
+    `after`, which holds the same rows minus those where `keep` is False,
+    with surrounding whitespace stripped from the `strip` columns' text.
+    Row groups are filtered one at a time and keep the shadow's schema,
+    so memory stays bounded. Failures are logged and leave the (now
+    stale) shadow unused.
+    """
+    if not shadow_is_fresh(path, before):
+        return
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    shadow = shadow_path(path)
+    fd, temp_path = tempfile.mkstemp(suffix=SHADOW_SUFFIX, dir=path.parent)
+    os.close(fd)
+    try:
+        source = pq.ParquetFile(shadow)
+        metadata = dict(source.schema_arrow.metadata or {})
+        metadata[SHADOW_META_KEY] = json.dumps({**after, "format": SHADOW_FORMAT}).encode("utf-8")
+        schema = source.schema_arrow.with_metadata(metadata)
+        with pq.ParquetWriter(temp_path, schema) as writer:
+            start = 0
+            for batch in source.iter_batches():
+                table = pa.Table.from_batches([batch]).filter(pa.array(keep[start:start + batch.num_rows]))
+                start += batch.num_rows
+                for name in strip:
+                    i = schema.get_field_index(name)
+                    if i >= 0:
+                        table = table.set_column(i, schema.field(i), _stripped(table.column(i), pa, pc))
+                writer.write_table(table.replace_schema_metadata(metadata))
+        os.replace(temp_path, shadow)
+    except Exception as e:
+        logger.info(f"Skipping Parquet shadow for {path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _stripped(column, pa, pc):
+    """
+    A text column with surrounding whitespace removed; other columns as is.
+    """
+    field_type = column.type
+    text_type = field_type.value_type if pa.types.is_dictionary(field_type) else field_type
+    if not (pa.types.is_string(text_type) or pa.types.is_large_string(text_type)):
+        return column
+    return pc.utf8_trim_whitespace(column.cast(text_type)).cast(field_type)
+
+def _shadow_matches(schema, signature: Dict[str, int]) -> bool:
+    recorded = (schema.metadata or {}).get(SHADOW_META_KEY)
+    return recorded is not None and json.loads(recorded) == {**signature, "format": SHADOW_FORMAT}
+
+def shadow_is_fresh(path: Path, signature: Dict[str, int]) -> bool:
+    """
+    Whether a Parquet shadow exists and mirrors the CSV at `signature`.
+    """
+    shadow = shadow_path(path)
+    if not shadow_available() or not shadow.exists():
+        return False
+    import pyarrow.parquet as pq
+    try:
+        return _shadow_matches(pq.read_schema(shadow), signature)
+    except Exception:
+        return False
+
+def read_shadow(
+    path: Path,
+    signature: Dict[str, int],
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[tuple]] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Typed frame from the Parquet shadow, or None when there is no shadow
+    mirroring the CSV at `signature`. `filters` are pushed down to the
+    Parquet reader.
+    """
+    shadow = shadow_path(path)
+    if not shadow_available() or not shadow.exists():
+        return None
+    import pyarrow.parquet as pq
+
+    try:
+        schema = pq.read_schema(shadow)
+        if not _shadow_matches(schema, signature):
+            return None
+        read_cols = None if columns is None else [
+            c for c in columns + [PARSED_DATE_COLUMNS[d] for d in DATE_COLUMNS if d in columns]
+            if c in schema.names
+        ]
+        filters = [f for f in filters or [] if f[0] in schema.names] or None
+        df = pd.read_parquet(shadow, columns=read_cols, filters=filters)
+    except Exception as e:
+        logger.info(f"Ignoring unreadable Parquet shadow {shadow}: {e}")
+        return None
+
+    df = apply_schema_dtypes(normalize_dataframe(df))
+    if columns is not None:
+        df = select_columns(df, columns)
+    return df.reset_index(drop=True)
@@ -0,0 +1,150 @@
+# Golden Schema: the column layout every CSV is normalized to, and the
+# types its columns take on the read path. Shared by csv_ops and the
+# sidecar modules (Parquet shadow, stats, append log) that type frames.
+import warnings
+from typing import List, Optional
+
+import pandas as pd
+
+# Golden Schema Definition
+GOLDEN_SCHEMA = [
+    "full_name",
+    "linkedin_url",
+    "headline",
+    "company",
+    "company_size",
+    "location",
+    "match_score",
+    "match_reason",
+    "current_role_mention",
+    "found_date",
+    "icp_source"
+]
+
+RENAME_MAP = {
+    "v2_score": "match_score",
+    "v2 score": "match_score",
+    "name": "full_name",
+    "linkedin_profile": "linkedin_url",
+    "linkedin url": "linkedin_url",
+    "current role mention": "current_role_mention",
+    "company size": "company_size",
+    "found date": "found_date",
+    "icp source": "icp_source",
+    "match reason": "match_reason"
+}
+
+# Types of Golden Schema columns on the read path. Other columns keep the
+# parser's default (text) handling.
+SCHEMA_DTYPES = {
+    "match_score": "Int64",
+    "company_size": "category",
+    "location": "category",
+    "icp_source": "category",
+}
+# Date columns keep their text as written, so records and exports return
+# it unchanged. Filters and stats use a parsed copy held next to it in
+# typed frames (and the Parquet shadow), which is never written to a CSV.
+DATE_COLUMNS = ["found_date"]
+PARSED_DATE_COLUMNS = {"found_date": "_found_date"}
+
+def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Standardize headers to snake_case and map legacy names to Golden Schema.
+    """
+    # 1. Clean whitespace from headers and convert to snake_case
+    df.columns = (
+        df.columns.astype(str).str.strip()
+        .str.lower()
+        .str.replace(" ", "_")
+        .str.replace("-", "_")
+    )
+
+    # 2. Map specific common variations
+    df = df.rename(columns=RENAME_MAP)
+
+    # 3. Ensure all golden schema columns exist
+    for col in GOLDEN_SCHEMA:
+        if col not in df.columns:
+            df[col] = ""
+
+    # 4. Reorder to match Golden Schema (plus any extra columns)
+    extra_cols = [c for c in df.columns if c not in GOLDEN_SCHEMA]
+    df = df[GOLDEN_SCHEMA + extra_cols]
+
+    return df
+
+def apply_schema_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce Golden Schema columns of a normalized frame to their read-path
+    types. Columns that already have the right type are left untouched.
+    """
+    for col, dtype in SCHEMA_DTYPES.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if dtype == "Int64":
+            df[col] = _coerce_score(df[col])
+        else:
+            df[col] = df[col].astype(dtype)
+    for col in DATE_COLUMNS:
+        parsed = PARSED_DATE_COLUMNS[col]
+        if col in df.columns and parsed not in df.columns:
+            df[parsed] = parse_dates(df[col])
+    return df
+
+def parse_dates(series: pd.Series, first: Optional[str] = None) -> pd.Series:
+    """
+    Dates parsed from text cells; missing or unparseable text becomes NaT.
+    Cells the column's inferred format misses are retried one by one, so
+    a column mixing formats still parses. When `series` is one chunk of a
+    column, `first` is the column's first date text (see first_date_text),
+    so the chunk is parsed in the format inferred for the whole column.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if first is not None:
+        # The format is inferred from the first date, so lead with the column's
+        lead = pd.concat([pd.Series([first], dtype=object), series.astype(object)], ignore_index=True)
+        return parse_dates(lead).iloc[1:].set_axis(series.index)
+    with warnings.catch_warnings():
+        # A first cell in no known format only makes pandas parse per cell
+        warnings.simplefilter("ignore", UserWarning)
+        dates = pd.to_datetime(series, errors="coerce")
+    retry = dates.isna() & series.notna() & (series.astype(str).str.strip() != "")
+    if retry.any():
+        try:
+            dates[retry] = pd.to_datetime(series[retry], errors="coerce", format="mixed")
+        except (ValueError, TypeError):
+            pass
+    return dates
+
+def first_date_text(series: pd.Series) -> Optional[str]:
+    """
+    Text of the first non-empty cell, the one pandas infers a date
+    column's format from. None when every cell is empty.
+    """
+    text = series.dropna().astype(str)
+    text = text[text != ""]
+    return text.iloc[0] if len(text) else None
+
+def select_columns(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    `columns` of a typed frame that it has, each date column followed by
+    its parsed copy.
+    """
+    selected = []
+    for col in columns:
+        if col in df.columns:
+            selected.append(col)
+            if PARSED_DATE_COLUMNS.get(col) in df.columns:
+                selected.append(PARSED_DATE_COLUMNS[col])
+    return df[selected]
+
+def _coerce_score(series: pd.Series) -> pd.Series:
+    """
+    Numeric score column: nullable Int64, or Float64 if it holds fractions.
+    """
+    numeric = pd.to_numeric(series, errors="coerce")
+    if numeric.dropna().mod(1).eq(0).all():
+        return numeric.astype("Int64")
+    return numeric.astype("Float64")
@@ -0,0 +1,393 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional
+import logging
+import json
+import os
+import re
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Inverted token index for search_profiles: "<csv>.tokens.npz" holds, per
+# column, the sorted vocabulary of casefolded word tokens and the rows each
+# token occurs in (CSR layout). Batches appended after it was written are
+# logged to "<csv>.tokens.log" as JSON lines and folded in on load, so an
+# append never re-tokenizes the whole file. Each vocabulary also carries a
+# trigram -> token postings list so partial words ("engin", "fintec") find
+# their tokens without scanning the whole vocabulary.
+TOKEN_INDEX_SUFFIX = ".tokens.npz"
+TOKEN_LOG_SUFFIX = ".tokens.log"
+
+_WORD = re.compile(r"\w+")
+_SEPARATORS = re.compile(r"(\W+)")
+_MAX_CHAR = chr(0x10FFFF)
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + TOKEN_INDEX_SUFFIX)
+
+def _log_path(path: Path) -> Path:
+    return path.with_name(path.name + TOKEN_LOG_SUFFIX)
+
+def _tokenize(values: pd.Series, start: int = 0) -> tuple:
+    """
+    Casefolded word tokens of a text column and the row (position offset
+    by `start`) each one came from.
+    """
+    values = values.reset_index(drop=True).dropna()
+    lists = [_WORD.findall(text) for text in values.astype(str).str.casefold().tolist()]
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    tokens = [token for tokens in lists for token in tokens]
+    return tokens, np.repeat(values.index.to_numpy(dtype=np.int64) + start, lengths)
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    values = np.sort(values)
+    if len(values) < 2:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+def _csr(tokens: List[str], rows: np.ndarray) -> tuple:
+    """
+    (sorted vocabulary, offsets, rows) postings for parallel token/row
+    sequences, with repeated (token, row) pairs dropped.
+    """
+    codes, uniques = pd.factorize(np.array(tokens, dtype=object))
+    vocab = np.asarray(uniques, dtype=str)
+    order = np.argsort(vocab, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    vocab = vocab[order]
+    
+    width = int(rows.max()) + 1 if len(rows) else 1
+    keys = _sorted_unique(rank[codes].astype(np.int64) * width + rows)
+    token_ids, row_ids = np.divmod(keys, width)
+    offsets = np.searchsorted(token_ids, np.arange(len(vocab) + 1)).astype(np.int64)
+    return vocab, offsets, row_ids
+
+def _trigram_postings(vocab: np.ndarray) -> tuple:
+    """
+    (trigrams, offsets, token ids) postings over a sorted vocabulary.
+    """
+    grams, ids = [], []
+    for i, token in enumerate(vocab.tolist()):
+        for j in range(len(token) - 2):
+            grams.append(token[j:j + 3])
+            ids.append(i)
+    return _csr(grams, np.asarray(ids, dtype=np.int64))
+
+class TokenIndex:
+    """
+    Per-column postings of one CSV version. Rows appended since the base
+    was built live in small per-column dicts until the next compaction.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, tuple],
+        rows: int,
+        signature: Dict[str, int],
+        trigrams: Optional[Dict[str, tuple]] = None
+    ):
+        self.columns = columns
+        self.trigrams = trigrams if trigrams is not None else {}
+        self.rows = rows
+        self.signature = signature
+        self.base_rows = rows
+        self.delta: Dict[str, Dict[str, List[int]]] = {c: {} for c in columns}
+        self._vocab_series: Dict[str, pd.Series] = {}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, columns: List[str], signature: Dict[str, int]) -> "TokenIndex":
+        postings = {c: _csr(*_tokenize(df[c])) for c in columns if c in df.columns}
+        index = cls(postings, len(df), signature)
+        for column in postings:
+            index.column_trigrams(column)
+        return index
+
+    @property
+    def delta_rows(self) -> int:
+        return self.rows - self.base_rows
+
+    def add_batch(self, batch: Dict[str, Dict[str, List[int]]], rows: int, signature: Dict[str, int]):
+        for column, tokens in batch.items():
+            delta = self.delta.setdefault(column, {})
+            for token, row_ids in tokens.items():
+                delta.setdefault(token, []).extend(row_ids)
+        self.rows += rows
+        self.signature = signature
+
+    def column_trigrams(self, column: str) -> tuple:
+        if column not in self.trigrams:
+            self.trigrams[column] = _trigram_postings(self.columns[column][0])
+        return self.trigrams[column]
+
+    def lookup(self, columns: List[str], term: str) -> tuple:
+        """
+        Sorted positions of every row where `term` may occur as a substring
+        (case-insensitively) in any of `columns`, and the index path that
+        found them ("token_index", or "trigram_index" when partial words
+        were resolved through trigrams). Rows are None when the term has no
+        word characters and the index can't narrow the search.
+        """
+        words = _term_words(term)
+        if not words or any(c not in self.columns for c in columns):
+            return None, "scan"
+        if len(words) == 1 and len(words[0][0]) < 3 and not (words[0][1] or words[0][2]):
+            # A lone one- or two-letter fragment matches most of any vocabulary
+            return None, "scan"
+        found = [self._column_rows(c, words) for c in columns]
+        rows = _sorted_unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        partial = any(not left and len(word) >= 3 for word, left, right in words)
+        return rows, "trigram_index" if partial else "token_index"
+
+    def lookup_any(self, columns: List[str], terms: List[str]) -> tuple:
+        """
+        Union of lookup() over several terms; rows are None as soon as one
+        of them can't be narrowed.
+        """
+        found = [self.lookup(columns, term) for term in terms]
+        if not found or any(rows is None for rows, _ in found):
+            return None, "scan"
+        rows = _sorted_unique(np.concatenate([rows for rows, _ in found]))
+        partial = any(path == "trigram_index" for _, path in found)
+        return rows, "trigram_index" if partial else "token_index"
+
+    def _column_rows(self, column: str, words: List[tuple]) -> np.ndarray:
+        rows = None
+        for word, left, right in words:
+            matched = self._word_rows(column, word, left, right)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+            if not len(rows):
+                break
+        return rows
+
+    def _word_rows(self, column: str, word: str, left: bool, right: bool) -> np.ndarray:
+        """
+        Rows holding a token that can contain this piece of the term: a
+        piece with a separator on its left must start a token, one with a
+        separator on its right must end it.
+        """
+        vocab, offsets, row_ids = self.columns[column]
+        if left:
+            lo = np.searchsorted(vocab, word)
+            hi = np.searchsorted(vocab, word if right else word + _MAX_CHAR, side="right")
+            ids = np.arange(lo, hi)
+        elif len(word) >= 3:
+            ids = self._trigram_tokens(column, word)
+            ids = ids[[(token.endswith(word) if right else word in token) for token in vocab[ids].tolist()]]
+        else:
+            if column not in self._vocab_series:
+                self._vocab_series[column] = pd.Series(vocab, dtype=object)
+            series = self._vocab_series[column]
+            hits = series.str.endswith(word) if right else series.str.contains(word, regex=False)
+            ids = np.flatnonzero(hits.to_numpy(dtype=bool))
+
+        if len(ids) > 64:
+            selected = np.zeros(len(vocab), dtype=bool)
+            selected[ids] = True
+            parts = [row_ids[np.repeat(selected, np.diff(offsets))]]
+        else:
+            parts = [row_ids[offsets[i]:offsets[i + 1]] for i in ids]
+        parts.extend(
+            np.asarray(rows, dtype=np.int64)
+            for token, rows in self.delta.get(column, {}).items()
+            if _token_matches(token, word, left, right)
+        )
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return _sorted_unique(np.concatenate(parts))
+
+    def _trigram_tokens(self, column: str, word: str) -> np.ndarray:
+        """
+        Ids of vocabulary tokens holding every trigram of `word`.
+        """
+        grams, offsets, token_ids = self.column_trigrams(column)
+        found = []
+        for gram in {word[j:j + 3] for j in range(len(word) - 2)}:
+            i = np.searchsorted(grams, gram)
+            if i == len(grams) or grams[i] != gram:
+                return np.empty(0, dtype=np.int64)
+            found.append(token_ids[offsets[i]:offsets[i + 1]])
+        found.sort(key=len)
+        ids = found[0]
+        for other in found[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def compacted(self) -> "TokenIndex":
+        """
+        Same index with the appended rows merged into the base postings.
+        """
+        columns = {}
+        for column, (vocab, offsets, row_ids) in self.columns.items():
+            tokens = list(np.repeat(vocab, np.diff(offsets)))
+            rows = [row_ids]
+            for token, appended in self.delta.get(column, {}).items():
+                tokens.extend([token] * len(appended))
+                rows.append(np.asarray(appended, dtype=np.int64))
+            columns[column] = _csr(tokens, np.concatenate(rows))
+        index = TokenIndex(columns, self.rows, self.signature)
+        for column in columns:
+            index.column_trigrams(column)
+        return index
+
+def _term_words(term: str) -> List[tuple]:
+    """
+    Word pieces of a search term with whether a separator sits on their
+    left and right.
+    """
+    parts = _SEPARATORS.split(term.casefold())
+    last = len(parts) - 1
+    return [(p, i > 0, i < last) for i, p in enumerate(parts) if i % 2 == 0 and p]
+
+def _token_matches(token: str, word: str, left: bool, right: bool) -> bool:
+    if left and right:
+        return token == word
+    if left:
+        return token.startswith(word)
+    if right:
+        return token.endswith(word)
+    return word in token
+
+def save_token_index(path: Path, index: TokenIndex):
+    """
+    Write the (compacted) index atomically and drop the append log.
+    """
+    arrays = {"meta": np.array(json.dumps({"rows": index.rows, "signature": index.signature}))}
+    for n, (column, (vocab, offsets, row_ids)) in enumerate(index.columns.items()):
+        arrays[f"column_{n}"] = np.array(column)
+        arrays[f"vocab_{n}"] = vocab
+        arrays[f"offsets_{n}"] = offsets
+        arrays[f"rows_{n}"] = row_ids
+        grams, gram_offsets, gram_tokens = index.column_trigrams(column)
+        arrays[f"grams_{n}"] = grams
+        arrays[f"gram_offsets_{n}"] = gram_offsets
+        arrays[f"gram_tokens_{n}"] = gram_tokens
+
+    target = _index_path(path)
+    fd, temp_path = tempfile.mkstemp(suffix=".npz", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, target)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _log_path(path).unlink(missing_ok=True)
+
+def _read_token_index(path: Path) -> Optional[TokenIndex]:
+    """
+    Base postings plus every logged batch that continues them, or None if
+    there is no readable sidecar.
+    """
+    try:
+        with np.load(_index_path(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            columns, trigrams = {}, {}
+            n = 0
+            while f"column_{n}" in data:
+                column = str(data[f"column_{n}"])
+                columns[column] = (data[f"vocab_{n}"], data[f"offsets_{n}"], data[f"rows_{n}"])
+                if f"grams_{n}" in data:
+                    trigrams[column] = (
+                        data[f"grams_{n}"], data[f"gram_offsets_{n}"], data[f"gram_tokens_{n}"]
+                    )
+                n += 1
+    except (OSError, ValueError, KeyError):
+        return None
+
+    index = TokenIndex(columns, meta["rows"], meta["signature"], trigrams)
+    try:
+        with open(_log_path(path), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    batch = json.loads(line)
+                except ValueError:
+                    break
+                if batch["start"] != index.rows or batch["before"] != index.signature:
+                    break
+                index.add_batch(batch["postings"], batch["rows"], batch["signature"])
+    except FileNotFoundError:
+        # No batches logged, or a compaction just folded them into the base
+        pass
+    return index
+
+# Indexes loaded in this process, keyed by CSV path
+_TOKEN_INDEXES: Dict[str, TokenIndex] = {}
+_LOCK = threading.Lock()
+
+def _cached(path: Path) -> Optional[TokenIndex]:
+    with _LOCK:
+        return _TOKEN_INDEXES.get(str(path))
+
+def _remember(path: Path, index: TokenIndex):
+    with _LOCK:
+        _TOKEN_INDEXES[str(path)] = index
+
+def load_token_index(
+    path: Path,
+    df: pd.DataFrame,
+    columns: List[str],
+    signature: Dict[str, int],
+    persist: bool = True
+) -> TokenIndex:
+    """
+    Index for the CSV version `df` was loaded from: from memory, from the
+    sidecar, or rebuilt from `df` (and saved unless `persist` is off).
+    """
+    def fresh(index):
+        return (
+            index is not None
+            and index.signature == signature
+            and index.rows == len(df)
+            and all(c in index.columns for c in columns if c in df.columns)
+        )
+
+    index = _cached(path)
+    if not fresh(index):
+        index = _read_token_index(path)
+    if not fresh(index):
+        logger.info(f"Building token index for {path}")
+        index = TokenIndex.build(df, columns, signature)
+        if persist:
+            save_token_index(path, index)
+    elif persist and index.delta_rows > max(index.base_rows // 4, 1000):
+        index = index.compacted()
+        save_token_index(path, index)
+    _remember(path, index)
+    return index
+
+def extend_token_index(
+    path: Path,
+    new_df: pd.DataFrame,
+    start: int,
+    before: Dict[str, int],
+    after: Dict[str, int]
+):
+    """
+    Record rows just appended at position `start`. Only an index that
+    mirrored the file right before the append (`before`) is extended; any
+    other one is stale and will be rebuilt on the next search.
+    """
+    index = _cached(path)
+    if index is None or index.signature != before:
+        index = _read_token_index(path)
+    if index is None or index.signature != before or index.rows != start:
+        return
+
+    postings = {}
+    for column in index.columns:
+        if column not in new_df.columns:
+            continue
+        vocab, offsets, row_ids = _csr(*_tokenize(new_df[column], start))
+        postings[column] = {
+            token: row_ids[offsets[i]:offsets[i + 1]].tolist() for i, token in enumerate(vocab)
+        }
+    batch = {"start": start, "rows": len(new_df), "before": before, "signature": after, "postings": postings}
+    with open(_log_path(path), "a", encoding="utf-8") as f:
+        f.write(json.dumps(batch) + "\n")
+    index.add_batch(postings, len(new_df), after)
+    _remember(path, index)
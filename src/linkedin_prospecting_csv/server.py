@@ -1,16 +1,21 @@
 import asyncio
 import json
 import logging
+import os
 from typing import Any, Dict, List, Optional
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from . import csv_ops
+from . import csv_ops, sqlite_backend
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("linkedin-prospecting-csv")
 
+# Storage backend (LINKEDIN_CSV_BACKEND): "csv" (default) or "sqlite"
+BACKEND = os.environ.get("LINKEDIN_CSV_BACKEND", "csv").lower()
+ops = sqlite_backend if BACKEND == "sqlite" else csv_ops
+
 server = Server("linkedin-prospecting-csv")
 
 @server.list_tools()
@@ -73,7 +78,12 @@ async def list_tools() -> List[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "csv_path": {"type": "string", "description": "Absolute path to the CSV file"}
+                    "csv_path": {"type": "string", "description": "Absolute path to the CSV file"},
+                    "score_buckets": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Ascending bucket edges for score_distribution (default [10, 15, 20])"
+                    }
                 },
                 "required": ["csv_path"]
             }
@@ -96,17 +106,33 @@ async def list_tools() -> List[Tool]:
         ),
         Tool(
             name="search_profiles",
-            description="Case-insensitive full-text search across all standardized text fields",
+            description=(
+                "Case-insensitive full-text search across all standardized text fields. "
+                "Give must/should/must_not terms to combine several terms in one call, ranked by relevance"
+            ),
             inputSchema={
                 "type": "object",
                 "properties": {
                     "csv_path": {"type": "string", "description": "Absolute path to the CSV file"},
-                    "search_term": {"type": "string"},
+                    "search_term": {"type": "string", "description": "Substring to find (a must term in query mode)"},
+                    "must": {"type": "array", "items": {"type": "string"}, "description": "Terms every result must contain (AND)"},
+                    "should": {"type": "array", "items": {"type": "string"}, "description": "Terms that raise relevance; without must terms, at least one is required (OR)"},
+                    "must_not": {"type": "array", "items": {"type": "string"}, "description": "Terms that exclude a profile (NOT)"},
+                    "column_weights": {
+                        "type": "object",
+                        "additionalProperties": {"type": "number"},
+                        "description": "Relevance weight per column, e.g. {\"headline\": 3} (default 1)"
+                    },
                     "columns": {"type": "array", "items": {"type": "string"}},
                     "case_sensitive": {"type": "boolean", "default": False},
-                    "limit": {"type": "integer"}
+                    "limit": {"type": "integer"},
+                    "explain": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Wrap results as {search_path, results}, reporting whether an index or a full scan answered the query"
+                    }
                 },
-                "required": ["csv_path", "search_term"]
+                "required": ["csv_path"]
             }
         ),
         Tool(
@@ -117,7 +143,11 @@ async def list_tools() -> List[Tool]:
                 "properties": {
                     "csv_path": {"type": "string", "description": "Absolute path to the CSV file"},
                     "dedupe_column": {"type": "string", "default": "linkedin_url"},
-                    "keep": {"type": "string", "enum": ["first", "last"], "default": "first"}
+                    "keep": {"type": "string", "enum": ["first", "last"], "default": "first"},
+                    "chunksize": {"type": "integer", "description": "Rows per chunk for streaming dedupe (large files stream automatically)"},
+                    "dedupe_columns": {"type": "array", "items": {"type": "string"}, "description": "Composite key: rows are duplicates when all of these columns match (overrides dedupe_column)"},
+                    "fuzzy": {"type": "boolean", "default": False, "description": "Also treat rows as duplicates when their companies match and their full names are similar"},
+                    "similarity": {"type": "number", "default": 0.9, "description": "Name similarity (0-1) required by fuzzy matching"}
                 },
                 "required": ["csv_path"]
             }
@@ -128,19 +158,19 @@ async def list_tools() -> List[Tool]:
 async def call_tool(name: str, arguments: Any) -> List[TextContent]:
     try:
         if name == "create_new_csv":
-            result = await csv_ops.create_new_csv(**arguments)
+            result = await ops.create_new_csv(**arguments)
         elif name == "append_profiles_to_csv":
-            result = await csv_ops.append_profiles_to_csv(**arguments)
+            result = await ops.append_profiles_to_csv(**arguments)
         elif name == "filter_profiles":
-            result = await csv_ops.filter_profiles(**arguments)
+            result = await ops.filter_profiles(**arguments)
         elif name == "get_csv_stats":
-            result = await csv_ops.get_csv_stats(**arguments)
+            result = await ops.get_csv_stats(**arguments)
         elif name == "export_segment":
-            result = await csv_ops.export_segment(**arguments)
+            result = await ops.export_segment(**arguments)
         elif name == "search_profiles":
-            result = await csv_ops.search_profiles(**arguments)
+            result = await ops.search_profiles(**arguments)
         elif name == "deduplicate_csv":
-            result = await csv_ops.deduplicate_csv(**arguments)
+            result = await ops.deduplicate_csv(**arguments)
         else:
             raise ValueError(f"Unknown tool: {name}")
             
@@ -0,0 +1,648 @@
+# SQLite storage backend: the same seven tools as csv_ops, backed by an
+# indexed database instead of full-file pandas scans.
+import pandas as pd
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import contextlib
+import logging
+import json
+import os
+import sqlite3
+
+from .csv_ops import (
+    offloaded,
+    safe_to_csv,
+    _read_csv,
+    _normalize_column_name,
+    _dedupe_keys,
+    _check_keep,
+    _cell_text,
+    _to_records,
+    _search_query,
+    rank_search_matches,
+    SEARCH_COLUMNS,
+)
+from .schema import (
+    GOLDEN_SCHEMA,
+    PARSED_DATE_COLUMNS,
+    normalize_dataframe,
+    parse_dates,
+    _coerce_score,
+)
+from .stats_sidecar import score_distribution, _score_key
+from .url_keys import KEY_FORMAT
+from .fuzzy_keys import DEFAULT_SIMILARITY, fuzzy_duplicated
+
+logger = logging.getLogger(__name__)
+
+# Paths with these suffixes are databases; anything else is treated as a
+# CSV whose database lives next to it as "<csv>.sqlite"
+DB_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+DB_SUFFIX = ".sqlite"
+
+TEXT_COLUMNS = [c for c in GOLDEN_SCHEMA if c != "match_score"]
+
+# Scores and dates are stored as written, so exports give them back
+# unchanged. Filters, ordering and stats use parsed copies held next to
+# them: the score as a number and the date as "YYYY-MM-DD HH:MM:SS" text,
+# which sorts and compares like the dates themselves.
+PARSED_COLUMNS = {"match_score": "_match_score", **PARSED_DATE_COLUMNS}
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS profiles (
+    row_id INTEGER PRIMARY KEY,
+    full_name TEXT,
+    linkedin_url TEXT,
+    headline TEXT,
+    company TEXT,
+    company_size TEXT,
+    location TEXT,
+    match_score TEXT,
+    match_reason TEXT,
+    current_role_mention TEXT,
+    found_date TEXT,
+    icp_source TEXT,
+    extra TEXT,
+    dedupe_key TEXT NOT NULL,
+    _match_score NUMERIC,
+    _found_date TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_profiles_linkedin_url ON profiles(dedupe_key);
+CREATE INDEX IF NOT EXISTS idx_profiles_match_score ON profiles(_match_score);
+CREATE INDEX IF NOT EXISTS idx_profiles_found_date ON profiles(_found_date);
+"""
+
+# External-content FTS5 table over the default search columns, kept in
+# sync by triggers. The trigram tokenizer lets MATCH answer substring
+# queries of 3+ characters, which is what search_profiles promises.
+_FTS_COLS = ", ".join(SEARCH_COLUMNS)
+_FTS_NEW = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+_FTS_OLD = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+FTS_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+    {_FTS_COLS}, content='profiles', content_rowid='row_id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS profiles_fts_insert AFTER INSERT ON profiles BEGIN
+    INSERT INTO profiles_fts(rowid, {_FTS_COLS}) VALUES (new.row_id, {_FTS_NEW});
+END;
+CREATE TRIGGER IF NOT EXISTS profiles_fts_delete AFTER DELETE ON profiles BEGIN
+    INSERT INTO profiles_fts(profiles_fts, rowid, {_FTS_COLS}) VALUES ('delete', old.row_id, {_FTS_OLD});
+END;
+CREATE TRIGGER IF NOT EXISTS profiles_fts_update AFTER UPDATE ON profiles BEGIN
+    INSERT INTO profiles_fts(profiles_fts, rowid, {_FTS_COLS}) VALUES ('delete', old.row_id, {_FTS_OLD});
+    INSERT INTO profiles_fts(rowid, {_FTS_COLS}) VALUES (new.row_id, {_FTS_NEW});
+END;
+"""
+
+def database_path(csv_path: str) -> Path:
+    """
+    Database file backing `csv_path`.
+    """
+    path = Path(csv_path).absolute()
+    if path.suffix.lower() in DB_SUFFIXES:
+        return path
+    return path.with_name(path.name + DB_SUFFIX)
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT name FROM sqlite_master WHERE name = 'profiles_fts'").fetchone()
+    return row is not None
+
+def _connect(csv_path: str) -> sqlite3.Connection:
+    """
+    Open (and if needed create) the database for `csv_path`. A new database
+    next to an existing CSV is populated from it, so files migrate on
+    first use.
+    """
+    path = Path(csv_path).absolute()
+    db = database_path(csv_path)
+    fresh = not db.exists()
+    db.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        _migrate_columns(conn)
+        conn.executescript(SCHEMA_SQL)
+        try:
+            conn.executescript(FTS_SQL)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 trigram search unavailable, falling back to LIKE scans: {e}")
+    with conn:
+        _migrate_keys(conn)
+
+    if fresh and db != path and path.exists():
+        logger.info(f"Migrating {path} into {db}")
+        with conn:
+            _insert_frame(conn, _read_text(path))
+    return conn
+
+def _read_text(path: Path) -> pd.DataFrame:
+    """
+    Every cell of a CSV as the text written in it, under Golden Schema
+    headers.
+    """
+    return normalize_dataframe(_read_csv(path, dtype=str, keep_default_na=False))
+
+def _migrate_columns(conn: sqlite3.Connection):
+    """
+    Rebuild a profiles table from before scores and dates were kept as
+    written, which stored them parsed in place. Their stored values become
+    both the text and the parsed copy. Row ids are kept, so the FTS index
+    stays valid; its triggers are recreated with the table's.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(profiles)")]
+    if not columns or PARSED_COLUMNS["match_score"] in columns:
+        return
+    logger.info("Rebuilding profiles to keep scores and dates as written")
+    kept = ", ".join(["row_id"] + GOLDEN_SCHEMA + ["extra", "dedupe_key"])
+    parsed = ", ".join(PARSED_COLUMNS.values())
+    conn.executescript(f"""
+        BEGIN;
+        DROP TRIGGER IF EXISTS profiles_fts_insert;
+        DROP TRIGGER IF EXISTS profiles_fts_delete;
+        DROP TRIGGER IF EXISTS profiles_fts_update;
+        DROP INDEX IF EXISTS idx_profiles_linkedin_url;
+        DROP INDEX IF EXISTS idx_profiles_match_score;
+        DROP INDEX IF EXISTS idx_profiles_found_date;
+        ALTER TABLE profiles RENAME TO profiles_old;
+        {SCHEMA_SQL}
+        INSERT INTO profiles ({kept}, {parsed})
+        SELECT {kept}, match_score, datetime(found_date) FROM profiles_old;
+        DROP TABLE profiles_old;
+        COMMIT;
+    """)
+
+def _migrate_keys(conn: sqlite3.Connection):
+    """
+    Recompute dedupe keys written in an older key format (tracked in
+    PRAGMA user_version). Rows whose new key repeats an earlier row's are
+    dropped, exactly as an append would have skipped them.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= KEY_FORMAT:
+        return
+    rows = pd.read_sql_query("SELECT row_id, linkedin_url, dedupe_key FROM profiles ORDER BY row_id", conn)
+    if len(rows):
+        keys = _dedupe_keys(rows["linkedin_url"], "linkedin_url")
+        duplicated = keys.duplicated(keep='first')
+        if duplicated.any():
+            logger.info(f"Dropping {int(duplicated.sum())} duplicate profiles while re-keying")
+        # Keys are idempotent, so once duplicates are gone no update can
+        # collide with a key that is still waiting to be rewritten
+        conn.executemany(
+            "DELETE FROM profiles WHERE row_id = ?",
+            ((int(r),) for r in rows["row_id"][duplicated])
+        )
+        changed = ~duplicated & (keys != rows["dedupe_key"])
+        conn.executemany(
+            "UPDATE profiles SET dedupe_key = ? WHERE row_id = ?",
+            zip(keys[changed].tolist(), rows["row_id"][changed].astype(int).tolist())
+        )
+    conn.execute(f"PRAGMA user_version = {KEY_FORMAT}")
+
+def _db_column(series: pd.Series) -> List[Any]:
+    """
+    Column values as plain Python objects, with missing and "" as None.
+    """
+    values = series.astype(object)
+    values = values.where(series.notna() & (values != ""), None)
+    return [v.item() if hasattr(v, "item") else v for v in values]
+
+def _insert_frame(conn: sqlite3.Connection, df: pd.DataFrame) -> List[bool]:
+    """
+    INSERT OR IGNORE every row of a profile frame. Returns, per row,
+    whether it was added (False means its linkedin_url already existed).
+    """
+    df = normalize_dataframe(df.drop(columns=list(PARSED_DATE_COLUMNS.values()), errors="ignore"))
+    extra_cols = [c for c in df.columns if c not in GOLDEN_SCHEMA]
+
+    urls = df["linkedin_url"].fillna("").astype(str).str.strip()
+    keys = _dedupe_keys(urls, "linkedin_url")
+    values = {c: _db_column(df[c]) for c in TEXT_COLUMNS}
+    values["linkedin_url"] = _db_column(urls)
+    values["match_score"] = _db_column(df["match_score"])
+    values["_match_score"] = _db_column(_coerce_score(df["match_score"]))
+    values["_found_date"] = _db_column(parse_dates(df["found_date"]).dt.strftime(DATE_FORMAT))
+    extras = [None] * len(df)
+    if extra_cols:
+        extra_values = {c: _db_column(df[c]) for c in extra_cols}
+        extras = [
+            json.dumps(row) if row else None
+            for row in (
+                {c: extra_values[c][i] for c in extra_cols if extra_values[c][i] is not None}
+                for i in range(len(df))
+            )
+        ]
+
+    columns = GOLDEN_SCHEMA + ["extra", "dedupe_key"] + list(PARSED_COLUMNS.values())
+    sql = (
+        f"INSERT OR IGNORE INTO profiles ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})"
+    )
+    rows = zip(
+        *[values[c] for c in GOLDEN_SCHEMA], extras, keys.tolist(),
+        *[values[c] for c in PARSED_COLUMNS.values()]
+    )
+    return [conn.execute(sql, params).rowcount == 1 for params in rows]
+
+# Best score first, file (insertion) order on ties and for missing scores
+SCORE_ORDER = "p._match_score IS NULL, p._match_score DESC, p.row_id"
+
+def _fetch_frame(
+    conn: sqlite3.Connection,
+    where: str = "",
+    params: tuple = (),
+    limit: Optional[int] = None,
+    order_by: str = SCORE_ORDER,
+    as_written: bool = False
+) -> pd.DataFrame:
+    """
+    Profiles matching `where` as a Golden Schema frame, with extra columns
+    expanded back out of their JSON column. Scores are numeric, as the CSV
+    backend reads them, unless `as_written` keeps their stored text.
+    """
+    sql = f"SELECT {', '.join('p.' + c for c in GOLDEN_SCHEMA)}, p.extra FROM profiles p {where} "
+    sql += f"ORDER BY {order_by}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    df = pd.read_sql_query(sql, conn, params=params)
+    if not as_written:
+        df["match_score"] = _coerce_score(df["match_score"])
+
+    extras = df.pop("extra")
+    if extras.notna().any():
+        expanded = pd.DataFrame([json.loads(e) if isinstance(e, str) else {} for e in extras], index=df.index)
+        df = pd.concat([df, expanded], axis=1)
+    return df
+
+def _like(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _filter_clause(
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    locations: Optional[List[str]] = None,
+    companies: Optional[List[str]] = None,
+    current_role_only: Optional[bool] = None,
+    found_after_date: Optional[str] = None
+) -> tuple:
+    """
+    WHERE clause and parameters equivalent to csv_ops.filter_profiles.
+    """
+    conditions, params = [], []
+    if min_score is not None:
+        conditions.append("p._match_score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        conditions.append("p._match_score <= ?")
+        params.append(max_score)
+    for col, values in (("location", locations), ("company", companies)):
+        if values:
+            conditions.append("(" + " OR ".join(f"p.{col} LIKE ? ESCAPE '\\'" for _ in values) + ")")
+            params.extend(_like(v) for v in values)
+    if current_role_only:
+        conditions.append("substr(p.current_role_mention, 1, 3) = 'YES'")
+    if found_after_date:
+        conditions.append("p._found_date > ?")
+        params.append(pd.to_datetime(found_after_date).strftime(DATE_FORMAT))
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    return where, tuple(params)
+
+def import_csv(csv_path: str, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a CSV (auto-repaired to the Golden Schema) into a database.
+    Rows whose linkedin_url is already present are skipped.
+    """
+    path = Path(csv_path).absolute()
+    with contextlib.closing(_connect(db_path or csv_path)) as conn, conn:
+        added = _insert_frame(conn, _read_text(path))
+    return {"imported": sum(added), "skipped_duplicates": len(added) - sum(added), "path": str(path)}
+
+def export_csv(csv_path: str, output_csv: str) -> Dict[str, Any]:
+    """
+    Write every profile in the database for `csv_path` to a Golden Schema
+    CSV, with every cell as it was written.
+    """
+    with contextlib.closing(_connect(csv_path)) as conn:
+        df = _fetch_frame(conn, order_by="p.row_id", as_written=True)
+    out_path = Path(output_csv).absolute()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    safe_to_csv(normalize_dataframe(df), out_path)
+    return {"profiles_exported": len(df), "output_path": str(out_path)}
+
+@offloaded(writes=("csv_path",))
+def create_new_csv(csv_path: str, overwrite: bool = False) -> Dict[str, str]:
+    """
+    Creates a new, empty profile database.
+    """
+    path = Path(csv_path).absolute()
+    db = database_path(csv_path)
+    if (db.exists() or path.exists()) and not overwrite:
+        raise FileExistsError(f"File already exists at {path}. Use overwrite=True to replace it.")
+
+    for suffix in ("", "-wal", "-shm"):
+        target = Path(str(db) + suffix)
+        if target.exists():
+            os.remove(target)
+    if path.exists() and path != db:
+        os.remove(path)
+    _connect(csv_path).close()
+
+    return {
+        "status": "success",
+        "message": f"Created new profile database with Golden Schema at {db}",
+        "path": str(path)
+    }
+
+@offloaded(writes=("csv_path",))
+def append_profiles_to_csv(
+    csv_path: str,
+    profiles: List[Dict[str, Any]],
+    dedupe_column: str = "linkedin_url"
+) -> Dict[str, Any]:
+    """
+    Append new profiles with INSERT OR IGNORE on the canonical linkedin_url
+    key index.
+    Another `dedupe_column` additionally skips rows whose value exists.
+    """
+    path = Path(csv_path).absolute()
+    new_df = normalize_dataframe(pd.DataFrame(profiles))
+    norm_dedupe = _normalize_column_name(dedupe_column)
+
+    with contextlib.closing(_connect(csv_path)) as conn, conn:
+        if norm_dedupe != "linkedin_url" and norm_dedupe in TEXT_COLUMNS:
+            values = _dedupe_keys(new_df[norm_dedupe], norm_dedupe)
+            existing = {
+                row[0] for row in conn.execute(
+                    f"SELECT DISTINCT coalesce(trim({norm_dedupe}), '') FROM profiles"
+                )
+            }
+            new_df = new_df[~values.isin(existing) & ~values.duplicated(keep='first')]
+        added = pd.Series(_insert_frame(conn, new_df), index=new_df.index, dtype=bool)
+        total = conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    added_df = new_df[added]
+    return {
+        "added": int(len(added_df)),
+        "skipped_duplicates": int(len(profiles) - len(added_df)),
+        "total_profiles": int(total),
+        "preview": added_df["full_name"].head(3).tolist(),
+        "path": str(path)
+    }
+
+@offloaded(reads=("csv_path",))
+def filter_profiles(
+    csv_path: str,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    locations: Optional[List[str]] = None,
+    companies: Optional[List[str]] = None,
+    current_role_only: Optional[bool] = None,
+    found_after_date: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Filter profiles with indexed SQL predicates on score and date.
+    """
+    if not database_path(csv_path).exists() and not Path(csv_path).absolute().exists():
+        return []
+    where, params = _filter_clause(
+        min_score, max_score, locations, companies, current_role_only, found_after_date
+    )
+    with contextlib.closing(_connect(csv_path)) as conn:
+        return _to_records(_fetch_frame(conn, where, params, limit))
+
+@offloaded(reads=("csv_path",))
+def get_csv_stats(csv_path: str, score_buckets: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Summary statistics computed with SQL aggregates.
+    """
+    path = Path(csv_path).absolute()
+    if not database_path(csv_path).exists() and not path.exists():
+        return {"error": "File not found"}
+
+    with contextlib.closing(_connect(csv_path)) as conn:
+        total, avg_score, earliest, latest, current_role_count = conn.execute("""
+            SELECT COUNT(*), AVG(_match_score),
+                   substr(MIN(_found_date), 1, 10), substr(MAX(_found_date), 1, 10),
+                   SUM(substr(current_role_mention, 1, 3) = 'YES')
+            FROM profiles
+        """).fetchone()
+        histogram = conn.execute("""
+            SELECT _match_score, COUNT(*) FROM profiles WHERE _match_score IS NOT NULL
+            GROUP BY _match_score
+        """).fetchall()
+        location_breakdown = conn.execute("""
+            SELECT location, COUNT(*) AS n FROM profiles WHERE location IS NOT NULL
+            GROUP BY location ORDER BY n DESC, location LIMIT 10
+        """).fetchall()
+        company_size_breakdown = conn.execute("""
+            SELECT company_size, COUNT(*) AS n FROM profiles WHERE company_size IS NOT NULL
+            GROUP BY company_size ORDER BY n DESC, company_size
+        """).fetchall()
+
+    return {
+        "total_profiles": int(total),
+        "avg_score": round(float(avg_score), 2) if avg_score is not None else 0,
+        "score_distribution": score_distribution(
+            {_score_key(v): int(n) for v, n in histogram}, score_buckets
+        ),
+        "location_breakdown": {str(k): int(v) for k, v in location_breakdown},
+        "company_size_breakdown": {str(k): int(v) for k, v in company_size_breakdown},
+        "found_date_range": {"earliest": earliest or "", "latest": latest or ""},
+        "current_role_count": int(current_role_count or 0),
+        "path": str(path)
+    }
+
+@offloaded(reads=("source_csv",), writes=("output_csv",))
+def export_segment(
+    source_csv: str,
+    output_csv: str,
+    min_score: Optional[int] = None,
+    locations: Optional[List[str]] = None,
+    companies: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Export filtered profiles from the database to a Golden Schema CSV.
+    """
+    profiles = filter_profiles.__wrapped__(
+        csv_path=source_csv,
+        min_score=min_score,
+        locations=locations,
+        companies=companies
+    )
+
+    if not profiles:
+        return {"profiles_exported": 0, "output_path": output_csv, "columns_included": []}
+
+    df = normalize_dataframe(pd.DataFrame(profiles))
+    if columns:
+        norm_cols = [_normalize_column_name(c) for c in columns]
+        df = df[[c for c in norm_cols if c in df.columns]]
+
+    out_path = Path(output_csv).absolute()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    safe_to_csv(df, out_path)
+
+    return {
+        "profiles_exported": len(df),
+        "output_path": str(out_path),
+        "columns_included": df.columns.tolist()
+    }
+
+@offloaded(reads=("csv_path",))
+def search_profiles(
+    csv_path: str,
+    search_term: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    case_sensitive: bool = False,
+    limit: Optional[int] = None,
+    explain: bool = False,
+    must: Optional[List[str]] = None,
+    should: Optional[List[str]] = None,
+    must_not: Optional[List[str]] = None,
+    column_weights: Optional[Dict[str, float]] = None
+) -> Any:
+    """
+    Substring search, served by the FTS5 trigram index for terms of three
+    or more characters and by LIKE/instr scans otherwise. Query mode
+    (must/should/must_not, column_weights) fetches rows matching any
+    positive term and ranks them like the CSV backend.
+    With explain=True the results come back as {"search_path", "results"}.
+    """
+    def respond(results, search_path):
+        return {"search_path": search_path, "results": results} if explain else results
+
+    query = _search_query(search_term, must, should, must_not, column_weights)
+    if not database_path(csv_path).exists() and not Path(csv_path).absolute().exists():
+        return respond([], "none")
+
+    if columns:
+        search_cols = [c for c in (_normalize_column_name(c) for c in columns) if c in TEXT_COLUMNS]
+    else:
+        search_cols = list(SEARCH_COLUMNS)
+    search_cols += [c for c in query["weights"] if c in TEXT_COLUMNS and c not in search_cols]
+    if not search_cols:
+        return respond([], "none")
+
+    with contextlib.closing(_connect(csv_path)) as conn:
+        if query["ranked"]:
+            return respond(_ranked_search(conn, search_cols, query, case_sensitive, limit), "scan")
+
+        scan, scan_params = _scan_clause(search_cols, search_term, case_sensitive)
+        if _has_fts(conn) and len(search_term) >= 3 and set(search_cols) <= set(SEARCH_COLUMNS):
+            phrase = '"' + search_term.replace('"', '""') + '"'
+            match = "{" + " ".join(search_cols) + "}: " + phrase
+            where = (
+                "JOIN profiles_fts f ON f.rowid = p.row_id "
+                f"WHERE profiles_fts MATCH ? AND ({scan})"
+            )
+            params = (match, *scan_params)
+            search_path = "fts5"
+        else:
+            where, params = f"WHERE {scan}", tuple(scan_params)
+            search_path = "scan"
+        return respond(_to_records(_fetch_frame(conn, where, params, limit)), search_path)
+
+def _scan_clause(search_cols: List[str], term: str, case_sensitive: bool) -> tuple:
+    """
+    SQL condition (and its parameters) for `term` occurring in any column.
+    """
+    # instr() is case-sensitive, LIKE is case-insensitive (ASCII)
+    if case_sensitive:
+        scan = " OR ".join(f"instr(p.{c}, ?) > 0" for c in search_cols)
+        return scan, [term] * len(search_cols)
+    scan = " OR ".join(f"p.{c} LIKE ? ESCAPE '\\'" for c in search_cols)
+    return scan, [_like(term)] * len(search_cols)
+
+def _ranked_search(
+    conn: sqlite3.Connection,
+    search_cols: List[str],
+    query: Dict[str, Any],
+    case_sensitive: bool,
+    limit: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Query-mode search: every row matching a positive term is fetched once
+    and ranked by rank_search_matches.
+    """
+    positive = query["must"] + query["should"]
+    clauses, params = [], []
+    for term in positive:
+        clause, term_params = _scan_clause(search_cols, term, case_sensitive)
+        clauses.append(f"({clause})")
+        params.extend(term_params)
+    where = f"WHERE {' OR '.join(clauses)}" if clauses else ""
+    df = _fetch_frame(conn, where, tuple(params), order_by="p.row_id")
+
+    total_rows = conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+    averages = conn.execute(
+        "SELECT " + ", ".join(f"COALESCE(AVG(length({c})), 0)" for c in search_cols) + " FROM profiles"
+    ).fetchone()
+    texts = {}
+    for col in search_cols:
+        text = _cell_text(df[col])
+        texts[col] = text if case_sensitive else text.str.casefold()
+    ranked = rank_search_matches(
+        df, texts, query, case_sensitive, total_rows, dict(zip(search_cols, averages))
+    )
+    return _to_records(ranked.head(limit) if limit else ranked)
+
+@offloaded(writes=("csv_path",))
+def deduplicate_csv(
+    csv_path: str,
+    dedupe_column: str = "linkedin_url",
+    keep: str = "first",
+    chunksize: Optional[int] = None,
+    dedupe_columns: Optional[List[str]] = None,
+    fuzzy: bool = False,
+    similarity: float = DEFAULT_SIMILARITY
+) -> Dict[str, Any]:
+    """
+    Remove duplicates on a column, or on every column of `dedupe_columns`.
+    linkedin_url is already unique by index, so on its own it removes
+    nothing. `fuzzy` adds name-similarity matches as in the CSV backend,
+    reading only the key, name and company columns. `chunksize` is
+    accepted for parity with the CSV backend; SQLite never loads the
+    table at once.
+    """
+    _check_keep(keep)
+    path = Path(csv_path).absolute()
+    if not database_path(csv_path).exists() and not path.exists():
+        return {"error": "File not found"}
+
+    columns = [_normalize_column_name(c) for c in dedupe_columns or [dedupe_column]]
+    # linkedin_url is keyed on its canonical dedupe_key, like the CSV backend
+    key_sql = " || char(31) || ".join(
+        "dedupe_key" if c == "linkedin_url" else f"coalesce(trim({c}), '')" for c in columns
+    )
+    with contextlib.closing(_connect(csv_path)) as conn, conn:
+        original_count = conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+        keyed = set(columns) <= set(TEXT_COLUMNS)
+        if keyed and fuzzy:
+            df = pd.read_sql_query(
+                f"SELECT row_id, {key_sql} AS dedupe, full_name, company FROM profiles ORDER BY row_id",
+                conn
+            )
+            duplicates = fuzzy_duplicated(df["dedupe"], df["full_name"], df["company"], similarity, keep)
+            conn.executemany(
+                "DELETE FROM profiles WHERE row_id = ?",
+                ((int(r),) for r in df["row_id"][duplicates])
+            )
+        elif keyed and columns != ["linkedin_url"]:
+            pick = "MIN" if keep == "first" else "MAX"
+            conn.execute(f"""
+                DELETE FROM profiles WHERE row_id NOT IN (
+                    SELECT {pick}(row_id) FROM profiles GROUP BY {key_sql}
+                )
+            """)
+        final_count = conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    return {
+        "original_count": int(original_count),
+        "duplicates_removed": int(original_count - final_count),
+        "final_count": int(final_count),
+        "path": str(path)
+    }
@@ -0,0 +1,239 @@
+# Incremental statistics: "<csv>.stats" holds mergeable aggregates (score
+# sum and histogram, location/company_size counts, date bounds, current role
+# count) for the CSV size/mtime they were computed from. In-place appends
+# merge in just the new rows and deduplicate_csv recomputes them; any other
+# change leaves the sidecar stale and the next get_csv_stats rebuilds it.
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .schema import PARSED_DATE_COLUMNS, normalize_dataframe, apply_schema_dtypes, parse_dates, select_columns
+
+# Columns get_csv_stats needs; everything else is skipped when parsing
+STATS_COLUMNS = ["match_score", "location", "company_size", "found_date", "current_role_mention"]
+
+STATS_SUFFIX = ".stats"
+
+# Default get_csv_stats score bucket edges: <10, 10-14, 15-19, 20+
+DEFAULT_SCORE_BUCKETS = [10, 15, 20]
+
+def _stats_path(path: Path) -> Path:
+    return path.with_name(path.name + STATS_SUFFIX)
+
+def _score_key(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def stats_aggregates(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Mergeable statistics of a typed frame holding STATS_COLUMNS. Each column
+    is reduced in a single vectorized pass: integer scores and categorical
+    breakdowns are counted with bincount, nothing is cast to text.
+    """
+    scores = np.empty(0)
+    if "match_score" in df.columns:
+        scores = df["match_score"].to_numpy(dtype="float64", na_value=np.nan)
+        scores = scores[~np.isnan(scores)]
+
+    dates = pd.Series(dtype="datetime64[ns]")
+    if PARSED_DATE_COLUMNS["found_date"] in df.columns:
+        dates = df[PARSED_DATE_COLUMNS["found_date"]]
+    elif "found_date" in df.columns:
+        dates = parse_dates(df["found_date"])
+    earliest, latest = dates.min(), dates.max()
+    return {
+        "rows": len(df),
+        "score_count": int(len(scores)),
+        "score_sum": float(scores.sum()),
+        "scores": _score_histogram(scores),
+        "locations": _category_counts(df, "location"),
+        "company_sizes": _category_counts(df, "company_size"),
+        "found_date_min": None if pd.isna(earliest) else str(earliest.date()),
+        "found_date_max": None if pd.isna(latest) else str(latest.date()),
+        "current_role_count": _prefix_count(df, "current_role_mention", "YES")
+    }
+
+def _score_histogram(scores: np.ndarray) -> Dict[str, int]:
+    """
+    Exact value -> count histogram of (non-missing) scores.
+    """
+    if not len(scores):
+        return {}
+    low, high = scores.min(), scores.max()
+    if high - low < 1_000_000 and np.array_equal(scores, np.floor(scores)):
+        counts = np.bincount((scores - low).astype(np.int64))
+        values = np.flatnonzero(counts)
+        return {_score_key(low + v): int(counts[v]) for v in values}
+    histogram: Dict[str, int] = {}
+    for value, count in pd.Series(scores).value_counts().items():
+        key = _score_key(value)
+        histogram[key] = histogram.get(key, 0) + int(count)
+    return histogram
+
+def _category_counts(df: pd.DataFrame, col: str) -> Dict[str, int]:
+    """
+    Non-zero value counts of a column via its categorical codes.
+    """
+    if col not in df.columns:
+        return {}
+    values = df[col]
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    codes = values.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+    return {str(c): int(n) for c, n in zip(values.cat.categories, counts) if n}
+
+def _prefix_count(df: pd.DataFrame, col: str, prefix: str) -> int:
+    """
+    Rows whose text in `col` starts with `prefix`, testing each distinct
+    category once when the column is categorical.
+    """
+    if col not in df.columns:
+        return 0
+    values = df[col]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        matches = values.cat.categories.astype(str).str.startswith(prefix)
+        codes = values.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(matches))
+        return int(counts[np.asarray(matches, dtype=bool)].sum())
+    if not (isinstance(values.dtype, pd.StringDtype) or values.dtype == object):
+        # Numeric or all-empty columns hold no text that could match
+        return 0
+    # Missing and non-text cells never match
+    return int(values.str.startswith(prefix, na=False).sum())
+
+def merge_stats(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aggregates of two disjoint sets of rows combined.
+    """
+    def add(x, y):
+        merged = dict(x)
+        for k, v in y.items():
+            merged[k] = merged.get(k, 0) + v
+        return merged
+
+    def bound(pick, x, y):
+        present = [d for d in (x, y) if d]
+        return pick(present) if present else None
+
+    return {
+        "rows": a["rows"] + b["rows"],
+        "score_count": a["score_count"] + b["score_count"],
+        "score_sum": a["score_sum"] + b["score_sum"],
+        "scores": add(a["scores"], b["scores"]),
+        "locations": add(a["locations"], b["locations"]),
+        "company_sizes": add(a["company_sizes"], b["company_sizes"]),
+        "found_date_min": bound(min, a["found_date_min"], b["found_date_min"]),
+        "found_date_max": bound(max, a["found_date_max"], b["found_date_max"]),
+        "current_role_count": a["current_role_count"] + b["current_role_count"]
+    }
+
+def write_stats(path: Path, aggregates: Dict[str, Any], signature: Dict[str, int]):
+    """
+    Atomically persist aggregates for the file as it is at `signature`.
+    """
+    payload = {"signature": signature, "aggregates": aggregates}
+    fd, temp_path = tempfile.mkstemp(suffix=STATS_SUFFIX, dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(temp_path, _stats_path(path))
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def load_stats(path: Path, signature: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """
+    Persisted aggregates if they describe the file as it is (or was) at
+    `signature`, else None.
+    """
+    try:
+        with open(_stats_path(path), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if payload.get("signature") != signature:
+        return None
+    return payload.get("aggregates")
+
+def scan_stats(chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Aggregates of a whole file computed from its normalized chunks, typed
+    or not.
+    """
+    aggregates = stats_aggregates(pd.DataFrame(columns=STATS_COLUMNS))
+    for chunk in chunks:
+        typed = apply_schema_dtypes(select_columns(chunk, STATS_COLUMNS).copy())
+        aggregates = merge_stats(aggregates, stats_aggregates(typed))
+    return aggregates
+
+def extend_stats(path: Path, rows: pd.DataFrame, before: Dict[str, int], after: Dict[str, int]):
+    """
+    Merge rows just appended into a sidecar that matched the file right
+    before the append (`before`); the file is now at `after`. The rows are
+    parsed back from their CSV text so they're typed exactly as a later
+    read of the file would type them.
+    """
+    aggregates = load_stats(path, before)
+    if aggregates is None:
+        return
+    parsed = pd.read_csv(io.StringIO(rows.to_csv(index=False)), dtype=str)
+    typed = apply_schema_dtypes(normalize_dataframe(parsed)[STATS_COLUMNS])
+    write_stats(path, merge_stats(aggregates, stats_aggregates(typed)), after)
+
+def score_distribution(histogram: Dict[str, int], edges: Optional[List[float]] = None) -> Dict[str, int]:
+    """
+    Count scores per bucket between ascending `edges`, highest bucket
+    first. Integer edges get labels like "10-14"; fractional ones "10-<15.5".
+    """
+    edges = DEFAULT_SCORE_BUCKETS if edges is None else [float(e) for e in edges]
+    if not edges or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError("score_buckets must be a non-empty, strictly ascending list of edges")
+
+    values = np.array([float(k) for k in histogram], dtype=float)
+    counts = np.array(list(histogram.values()), dtype=float)
+    totals = np.bincount(np.digitize(values, edges), weights=counts, minlength=len(edges) + 1)
+
+    integral = all(float(e).is_integer() for e in edges)
+    fmt = [_score_key(e) for e in edges]
+    labels = [f"<{fmt[0]}"]
+    for i in range(1, len(edges)):
+        upper = _score_key(edges[i] - 1) if integral else f"<{fmt[i]}"
+        labels.append(f"{fmt[i - 1]}-{upper}")
+    labels.append(f"{fmt[-1]}+")
+    return {label: int(total) for label, total in reversed(list(zip(labels, totals)))}
+
+def render_stats(
+    aggregates: Dict[str, Any],
+    path: Path,
+    score_buckets: Optional[List[float]] = None
+) -> Dict[str, Any]:
+    """
+    get_csv_stats result for a file's aggregates.
+    """
+    score_count = aggregates["score_count"]
+    avg_score = aggregates["score_sum"] / score_count if score_count else 0
+
+    def ranked(counts):
+        return dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+
+    return {
+        "total_profiles": aggregates["rows"],
+        "avg_score": round(avg_score, 2),
+        "score_distribution": score_distribution(aggregates["scores"], score_buckets),
+        "location_breakdown": dict(list(ranked(aggregates["locations"]).items())[:10]),
+        "company_size_breakdown": ranked(aggregates["company_sizes"]),
+        "found_date_range": {
+            "earliest": aggregates["found_date_min"] or "",
+            "latest": aggregates["found_date_max"] or ""
+        },
+        "current_role_count": aggregates["current_role_count"],
+        "path": str(path)
+    }
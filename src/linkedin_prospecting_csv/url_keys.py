@@ -0,0 +1,98 @@
+# Canonical dedupe keys for profile URLs. Spelling variants of one profile
+# (scheme, "www."/mobile/country host, query string, fragment, trailing
+# slash, slug case) collapse to one key such as "linkedin.com/in/jane".
+# The whole column is processed at once: on pyarrow-backed strings each
+# row's key is located as a byte span and every span is cut out in a
+# single pass over the string buffer; otherwise a short chain of
+# column-wide regex replaces does the same. Never a per-row urlparse.
+import numpy as np
+import pandas as pd
+
+# Columns whose dedupe keys are canonical URLs rather than stripped text
+URL_KEY_COLUMNS = {"linkedin_url"}
+
+# Bumped whenever canonicalization changes, so persisted keys are rebuilt
+KEY_FORMAT = 1
+
+_SCHEME = r"^[a-z][a-z0-9+.\-]*://"
+# "www.", "m." and country hosts ("uk.", "de.") serve the same profiles
+_LINKEDIN_SUBDOMAIN = r"^[a-z]{1,3}\.(?=linkedin\.com(?:[/?#]|$))"
+_LINKEDIN_PREFIX = r"^(?:[a-z][a-z0-9+.\-]*://)?(?:[a-z]{1,3}\.)?linkedin\.com(?:[/?#]|$)"
+_WWW = r"^www\."
+_SCHEME_WWW = r"^(?:[a-z][a-z0-9+.\-]*://)?www\."
+# Trailing slashes, then any query string or fragment
+_TAIL = r"/*(?:[?#].*)?$"
+
+def canonicalize_urls(series: pd.Series) -> pd.Series:
+    """
+    Canonical key per URL; missing values become "". Idempotent, so keys
+    that are already canonical map to themselves.
+    """
+    keys = series.fillna("").astype(str).str.strip().str.lower()
+    if getattr(keys.dtype, "storage", None) == "pyarrow":
+        return _cut_spans(keys)
+    return _rewrite(keys)
+
+def _rewrite(keys: pd.Series) -> pd.Series:
+    """
+    Regex path of canonicalize_urls for already stripped, lowercased keys.
+    """
+    keys = keys.str.replace(_SCHEME, "", regex=True)
+    keys = keys.str.replace(_LINKEDIN_SUBDOMAIN, "", regex=True)
+    keys = keys.str.replace(_WWW, "", regex=True)
+    return keys.str.replace(_TAIL, "", regex=True)
+
+def _cut_spans(keys: pd.Series) -> pd.Series:
+    """
+    Arrow path of canonicalize_urls for already stripped, lowercased keys.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = pa.array(keys, type=pa.large_string())
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    n = len(values)
+    offsets = np.frombuffer(values.buffers()[1], dtype=np.int64)[values.offset:values.offset + n + 1]
+    data = np.frombuffer(values.buffers()[2], dtype=np.uint8) if n else np.zeros(0, dtype=np.uint8)
+    base = offsets[:-1]
+    length = np.diff(offsets)
+
+    # Start: the LinkedIn host itself, else past any scheme and "www."
+    start = np.zeros(n, dtype=np.int64)
+    linkedin = pc.match_substring_regex(values, _LINKEDIN_PREFIX).to_numpy(zero_copy_only=False)
+    if linkedin.any():
+        start[linkedin] = pc.find_substring(values.filter(linkedin), "linkedin.com").to_numpy()
+    other = np.flatnonzero(~linkedin)
+    if len(other):
+        rest = values.take(other)
+        scheme = pc.match_substring_regex(rest, _SCHEME).to_numpy(zero_copy_only=False)
+        skip = np.where(scheme, pc.find_substring(rest, "://").to_numpy() + 3, 0)
+        www = pc.match_substring_regex(rest, _SCHEME_WWW)
+        start[other] = skip + 4 * www.to_numpy(zero_copy_only=False)
+
+    # End: the first "?" or "#", else the end of the row
+    end = length.copy()
+    hits = np.flatnonzero((data == ord("?")) | (data == ord("#")))
+    if len(hits):
+        rows = np.searchsorted(offsets, hits, side="right") - 1
+        first = np.r_[True, rows[1:] != rows[:-1]]
+        end[rows[first]] = hits[first] - base[rows[first]]
+    end = np.maximum(end, start)
+
+    # Trailing slashes, a few rows and a few bytes at a time
+    trailing = np.flatnonzero(end > start)
+    while len(trailing):
+        slash = data[base[trailing] + end[trailing] - 1] == ord("/")
+        trailing = trailing[slash]
+        end[trailing] -= 1
+        trailing = trailing[end[trailing] > start[trailing]]
+
+    # Cut every span out of the buffer in one pass: each row contributes
+    # a run of dropped bytes, a run of kept bytes, then another dropped run
+    runs = np.stack([start, end - start, length - end], axis=1).ravel()
+    keep = np.repeat(np.tile([False, True, False], n), runs)
+    new_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(end - start, out=new_offsets[1:])
+    cut = pa.LargeStringArray.from_buffers(n, pa.py_buffer(new_offsets), pa.py_buffer(data[keep]))
+    return pd.Series(pd.array(cut, dtype=keys.dtype), index=keys.index, name=keys.name)